@@ -0,0 +1,313 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from blocks import BlockType, block_to_block_type, scan_blocks
+from converter import markdown_to_document, markdown_to_html_node
+from splitter import markdown_to_blocks, text_to_textnodes
+from template import compile_template
+from urls import UrlResolver
+
+
+WORDS = (
+    "the ring of power was forged in secret by sauron in the fires of mount doom "
+    "elves dwarves men hobbits wizards rivendell lothlorien gondor rohan shire"
+).split()
+PAGE_KINDS = ("prose", "long", "links", "lists", "code")
+ADVERSARIAL_KINDS = (
+    "brackets",
+    "delimiters",
+    "emphasis",
+    "links",
+    "images",
+    "snake_case",
+    "mixed",
+)
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+
+def _sentence(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _inline(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(2, 5)):
+        parts.append(_sentence(rng, rng.randint(3, 10)))
+        parts.append(
+            rng.choice(
+                (
+                    f"**{_sentence(rng, 2)}**",
+                    f"_{_sentence(rng, 2)}_",
+                    f"`{rng.choice(WORDS)}()`",
+                    f"[{_sentence(rng, 2)}](/{rng.choice(WORDS)}/{rng.randint(1, 99)})",
+                    f"![{rng.choice(WORDS)}](/images/{rng.choice(WORDS)}.png)",
+                )
+            )
+        )
+    return " ".join(parts)
+
+
+def synthetic_page(rng: random.Random, kind: str, scale: int = 1) -> str:
+    """
+    Build markdown page of given kind: "prose", "long" (very long document), "links"
+    (link heavy), "lists" (list heavy) or "code" (large code blocks).
+    """
+    blocks = [f"# {_sentence(rng, 5)}"]
+    if kind == "prose":
+        sections = 6 * scale
+    elif kind == "long":
+        sections = 150 * scale
+    else:
+        sections = 20 * scale
+    for section in range(sections):
+        if section % 5 == 0:
+            blocks.append(f"## {_sentence(rng, 4)}")
+        if kind == "links":
+            blocks.append(
+                " ".join(
+                    f"[{_sentence(rng, 2)}](https://example.com/{rng.randint(1, 10**6)})"
+                    for _ in range(40)
+                )
+            )
+        elif kind == "lists":
+            blocks.append("\n".join(f"- {_inline(rng)}" for _ in range(15)))
+            blocks.append("\n".join(f"{i}. {_sentence(rng, 6)}" for i in range(1, 16)))
+        elif kind == "code":
+            lines = [f"    {_sentence(rng, 6)}();" for _ in range(60)]
+            blocks.append("```\n" + "\n".join(lines) + "\n```")
+            blocks.append(_inline(rng))
+        else:
+            blocks.append(_inline(rng) + "\n" + _inline(rng))
+            blocks.append("> " + _sentence(rng) + "\n> " + _sentence(rng))
+    return "\n\n".join(blocks) + "\n"
+
+
+def adversarial_page(kind: str, size: int = 100_000) -> str:
+    """
+    Build markdown page with a single paragraph of about size characters that is
+    pathological for the inline parser: "brackets" (deeply nested and unmatched
+    brackets), "delimiters" (unclosed code, italic and bold runs), "emphasis"
+    (nested emphasis openers), "links" (thousands of links), "images" (thousands
+    of images), "snake_case" (underscores inside words) or "mixed".
+    """
+    if kind == "brackets":
+        depth = size // 4
+        text = "[" * depth + "a" + "]" * depth + "(" * depth + "b" + ")" * depth
+    elif kind == "delimiters":
+        text = "`_**" + "a*" * (size // 2 - 2)
+    elif kind == "emphasis":
+        text = "**_`[" * (size // 5)
+    elif kind == "mixed":
+        text = "_*`[](!" * (size // 7)
+    elif kind in ("links", "images", "snake_case"):
+        unit = {
+            "links": "[l{0}](/u{0})",
+            "images": "![i{0}](/i{0}.png)",
+            "snake_case": "snake_case_{0}",
+        }[kind]
+        parts = []
+        length = 0
+        while length < size:
+            parts.append(unit.format(len(parts)))
+            length += len(parts[-1]) + 1
+        text = " ".join(parts)
+    else:
+        raise ValueError(f"unknown adversarial page kind: {kind}")
+    return f"# {kind}\n\n{text}\n"
+
+
+def synthetic_corpus(
+    pages: int, seed: int = 0, scale: int = 1
+) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (relative path, markdown) of deterministic synthetic pages cycling through
+    all page kinds.
+    """
+    rng = random.Random(seed)
+    for i in range(pages):
+        kind = PAGE_KINDS[i % len(PAGE_KINDS)]
+        yield os.path.join(kind, f"page{i}", "index.md"), synthetic_page(
+            rng, kind, scale
+        )
+
+
+def write_corpus(directory: str, pages: int, seed: int = 0, scale: int = 1):
+    """
+    Write synthetic corpus as a content directory.
+    """
+    for rel_path, markdown in synthetic_corpus(pages, seed, scale):
+        path = os.path.join(directory, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(markdown)
+
+
+def _inline_texts(blocks: List[str]) -> List[str]:
+    texts = []
+    for block in blocks:
+        if block_to_block_type(block) != BlockType.CODE:
+            texts.extend(line.lstrip("#>-0123456789. ") for line in block.split("\n"))
+    return texts
+
+
+def time_stages(documents: List[str], out_dir: str) -> Dict[str, float]:
+    """
+    Run every pipeline stage over all documents and return seconds spent per stage.
+    """
+    template = compile_template(_template_path(out_dir))
+    timings = {}
+
+    def timed(name: str, run: Callable):
+        start = time.perf_counter()
+        result = run()
+        timings[name] = time.perf_counter() - start
+        return result
+
+    blocks = timed(
+        "markdown_to_blocks", lambda: [markdown_to_blocks(md) for md in documents]
+    )
+    timed(
+        "block_to_block_type",
+        lambda: [block_to_block_type(block) for page in blocks for block in page],
+    )
+    timed("scan_blocks", lambda: [list(scan_blocks(md)) for md in documents])
+    texts = [_inline_texts(page) for page in blocks]
+    timed(
+        "text_to_textnodes",
+        lambda: [text_to_textnodes(text) for page in texts for text in page],
+    )
+    nodes = timed(
+        "markdown_to_html_node", lambda: [markdown_to_html_node(md) for md in documents]
+    )
+    timed("to_html", lambda: [node.to_html() for node in nodes])
+    # pages are built from documents, with urls passed through a resolver
+    resolve_url = UrlResolver("/site/")
+    docs = timed(
+        "markdown_to_document", lambda: [markdown_to_document(md) for md in documents]
+    )
+    html = timed(
+        "iter_html", lambda: [list(doc.iter_html(resolve_url)) for doc in docs]
+    )
+    pages = timed(
+        "template",
+        lambda: [
+            template.render({"Title": "Title", "Content": page}, resolve_url)
+            for page in html
+        ],
+    )
+
+    def write():
+        for i, page in enumerate(pages):
+            with open(os.path.join(out_dir, f"{i}.html"), "w") as f:
+                f.write(page)
+
+    timed("write", write)
+    return timings
+
+
+def _template_path(directory: str) -> str:
+    path = os.path.join(directory, "template.html")
+    with open(path, "w") as f:
+        f.write(TEMPLATE)
+    return path
+
+
+def run_benchmark(pages: int, seed: int = 0, scale: int = 1, repeat: int = 3) -> dict:
+    """
+    Time all stages over a synthetic corpus, keeping the best of `repeat` runs.
+    """
+    documents = [markdown for _, markdown in synthetic_corpus(pages, seed, scale)]
+    best: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as out_dir:
+        for _ in range(repeat):
+            for stage, seconds in time_stages(documents, out_dir).items():
+                best[stage] = min(seconds, best.get(stage, seconds))
+    return {
+        "corpus": {
+            "pages": pages,
+            "seed": seed,
+            "scale": scale,
+            "bytes": sum(len(md) for md in documents),
+        },
+        "python": platform.python_version(),
+        "stages": best,
+    }
+
+
+def compare(result: dict, baseline: dict) -> Dict[str, float]:
+    """
+    Return ratio of result to baseline time for every stage present in both.
+    """
+    return {
+        stage: seconds / baseline["stages"][stage]
+        for stage, seconds in result["stages"].items()
+        if baseline["stages"].get(stage)
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark site generation stages.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--scale", type=int, default=1, help="multiply page length")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument(
+        "--baseline", help="compare against results stored in this file"
+    )
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.1,
+        help="fail when a stage is slower than baseline by more than this fraction",
+    )
+    parser.add_argument(
+        "--write-corpus", metavar="DIR", help="only write the synthetic content to DIR"
+    )
+    args = parser.parse_args(argv)
+
+    if args.write_corpus:
+        write_corpus(args.write_corpus, args.pages, args.seed, args.scale)
+        return 0
+    result = run_benchmark(args.pages, args.seed, args.scale, args.repeat)
+    print(f"{result['corpus']['pages']} pages, {result['corpus']['bytes']} bytes")
+    ratios = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            ratios = compare(result, json.load(f))
+    for stage, seconds in result["stages"].items():
+        line = f"{stage:<24}{seconds * 1000:>10.1f} ms"
+        if stage in ratios:
+            line += f"  {ratios[stage]:>6.2f}x baseline"
+        print(line)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+    regressions = [
+        stage for stage, ratio in ratios.items() if ratio > 1 + args.max_regression
+    ]
+    if regressions:
+        print(f"Regressed stages: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
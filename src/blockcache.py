@@ -0,0 +1,109 @@
+import hashlib
+import marshal
+import os
+from collections import OrderedDict
+
+from blocks import BlockType
+from manifest import GENERATOR_VERSION
+from storage import replace_file
+
+
+BLOCK_CACHE_PATH = os.path.join(".build", "blocks.cache")
+BLOCK_CACHE_SIZE = 64 * 1024 * 1024
+CACHE_FORMAT = 1
+
+_open_caches: dict[str, "BlockCache"] = {}
+
+
+class BlockCache:
+
+    def __init__(self, path: str, max_bytes: int = BLOCK_CACHE_SIZE):
+        """
+        Initialize BlockCache.
+
+        Args:
+            path: Location of the cache file on disk
+            max_bytes: Size bound of cached HTML, least recently used blocks are
+                evicted beyond it
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[str, str] = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.added: list[tuple[str, str]] = []
+
+    @classmethod
+    def load(cls, path: str, max_bytes: int = BLOCK_CACHE_SIZE) -> "BlockCache":
+        """
+        Load cache from disk. A missing, unreadable or outdated file gives an empty
+        cache.
+        """
+        cache = cls(path, max_bytes)
+        try:
+            with open(path, "rb") as f:
+                cache_format, entries = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return cache
+        if cache_format == CACHE_FORMAT:
+            for key, html in entries:
+                cache.put(key, html, record=False)
+        return cache
+
+    def save(self):
+        with replace_file(self.path, "wb") as f:
+            marshal.dump((CACHE_FORMAT, list(self.entries.items())), f)
+
+    @staticmethod
+    def key(block_type: BlockType, lines: list[str], namespace: str = "") -> str:
+        """
+        Hash block contents. namespace tells apart renderings of the same block, e.g.
+        with urls resolved differently.
+        """
+        digest = hashlib.sha1(
+            f"{GENERATOR_VERSION}\0{namespace}\0{block_type.value}\0".encode()
+        )
+        for line in lines:
+            digest.update(line.encode())
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> str | None:
+        html = self.entries.get(key)
+        if html is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return html
+
+    def put(self, key: str, html: str, record: bool = True):
+        """
+        Store rendered block. Recorded entries are returned by take_added so worker
+        processes can hand them over to the parent.
+        """
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous)
+        self.entries[key] = html
+        self.size += len(html)
+        if record:
+            self.added.append((key, html))
+        while self.size > self.max_bytes and self.entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def take_added(self) -> list[tuple[str, str]]:
+        added, self.added = self.added, []
+        return added
+
+
+def open_block_cache(path: str, max_bytes: int = BLOCK_CACHE_SIZE) -> BlockCache:
+    """
+    Return the cache stored at path, loading it only once per process.
+    """
+    cache = _open_caches.get(path)
+    if cache is None:
+        cache = _open_caches[path] = BlockCache.load(path, max_bytes)
+    return cache
@@ -1,5 +1,6 @@
 from enum import Enum
 import re
+from typing import Iterator, TextIO
 
 
 HEADING_REGEX = re.compile(r"^\#{1,6}\ ")
@@ -30,3 +31,80 @@ def block_to_block_type(block: str) -> BlockType:
     if all([line.startswith(f"{i}. ") for i, line in enumerate(block_lines, start=1)]):
         return BlockType.ORDERED_LIST
     return BlockType.PARAGRAPH
+
+
+class _BlockScanner:
+    """
+    Accumulate lines of one block and track which block types they still satisfy.
+    Whitespace-only lines at the edges of a block and whitespace around it are
+    dropped, matching markdown_to_blocks.
+    """
+
+    def __init__(self):
+        self.lines: list[str] = []
+        self.pending_blank: list[str] = []
+        self.quote = self.unordered = self.ordered = True
+
+    def add(self, line: str):
+        if not line.strip():
+            if self.lines:
+                self.pending_blank.append(line)
+            return
+        if not self.lines:
+            line = line.lstrip()
+        else:
+            self._fold(self.lines[-1], len(self.lines))
+            for blank in self.pending_blank:
+                self.lines.append(blank)
+                self._fold(blank, len(self.lines))
+            self.pending_blank.clear()
+        self.lines.append(line)
+
+    def _fold(self, line: str, number: int):
+        self.quote = self.quote and line.startswith(">")
+        self.unordered = self.unordered and line.startswith("- ")
+        self.ordered = self.ordered and line.startswith(f"{number}. ")
+
+    def finish(self) -> tuple[BlockType, list[str]] | None:
+        if not self.lines:
+            return None
+        lines = self.lines
+        lines[-1] = lines[-1].rstrip()
+        self._fold(lines[-1], len(lines))
+        if HEADING_REGEX.match(lines[0]):
+            block_type = BlockType.HEADING
+        elif lines[0].startswith("```") and lines[-1].endswith("```"):
+            block_type = BlockType.CODE
+        elif self.quote:
+            block_type = BlockType.QUOTE
+        elif self.unordered:
+            block_type = BlockType.UNORDERED_LIST
+        elif self.ordered:
+            block_type = BlockType.ORDERED_LIST
+        else:
+            block_type = BlockType.PARAGRAPH
+        return block_type, lines
+
+
+def scan_blocks(source: str | TextIO) -> Iterator[tuple[BlockType, list[str]]]:
+    """
+    Read markdown line by line and yield (BlockType, lines) for every block as soon
+    as it ends. Blocks are separated by empty lines like in markdown_to_blocks and
+    classified like block_to_block_type. Accepts the whole text or a file object.
+    """
+    if isinstance(source, str):
+        lines = source.split("\n")
+    else:
+        lines = (line.rstrip("\n") for line in source)
+    scanner = _BlockScanner()
+    for line in lines:
+        if line:
+            scanner.add(line)
+            continue
+        block = scanner.finish()
+        if block is not None:
+            yield block
+            scanner = _BlockScanner()
+    block = scanner.finish()
+    if block is not None:
+        yield block
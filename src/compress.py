@@ -0,0 +1,128 @@
+import gzip
+import hashlib
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import console
+from copyfiles import list_files, remove_and_prune
+
+
+COMPRESS_CACHE_DIR = os.path.join(".build", "gzip")
+TEXT_EXTENSIONS = (".html", ".css", ".js", ".svg", ".xml", ".json", ".txt", ".map")
+
+
+class CompressCache:
+
+    def __init__(self, directory: str):
+        """
+        Initialize CompressCache. Compressed outputs are stored under the hash of
+        their plain bytes, so unchanged outputs are never compressed twice whatever
+        the build wrote them.
+
+        Args:
+            directory: Directory holding compressed outputs
+        """
+        self.directory = directory
+        self.used: set[str] = set()
+
+    def path(self, data: bytes, level: int) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.directory, f"{digest}-{level}.gz")
+        self.used.add(path)
+        return path
+
+    def prune(self) -> int:
+        """
+        Remove entries not used since the cache was created.
+
+        Returns:
+            Number of entries removed
+        """
+        try:
+            entries = [entry.path for entry in os.scandir(self.directory)]
+        except FileNotFoundError:
+            return 0
+        removed = 0
+        for path in entries:
+            if path not in self.used:
+                os.remove(path)
+                removed += 1
+        return removed
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def compress_outputs(
+    dest_dir: str, cache: CompressCache, level: int = 9, workers: int | None = None
+) -> tuple[int, int]:
+    """
+    Write a .gz sibling next to every text output in dest_dir, for servers looking
+    up precompressed files. Outputs whose bytes were compressed before reuse the
+    cached .gz. Siblings of outputs that are gone are removed.
+
+    Args:
+        dest_dir: Output directory
+        cache: Store of compressed outputs
+        level: gzip compression level, 1 (fastest) to 9 (smallest)
+        workers: Number of threads compressing, zlib releases the GIL
+
+    Returns:
+        Number of outputs compressed and number reused from the cache
+    """
+    files = list_files(dest_dir)
+    present = set(files)
+    outputs = []
+    for rel_path in files:
+        if rel_path.endswith(TEXT_EXTENSIONS):
+            outputs.append(rel_path)
+        elif rel_path.endswith(".gz") and rel_path[:-3].endswith(TEXT_EXTENSIONS):
+            if rel_path[:-3] not in present:
+                path = os.path.join(dest_dir, rel_path)
+                console.file_message(f"Removing stale compressed file {path}")
+                remove_and_prune(path, dest_dir)
+    os.makedirs(cache.directory, exist_ok=True)
+    compressed = 0
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        jobs = [
+            executor.submit(
+                _compress_file, os.path.join(dest_dir, rel_path), cache, level
+            )
+            for rel_path in outputs
+        ]
+        for done, (rel_path, job) in enumerate(zip(outputs, jobs), 1):
+            if job.result():
+                compressed += 1
+                console.file_message(
+                    f"Compressing file {os.path.join(dest_dir, rel_path)}"
+                )
+            console.progress("Compressing outputs", done, len(outputs))
+    return compressed, len(outputs) - compressed
+
+
+def _compress_file(path: str, cache: CompressCache, level: int) -> bool:
+    with open(path, "rb") as f:
+        data = f.read()
+    cached_path = cache.path(data, level)
+    compressed = not os.path.exists(cached_path)
+    if compressed:
+        tmp_path = f"{cached_path}.{os.getpid()}.{id(data)}.tmp"
+        with open(tmp_path, "wb") as f:
+            # fixed mtime keeps the output reproducible
+            f.write(gzip.compress(data, compresslevel=level, mtime=0))
+        os.replace(tmp_path, cached_path)
+    gz_path = path + ".gz"
+    try:
+        if os.path.samefile(cached_path, gz_path):
+            return compressed
+    except FileNotFoundError:
+        pass
+    tmp_path = gz_path + ".tmp"
+    try:
+        os.link(cached_path, tmp_path)
+    except OSError:
+        # different filesystem
+        shutil.copyfile(cached_path, tmp_path)
+    os.replace(tmp_path, gz_path)
+    return compressed
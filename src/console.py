@@ -0,0 +1,47 @@
+import sys
+
+
+OUTPUT_MODES = ("verbose", "quiet", "progress")
+
+_mode = "verbose"
+
+
+def set_mode(mode: str):
+    """
+    Select how build progress is reported: "verbose" prints a line per file,
+    "quiet" prints only errors and summaries, "progress" draws a progress bar.
+    """
+    global _mode
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"unknown output mode {mode}, expected one of {OUTPUT_MODES}")
+    _mode = mode
+
+
+def file_message(message: str):
+    """
+    Report work done on a single file.
+    """
+    if _mode == "verbose":
+        print(message)
+
+
+def message(message: str):
+    """
+    Report error or build summary, shown in every mode.
+    """
+    if _mode == "progress":
+        # keep the progress bar on its own line
+        sys.stderr.write("\r\033[K")
+    print(message)
+
+
+def progress(label: str, done: int, total: int, width: int = 30):
+    if _mode != "progress" or total == 0:
+        return
+    filled = width * done // total
+    sys.stderr.write(
+        f"\r{label} [{'#' * filled}{'.' * (width - filled)}] {done}/{total}"
+    )
+    if done == total:
+        sys.stderr.write("\n")
+    sys.stderr.flush()
@@ -1,48 +1,127 @@
-from blocks import block_to_block_type, BlockType
+from typing import Iterable, Iterator, TextIO
+
+from blockcache import BlockCache
+from blocks import scan_blocks, BlockType
+from document import Document
 from leafnode import LeafNode
 from parentnode import ParentNode
-from splitter import markdown_to_blocks, text_to_textnodes
+from splitter import text_to_textnodes
 from textnode import text_node_to_html_node, TextNode, TextType
+from urls import UrlResolver
 
 
-def markdown_to_html_node(markdown: str) -> ParentNode:
+def markdown_to_html_node(markdown: str | TextIO) -> ParentNode:
     """
     Convert markdown doc to HTML ParentNode with children
     """
-    # split raw markdown to text blocks
-    blocks = markdown_to_blocks(markdown)
-    children = []
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        if block_type == BlockType.PARAGRAPH:
-            children.append(handle_paragraph(block))
-        elif block_type == BlockType.QUOTE:
-            children.append(handle_quote(block))
-        elif block_type == BlockType.HEADING:
-            children.append(handle_heading(block))
-        elif block_type in (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST):
-            children.append(handle_lists(block, block_type))
-        elif block_type == BlockType.CODE:
-            children.append(handle_code(block))
-        else:
-            raise Exception(
-                f"got unexpected block type {block_type.value} in markdown_to_html_node"
-            )
-    return ParentNode("div", children)
-
-
-def handle_paragraph(block: str) -> ParentNode:
-    children = text_to_children(" ".join(block.split("\n")))
+    return ParentNode("div", list(markdown_to_block_nodes(markdown)))
+
+
+def markdown_to_document(
+    markdown: str | TextIO,
+    block_cache: BlockCache | None = None,
+    resolve_url: UrlResolver | None = None,
+    minify: bool = False,
+) -> Document:
+    """
+    Convert markdown doc to compact Document. Only one block is held as HTMLNode
+    objects at a time. With block_cache, every block is stored as its rendered HTML,
+    with urls already passed through resolve_url and minified with minify, and
+    unchanged blocks are not parsed again.
+    """
+    if block_cache is None:
+        return block_nodes_to_document(markdown_to_block_nodes(markdown))
+    return blocks_to_cached_document(
+        scan_blocks(markdown), block_cache, resolve_url or UrlResolver(), minify
+    )
+
+
+def blocks_to_cached_document(
+    blocks: Iterable[tuple[BlockType, list[str]]],
+    block_cache: BlockCache,
+    resolve_url: UrlResolver,
+    minify: bool = False,
+) -> Document:
+    document = Document()
+    root = document.start_element("div")
+    for block_type, lines in blocks:
+        document.add_leaf(
+            None, cached_block_html(block_type, lines, block_cache, resolve_url, minify)
+        )
+    document.end_element(root)
+    return document
+
+
+def cached_block_html(
+    block_type: BlockType,
+    lines: list[str],
+    block_cache: BlockCache,
+    resolve_url: UrlResolver,
+    minify: bool = False,
+) -> str:
+    key = block_cache.key(block_type, lines, block_namespace(resolve_url, minify))
+    html = block_cache.get(key)
+    if html is None:
+        block_node = block_to_html_node(block_type, lines)
+        html = Document.from_node(block_node).to_html(resolve_url, minify)
+        block_cache.put(key, html)
+    return html
+
+
+def block_namespace(resolve_url: UrlResolver, minify: bool = False) -> str:
+    """
+    Tell apart renderings of blocks that differ by url resolution or minification.
+    """
+    return f"{resolve_url.key}\0minify" if minify else resolve_url.key
+
+
+def block_nodes_to_document(block_nodes: Iterable[ParentNode]) -> Document:
+    document = Document()
+    root = document.start_element("div")
+    for block_node in block_nodes:
+        document.add_node(block_node)
+    document.end_element(root)
+    return document
+
+
+def markdown_to_block_nodes(markdown: str | TextIO) -> Iterator[ParentNode]:
+    """
+    Yield HTML ParentNode for every block of markdown doc, given as text or file.
+    """
+    for block_type, lines in scan_blocks(markdown):
+        yield block_to_html_node(block_type, lines)
+
+
+def block_to_html_node(block_type: BlockType, lines: list[str]) -> ParentNode:
+    if block_type == BlockType.PARAGRAPH:
+        return handle_paragraph(lines)
+    elif block_type == BlockType.QUOTE:
+        return handle_quote(lines)
+    elif block_type == BlockType.HEADING:
+        return handle_heading(lines)
+    elif block_type in (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST):
+        return handle_lists(lines, block_type)
+    elif block_type == BlockType.CODE:
+        return handle_code(lines)
+    else:
+        raise Exception(
+            f"got unexpected block type {block_type.value} in markdown_to_html_node"
+        )
+
+
+def handle_paragraph(lines: list[str]) -> ParentNode:
+    children = text_to_children(" ".join(lines))
     return ParentNode("p", children)
 
 
-def handle_quote(block: str) -> ParentNode:
-    lines = [line.lstrip(">").strip() for line in block.split("\n")]
+def handle_quote(lines: list[str]) -> ParentNode:
+    lines = [line.lstrip(">").strip() for line in lines]
     children = text_to_children(" ".join(lines))
     return ParentNode("blockquote", children)
 
 
-def handle_heading(block: str) -> ParentNode:
+def handle_heading(lines: list[str]) -> ParentNode:
+    block = "\n".join(lines)
     nr_of_hashes = 0
     for char in block:
         if char != "#":
@@ -52,24 +131,24 @@ def handle_heading(block: str) -> ParentNode:
     return ParentNode(f"h{nr_of_hashes}", children)
 
 
-def handle_lists(block: str, block_type: BlockType) -> ParentNode:
-    def create_line_children(block: str, nr: int) -> list[ParentNode]:
+def handle_lists(lines: list[str], block_type: BlockType) -> ParentNode:
+    def create_line_children(lines: list[str], nr: int) -> list[ParentNode]:
         children = []
-        for line in block.split("\n"):
+        for line in lines:
             line_children = text_to_children(line[nr:])
             children.append(ParentNode("li", line_children))
         return children
 
     if block_type == BlockType.UNORDERED_LIST:
-        return ParentNode("ul", create_line_children(block, 2))
+        return ParentNode("ul", create_line_children(lines, 2))
     if block_type == BlockType.ORDERED_LIST:
-        return ParentNode("ol", create_line_children(block, 3))
+        return ParentNode("ol", create_line_children(lines, 3))
     else:
         raise Exception(f"got unexpected block type {BlockType.value} in handle_lists")
 
 
-def handle_code(block: str) -> ParentNode:
-    block = block.strip("```").lstrip("\n")
+def handle_code(lines: list[str]) -> ParentNode:
+    block = "\n".join(lines).strip("```").lstrip("\n")
     code_node = text_node_to_html_node(TextNode(block, TextType.CODE))
     return ParentNode("pre", [code_node])
 
@@ -1,19 +1,243 @@
+import base64
+import hashlib
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import console
+from manifest import hash_file
+from urls import AssetManifest
+
+
+LINK_MODES = ("copy", "hardlink", "reflink")
+# pages and files looked up by their well-known names keep them
+UNFINGERPRINTED_EXTENSIONS = (".html", ".htm", ".txt", ".xml", ".webmanifest")
+# asset manifest fields owned by fingerprinting, integrity only with sri
+FINGERPRINT_KEYS = ("integrity", "url", "size", "mtime")
 
 
 def copy_files(src: str, dest: str):
     """
     Copy files from source directory to destination making sure destination is empty beforehand.
     """
-    print(f"Copying from {src} to {dest}")
+    console.file_message(f"Copying from {src} to {dest}")
     if os.path.exists(dest):
         shutil.rmtree(dest)
     os.mkdir(dest)
     for item in os.listdir(src):
         item_path = os.path.join(src, item)
         if os.path.isfile(item_path):
-            print(f"Copying file {item_path}")
+            console.file_message(f"Copying file {item_path}")
             shutil.copy(item_path, dest)
         else:
             copy_files(item_path, os.path.join(dest, item))
+
+
+def sync_files(
+    src: str,
+    dest: str,
+    previous: list[str] | None = None,
+    link: str = "copy",
+    checksum: bool = False,
+    workers: int = 8,
+) -> list[str]:
+    """
+    Bring destination in line with source directory without wiping it. Only new or
+    changed files are transferred and files synced previously but no longer present
+    in source are removed. Other files in destination (generated pages) are kept.
+
+    Args:
+        src: Source directory
+        dest: Destination directory
+        previous: Relative paths returned by the previous sync
+        link: How files are transferred: "copy", "hardlink" or "reflink"
+        checksum: Compare file contents when size and mtime match
+        workers: Number of threads transferring files
+
+    Returns:
+        Sorted relative paths of all files synced from source
+    """
+    if link not in LINK_MODES:
+        raise ValueError(f"unknown link mode {link}, expected one of {LINK_MODES}")
+    console.file_message(f"Syncing from {src} to {dest}")
+    current = list_files(src)
+    for rel_path in sorted(set(previous or ()) - set(current)):
+        console.file_message(f"Removing stale file {os.path.join(dest, rel_path)}")
+        remove_and_prune(os.path.join(dest, rel_path), dest)
+    changed = [
+        rel_path
+        for rel_path in current
+        if not is_synced(
+            os.path.join(src, rel_path), os.path.join(dest, rel_path), checksum
+        )
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        transfers = [
+            executor.submit(
+                transfer_file,
+                os.path.join(src, rel_path),
+                os.path.join(dest, rel_path),
+                link,
+            )
+            for rel_path in changed
+        ]
+        for done, (rel_path, transfer) in enumerate(zip(changed, transfers), 1):
+            transfer.result()
+            console.file_message(f"Copying file {os.path.join(src, rel_path)}")
+            console.progress("Copying static files", done, len(changed))
+    return current
+
+
+def list_files(directory: str) -> list[str]:
+    """
+    Return sorted paths of all files under directory, relative to it.
+    """
+    files = []
+    for root, _, names in os.walk(directory):
+        for name in names:
+            files.append(os.path.relpath(os.path.join(root, name), directory))
+    return sorted(files)
+
+
+def is_synced(src_path: str, dest_path: str, checksum: bool = False) -> bool:
+    try:
+        src_stat = os.stat(src_path)
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    if (src_stat.st_dev, src_stat.st_ino) == (dest_stat.st_dev, dest_stat.st_ino):
+        return True
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns != dest_stat.st_mtime_ns:
+        return False
+    return not checksum or hash_file(src_path) == hash_file(dest_path)
+
+
+def transfer_file(src_path: str, dest_path: str, link: str = "copy"):
+    """
+    Place src_path at dest_path by copying, hardlinking or reflinking it. Modification
+    time of the source is preserved so the next sync can skip the file.
+    """
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    if link == "hardlink":
+        try:
+            os.link(src_path, dest_path)
+            return
+        except OSError:
+            # different filesystem, fall back to copying
+            pass
+    if link == "reflink" and hasattr(os, "copy_file_range"):
+        try:
+            _copy_file_range(src_path, dest_path)
+            shutil.copystat(src_path, dest_path)
+            return
+        except OSError:
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+    shutil.copy2(src_path, dest_path)
+
+
+def _copy_file_range(src_path: str, dest_path: str):
+    # lets the kernel share extents (reflink) on filesystems supporting it
+    with open(src_path, "rb") as src_file, open(dest_path, "wb") as dest_file:
+        remaining = os.fstat(src_file.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(
+                src_file.fileno(), dest_file.fileno(), remaining
+            )
+            if copied == 0:
+                break
+            remaining -= copied
+
+
+def fingerprint_files(
+    src: str, dest: str, previous: AssetManifest, sri: bool = False
+) -> AssetManifest:
+    """
+    Place a copy of every static file already copied to destination under a name
+    carrying its content hash, index.css as index.3f2a9c1b0e4d.css, so the copies
+    can be cached indefinitely. Copies are hardlinks where possible. Files
+    whose size and mtime match the previous manifest are not hashed again and
+    fingerprinted copies left from it are removed.
+
+    Args:
+        src: Source directory of static files
+        dest: Destination directory
+        previous: Manifest of the previous build
+        sri: Record sha384 subresource integrity of every file
+
+    Returns:
+        Manifest mapping urls of static files to their fingerprinted urls
+    """
+    assets = {}
+    for rel_path in list_files(src):
+        if rel_path.endswith(UNFINGERPRINTED_EXTENSIONS) or os.path.basename(
+            rel_path
+        ).startswith("."):
+            continue
+        src_path = os.path.join(src, rel_path)
+        url = "/" + rel_path.replace(os.sep, "/")
+        stat = os.stat(src_path)
+        entry = previous.assets.get(url, {})
+        if (
+            "url" not in entry
+            or (entry.get("size"), entry.get("mtime"))
+            != (stat.st_size, stat.st_mtime_ns)
+            or (sri and "integrity" not in entry)
+        ):
+            entry = _fingerprint(src_path, url, sri)
+            entry.update(size=stat.st_size, mtime=stat.st_mtime_ns)
+        else:
+            keys = FINGERPRINT_KEYS if sri else FINGERPRINT_KEYS[1:]
+            entry = {key: entry[key] for key in keys if key in entry}
+        # link the copy already in destination, so editing sources in place never
+        # changes a fingerprinted file, unless that copy is the source linked
+        copy_path = os.path.join(dest, rel_path)
+        dest_path = os.path.join(dest, *entry["url"].split("/"))
+        if not is_synced(copy_path, dest_path):
+            console.file_message(f"Fingerprinting file {copy_path} as {dest_path}")
+            linked = os.path.samefile(src_path, copy_path)
+            transfer_file(copy_path, dest_path, "copy" if linked else "hardlink")
+        assets[url] = entry
+    urls = {entry["url"] for entry in assets.values()}
+    for entry in previous.assets.values():
+        if "url" in entry and entry["url"] not in urls:
+            remove_and_prune(os.path.join(dest, *entry["url"].split("/")), dest)
+    return AssetManifest(previous.path, assets)
+
+
+def _fingerprint(path: str, url: str, sri: bool) -> dict:
+    digest = hashlib.sha256()
+    integrity = hashlib.sha384()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+            if sri:
+                integrity.update(chunk)
+    directory, name = url.rsplit("/", 1)
+    stem, _, extension = name.rpartition(".")
+    name = f"{stem or extension}.{digest.hexdigest()[:12]}"
+    if stem:
+        name += f".{extension}"
+    entry = {"url": f"{directory}/{name}"}
+    if sri:
+        entry["integrity"] = "sha384-" + base64.b64encode(integrity.digest()).decode()
+    return entry
+
+
+def remove_and_prune(path: str, root: str):
+    """
+    Remove file and prune directories left empty by it, up to root.
+    """
+    if os.path.lexists(path):
+        os.remove(path)
+    root = os.path.abspath(root)
+    directory = os.path.dirname(os.path.abspath(path))
+    while (
+        directory != root and directory.startswith(root) and not os.listdir(directory)
+    ):
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
@@ -0,0 +1,127 @@
+import email.utils
+import io
+import os
+import threading
+from functools import partial
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = (
+    f'<script>new EventSource("{LIVE_RELOAD_PATH}")'
+    ".onmessage = () => location.reload();</script>"
+)
+
+
+class LiveReload:
+    """
+    Build generation counter that SSE clients wait on.
+    """
+
+    def __init__(self):
+        self.generation = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    def wait(self, generation: int, timeout: float) -> int:
+        with self.condition:
+            self.condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Static file handler answering conditional requests with 304 based on ETag and
+    optionally pushing reload events to pages over server-sent events.
+    """
+
+    live_reload: LiveReload | None = None
+
+    def do_GET(self):
+        if self.live_reload and self.path == LIVE_RELOAD_PATH:
+            self.stream_reload_events()
+            return
+        super().do_GET()
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.endswith("/"):
+            path = os.path.join(path, "index.html")
+        if not os.path.isfile(path):
+            return super().send_head()
+        stat = os.stat(path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        if etag in self.headers.get("If-None-Match", ""):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return None
+        if not (self.live_reload and path.endswith(".html")):
+            self.etag = etag
+            return super().send_head()
+        with open(path, "rb") as f:
+            body = f.read().replace(
+                b"</body>", LIVE_RELOAD_SCRIPT.encode() + b"</body>", 1
+            )
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header(
+            "Last-Modified", email.utils.formatdate(stat.st_mtime, usegmt=True)
+        )
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def end_headers(self):
+        etag = getattr(self, "etag", None)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.etag = None
+        super().end_headers()
+
+    def stream_reload_events(self):
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        generation = self.live_reload.generation
+        try:
+            while True:
+                current = self.live_reload.wait(generation, timeout=15)
+                if current != generation:
+                    self.wfile.write(b"data: reload\n\n")
+                    generation = current
+                else:
+                    # keep idle connection open through proxies
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def start_server(
+    directory: str,
+    port: int,
+    live_reload: LiveReload | None = None,
+    background: bool = True,
+) -> ThreadingHTTPServer:
+    """
+    Serve directory on localhost in a background thread. Without background, serve
+    in the calling thread until the server is shut down.
+    """
+    handler = type("Handler", (DevRequestHandler,), {"live_reload": live_reload})
+    server = ThreadingHTTPServer(("", port), partial(handler, directory=directory))
+    server.daemon_threads = True
+    print(f"Serving {directory} on http://localhost:{server.server_address[1]}/")
+    if background:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    else:
+        server.serve_forever()
+    return server
@@ -0,0 +1,178 @@
+import marshal
+import sys
+from array import array
+from typing import Callable, Iterator, List, TextIO, Tuple
+
+from htmlnode import HTMLNode
+from leafnode import LeafNode
+from minify import collapse_whitespace
+from urls import UrlResolver
+from parentnode import ParentNode
+
+
+# attribute holding a url, per leaf tag
+URL_ATTRIBUTES = {"a": "href", "img": "src"}
+# elements whose text keeps its whitespace when minifying
+PRESERVED_TAGS = frozenset(("pre", "code", "textarea", "script", "style"))
+
+
+class Document:
+    """
+    Compact, array-backed HTML tree. Nodes are stored in document order in flat
+    parallel lists instead of one Python object per node: a node with value None is
+    an element whose descendants are the following nodes up to ends[index].
+    """
+
+    __slots__ = ("tags", "values", "props", "ends")
+
+    def __init__(self):
+        self.tags: List[str | None] = []
+        self.values: List[str | None] = []
+        self.props: List[Tuple[Tuple[str, str], ...] | None] = []
+        self.ends = array("I")
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def start_element(self, tag: str) -> int:
+        """
+        Open element; nodes added until end_element(index) become its descendants.
+        """
+        if not tag:
+            raise ValueError("ParentNode must have tag populated")
+        index = len(self.tags)
+        self.tags.append(sys.intern(tag))
+        self.values.append(None)
+        self.props.append(None)
+        self.ends.append(0)
+        return index
+
+    def end_element(self, index: int):
+        if len(self.tags) == index + 1:
+            raise ValueError("ParentNode must have children populated")
+        self.ends[index] = len(self.tags)
+
+    def add_leaf(self, tag: str | None, value: str, props: dict | None = None):
+        if value is None:
+            raise ValueError("LeafNode must have value populated")
+        index = len(self.tags)
+        self.tags.append(sys.intern(tag) if tag else None)
+        self.values.append(value)
+        self.props.append(
+            tuple((sys.intern(k), v) for k, v in props.items()) if props else None
+        )
+        self.ends.append(index + 1)
+
+    def add_node(self, node: HTMLNode):
+        """
+        Copy HTMLNode subtree into the document.
+        """
+        stack: List[HTMLNode | int] = [node]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, int):
+                self.end_element(item)
+            elif isinstance(item, ParentNode):
+                stack.append(self.start_element(item.tag))
+                if not item.children:
+                    raise ValueError("ParentNode must have children populated")
+                stack.extend(reversed(item.children))
+            else:
+                self.add_leaf(item.tag, item.value, item.props)
+
+    @classmethod
+    def from_node(cls, node: HTMLNode) -> "Document":
+        document = cls()
+        document.add_node(node)
+        return document
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize document with marshal, strings stay interned when loaded back.
+        """
+        return marshal.dumps((self.tags, self.values, self.props, self.ends.tobytes()))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Document":
+        document = cls()
+        document.tags, document.values, document.props, ends = marshal.loads(data)
+        document.ends.frombytes(ends)
+        return document
+
+    def to_node(self, index: int = 0) -> HTMLNode:
+        """
+        Build HTMLNode view of the subtree rooted at index.
+        """
+        end = self.ends[index]
+        root_children: List[HTMLNode] = []
+        # stack of (children list, end of that element)
+        stack = [(root_children, end)]
+        for i in range(index, end):
+            while stack[-1][1] <= i:
+                stack.pop()
+            if self.values[i] is None:
+                element = ParentNode(self.tags[i], [])
+                stack[-1][0].append(element)
+                stack.append((element.children, self.ends[i]))
+            else:
+                props = dict(self.props[i]) if self.props[i] else None
+                stack[-1][0].append(LeafNode(self.tags[i], self.values[i], props))
+        return root_children[0]
+
+    def iter_html(
+        self, resolve_url: Callable[[str], str] | None = None, minify: bool = False
+    ) -> Iterator[str]:
+        """
+        Yield HTML fragments of the whole document in order. With resolve_url, the
+        href of links and src of images are passed through it, and images of known
+        size get dimensions and lazy loading attributes from it. With minify, runs of
+        whitespace in text collapse to a single space, except within pre and code.
+        """
+        tags, values, props, ends = self.tags, self.values, self.props, self.ends
+        closing: List[Tuple[int, str]] = []
+        # end of the outermost open element preserving whitespace
+        preserved_end = 0
+        for i in range(len(tags)):
+            while closing and closing[-1][0] <= i:
+                yield closing.pop()[1]
+            tag = tags[i]
+            value = values[i]
+            if minify and i >= preserved_end:
+                if tag in PRESERVED_TAGS:
+                    preserved_end = ends[i]
+                elif value is not None:
+                    value = collapse_whitespace(value)
+            if value is None:
+                yield f"<{tag}>"
+                closing.append((ends[i], f"</{tag}>"))
+            elif tag is None:
+                yield value
+            elif props[i]:
+                url_attribute = resolve_url and URL_ATTRIBUTES.get(tag)
+                attributes = "".join(
+                    f' {k}="{resolve_url(v) if k == url_attribute else v}"'
+                    for k, v in props[i]
+                )
+                if tag == "img" and isinstance(resolve_url, UrlResolver):
+                    src = dict(props[i]).get("src", "")
+                    attributes += "".join(
+                        f' {k}="{v}"' for k, v in resolve_url.image_attributes(src)
+                    )
+                yield f"<{tag}{attributes}>{value}</{tag}>"
+            else:
+                yield f"<{tag}>{value}</{tag}>"
+        while closing:
+            yield closing.pop()[1]
+
+    def to_html(
+        self, resolve_url: Callable[[str], str] | None = None, minify: bool = False
+    ) -> str:
+        return "".join(self.iter_html(resolve_url, minify))
+
+    def write_html(
+        self,
+        fp: TextIO,
+        resolve_url: Callable[[str], str] | None = None,
+        minify: bool = False,
+    ):
+        fp.writelines(self.iter_html(resolve_url, minify))
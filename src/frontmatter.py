@@ -0,0 +1,83 @@
+import datetime
+from typing import TextIO
+
+from splitter import InvalidMarkdownError
+
+
+FRONT_MATTER_DELIMITER = "---"
+
+
+def split_front_matter(markdown: str) -> tuple[dict, str]:
+    """
+    Split front matter from the markdown doc. Front matter is a block of
+    `key: value` lines between two `---` lines at the very start of the doc, e.g.
+
+        ---
+        title: Why Tom Bombadil Was a Mistake
+        date: 2024-05-01
+        tags: tolkien, opinion
+        summary: Tom adds nothing to the plot.
+        ---
+
+    tags is a comma separated list (optionally in brackets) and date must be an ISO
+    date. Returns the parsed fields and the rest of the doc.
+    """
+    if not markdown.startswith(FRONT_MATTER_DELIMITER):
+        return {}, markdown
+    lines = markdown.split("\n")
+    if lines[0].rstrip() != FRONT_MATTER_DELIMITER:
+        return {}, markdown
+    for end in range(1, len(lines)):
+        if lines[end].rstrip() == FRONT_MATTER_DELIMITER:
+            break
+    else:
+        raise InvalidMarkdownError("front matter is not closed with ---")
+    return _parse_front_matter(lines[1:end]), "\n".join(lines[end + 1 :])
+
+
+def read_front_matter(f: TextIO) -> dict:
+    """
+    Read front matter from the start of an open markdown file like
+    split_front_matter, leaving the file at the first line of the rest of the doc.
+    """
+    first = f.readline()
+    if first.rstrip() != FRONT_MATTER_DELIMITER:
+        f.seek(0)
+        return {}
+    lines = []
+    for line in f:
+        if line.rstrip() == FRONT_MATTER_DELIMITER:
+            return _parse_front_matter(lines)
+        lines.append(line.rstrip("\n"))
+    raise InvalidMarkdownError("front matter is not closed with ---")
+
+
+def _parse_front_matter(lines: list[str]) -> dict:
+    meta = {}
+    for line in lines:
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        key, separator, value = line.partition(":")
+        if not separator:
+            raise InvalidMarkdownError(f"invalid front matter line: {line}")
+        meta[key.strip().lower()] = value.strip()
+    if "tags" in meta:
+        tags = meta["tags"].strip("[]").split(",")
+        meta["tags"] = [tag.strip() for tag in tags if tag.strip()]
+    if "date" in meta:
+        try:
+            datetime.date.fromisoformat(meta["date"])
+        except ValueError:
+            raise InvalidMarkdownError(f"invalid front matter date: {meta['date']}")
+    return meta
+
+
+def template_values(meta: dict) -> dict[str, str]:
+    """
+    Expose front matter fields to the template as capitalized placeholders, e.g.
+    {{ Date }} or {{ Tags }}.
+    """
+    return {
+        key.capitalize(): ", ".join(value) if isinstance(value, list) else value
+        for key, value in meta.items()
+    }
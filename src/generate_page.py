@@ -1,37 +1,663 @@
 import os
-from converter import markdown_to_html_node
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Iterator
+
+import console
+from blockcache import BlockCache, open_block_cache
+from blocks import BlockType, scan_blocks
+from converter import (
+    block_namespace,
+    block_nodes_to_document,
+    block_to_html_node,
+    blocks_to_cached_document,
+    cached_block_html,
+    markdown_to_document,
+)
+from copyfiles import remove_and_prune
+from document import Document
+from frontmatter import read_front_matter, split_front_matter, template_values
+from ledger import write_output
+from manifest import BuildManifest, MANIFEST_PATH, build_inputs, hash_file
+from parsecache import ParseCache
+from pipeline import bounded_map
+from shard import partition
 from splitter import extract_title
+from siteindex import SiteIndex
+from stats import BuildReport, PageStats, format_size
+from template import load_template
+from urls import AssetManifest, UrlResolver, page_url
+
+
+# peak traced memory of rendering a page with statistics per byte of its source,
+# 8 to 15 on the benchmark corpus. Streamed pages peak at their largest block.
+MEMORY_PER_SOURCE_BYTE = 16
+
+
+class BuildError(Exception):
+    pass
 
 
 def generate_page(from_path: str, template_path: str, dest_path: str, basepath: str):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    console.file_message(
+        f"Generating page from {from_path} to {dest_path} using {template_path}"
+    )
+    render_page(from_path, template_path, dest_path, basepath)
+
+
+def render_page(
+    from_path: str,
+    template_path: str,
+    dest_path: str,
+    basepath: str,
+    stats: PageStats | None = None,
+    block_cache: BlockCache | None = None,
+    resolve_url: UrlResolver | None = None,
+    parse_cache: ParseCache | None = None,
+    minify: bool = False,
+) -> dict:
+    """
+    Convert single markdown file to HTML page and write it to dest_path. With stats,
+    every stage runs to completion on its own and is timed separately. With
+    block_cache, blocks rendered by earlier builds are reused. Link and image urls
+    of the page and the template are resolved by resolve_url, by default prefixing
+    root-relative urls with basepath. With parse_cache, a page parsed by an earlier
+    build is only rendered again. With minify, the page is rendered without
+    insignificant whitespace and the template without comments.
+
+    Returns:
+        Front matter of the page, title included
+    """
+    resolve_url = resolve_url or UrlResolver(basepath)
+    if stats is not None:
+        return _render_page_stages(
+            from_path,
+            template_path,
+            dest_path,
+            stats,
+            block_cache,
+            resolve_url,
+            parse_cache,
+            minify,
+        )
     with open(from_path) as f:
-        markdown = f.read()
-    with open(template_path) as f:
-        html_template = f.read()
-    html_node = markdown_to_html_node(markdown)
-    title = extract_title(markdown)
-    html = html_node.to_html()
-    page = (
-        html_template.replace("{{ Title }}", title)
-        .replace("{{ Content }}", html)
-        .replace('href="/', f'href="{basepath}')
-        .replace('src="/', f'src="{basepath}')
-    )
-    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-    with open(dest_path, "w") as f:
-        f.write(page)
+        source = f.read()
+    meta, segments = render_source(
+        source, template_path, resolve_url, block_cache, parse_cache, minify
+    )
+    write_output(dest_path, segments)
+    return meta
 
 
-def generate_page_recursive(
-    dir_path_content: str, template_path: str, dest_dir_path: str, basepath: str
-):
-    for item in os.listdir(dir_path_content):
+def render_source(
+    source: str,
+    template_path: str,
+    resolve_url: UrlResolver,
+    block_cache: BlockCache | None = None,
+    parse_cache: ParseCache | None = None,
+    minify: bool = False,
+) -> tuple[dict, Iterator[str]]:
+    """
+    Parse page source, or take it from parse_cache, and return its front matter and
+    the lazily rendered fragments of the page.
+    """
+    template = load_template(template_path, minify)
+    key = parse_cache and parse_cache.key(
+        source, _parse_namespace(block_cache, resolve_url, minify)
+    )
+    parsed = parse_cache and parse_cache.get(key)
+    if parsed is None:
+        meta, document = _parse_page(source, block_cache, resolve_url, minify)
+        if parse_cache:
+            parse_cache.put(key, meta, document)
+    else:
+        meta, document = parsed
+    content = document.iter_html(resolve_url, _minify_text(block_cache, minify))
+    segments = template.iter_segments(
+        {**template_values(meta), "Content": content}, resolve_url
+    )
+    return meta, segments
+
+
+def _render_page_stages(
+    from_path: str,
+    template_path: str,
+    dest_path: str,
+    stats: PageStats,
+    block_cache: BlockCache | None,
+    resolve_url: UrlResolver,
+    parse_cache: ParseCache | None,
+    minify: bool,
+) -> dict:
+    with stats.stage("read"):
+        with open(from_path) as f:
+            source = f.read()
+        key = parse_cache and parse_cache.key(
+            source, _parse_namespace(block_cache, resolve_url, minify)
+        )
+        parsed = parse_cache and parse_cache.get(key)
+    if parsed is None:
+        with stats.stage("blocks"):
+            meta, markdown = split_front_matter(source)
+            blocks = list(scan_blocks(markdown))
+        with stats.stage("inline"):
+            if block_cache is None:
+                document = block_nodes_to_document(
+                    block_to_html_node(block_type, lines)
+                    for block_type, lines in blocks
+                )
+            else:
+                document = blocks_to_cached_document(
+                    blocks, block_cache, resolve_url, minify
+                )
+            meta["title"] = meta.get("title") or extract_title(markdown)
+            if parse_cache:
+                parse_cache.put(key, meta, document)
+    else:
+        meta, document = parsed
+    with stats.stage("render"):
+        html = list(document.iter_html(resolve_url, _minify_text(block_cache, minify)))
+    with stats.stage("template"):
+        template = load_template(template_path, minify)
+        page = template.render({**template_values(meta), "Content": html}, resolve_url)
+    with stats.stage("write"):
+        write_output(dest_path, page)
+    return meta
+
+
+def stream_page(
+    from_path: str,
+    template_path: str,
+    dest_path: str,
+    resolve_url: UrlResolver,
+    block_cache: BlockCache | None = None,
+    minify: bool = False,
+) -> dict:
+    """
+    Convert single markdown file to HTML page like render_page while reading it,
+    holding one block at a time instead of the whole source, document and page.
+    The source is read twice, first for its front matter and title. Output equals
+    that of render_page, at a lower peak memory for large pages.
+
+    Returns:
+        Front matter of the page, title included
+    """
+    with open(from_path) as f:
+        meta = read_front_matter(f)
+        meta["title"] = meta.get("title") or extract_title(f)
+    template = load_template(template_path, minify)
+    with open(from_path) as f:
+        read_front_matter(f)
+        content = _stream_blocks(scan_blocks(f), block_cache, resolve_url, minify)
+        segments = template.iter_segments(
+            {**template_values(meta), "Content": content}, resolve_url
+        )
+        write_output(dest_path, segments)
+    return meta
+
+
+def _stream_blocks(
+    blocks: Iterator[tuple[BlockType, list[str]]],
+    block_cache: BlockCache | None,
+    resolve_url: UrlResolver,
+    minify: bool,
+) -> Iterator[str]:
+    # the fragments Document.iter_html yields for the root div of a whole page
+    yield "<div>"
+    for block_type, lines in blocks:
+        if block_cache is None:
+            block = Document.from_node(block_to_html_node(block_type, lines))
+            yield from block.iter_html(resolve_url, minify)
+        else:
+            yield cached_block_html(block_type, lines, block_cache, resolve_url, minify)
+    yield "</div>"
+
+
+def _parse_page(
+    source: str,
+    block_cache: BlockCache | None,
+    resolve_url: UrlResolver,
+    minify: bool = False,
+) -> tuple[dict, Document]:
+    meta, markdown = split_front_matter(source)
+    document = markdown_to_document(markdown, block_cache, resolve_url, minify)
+    meta["title"] = meta.get("title") or extract_title(markdown)
+    return meta, document
+
+
+def _parse_namespace(
+    block_cache: BlockCache | None, resolve_url: UrlResolver, minify: bool = False
+) -> str:
+    # block cache fragments hold resolved, minified HTML, plain documents are
+    # independent of both
+    return "" if block_cache is None else block_namespace(resolve_url, minify)
+
+
+def _minify_text(block_cache: BlockCache | None, minify: bool) -> bool:
+    # block cache fragments are minified when rendered, and collapsing them again
+    # would collapse code blocks too
+    return minify and block_cache is None
+
+
+def collect_pages(dir_path_content: str, dest_dir_path: str) -> list[tuple[str, str]]:
+    """
+    Walk content directory and return sorted (source, destination) pairs for every
+    markdown file in it.
+    """
+    pages = []
+    for item in sorted(os.listdir(dir_path_content)):
         item_path = os.path.join(dir_path_content, item)
+        dest_path = os.path.join(dest_dir_path, item)
         if os.path.isfile(item_path):
-            item = item.replace(".md", ".html")
-            dest_path = os.path.join(dest_dir_path, item)
-            generate_page(item_path, template_path, dest_path, basepath)
+            if item.endswith(".md"):
+                pages.append((item_path, dest_path[: -len(".md")] + ".html"))
         else:
-            dest_path = os.path.join(dest_dir_path, item)
-            generate_page_recursive(item_path, template_path, dest_path, basepath)
+            pages.extend(collect_pages(item_path, dest_path))
+    return pages
+
+
+def generate_pages(
+    pages: list[tuple[str, str]],
+    template_path: str,
+    basepath: str,
+    jobs: int = 1,
+    report: BuildReport | None = None,
+    block_cache: BlockCache | None = None,
+    site_index: SiteIndex | None = None,
+    relative_to: str | None = None,
+    parse_cache: ParseCache | None = None,
+    io_threads: int = 0,
+    minify: bool = False,
+    assets: AssetManifest | None = None,
+    dest_dir: str | None = None,
+) -> dict[str, str]:
+    """
+    Generate pages from (source, destination) pairs, spreading them over a pool of
+    `jobs` processes. Pages are reported in the order given and a failing page does
+    not stop the others. With report, per-stage statistics of every page are added
+    to it. Worker processes open their own copy of block_cache and blocks they
+    render are merged back into it. Front matter of generated pages is recorded in
+    site_index, with destinations relative to the output directory dest_dir when
+    given. relative_to is the output directory when pages should link to other
+    outputs with relative urls. Pages found in parse_cache are not parsed again.
+    With io_threads, sources are read and outputs written by that many threads each,
+    overlapping with rendering; statistics need each stage on its own and turn the
+    pipeline off. With minify, pages are rendered without insignificant whitespace.
+    Urls of static files in assets are replaced with their fingerprinted urls. When
+    the report has a memory budget, pages expected to exceed it are streamed and
+    pages that did exceed it are flagged.
+
+    Returns:
+        Mapping of source path to error message for pages that failed
+    """
+    trace = None if report is None else report.trace_memory
+    memory_budget = None if report is None else report.memory_budget
+    cache_location = block_cache and (block_cache.path, block_cache.max_bytes)
+    report_args = (template_path, report, block_cache, site_index, dest_dir)
+    if io_threads and report is None:
+        render = partial(
+            _render_source_job,
+            template_path=template_path,
+            basepath=basepath,
+            cache_location=cache_location,
+            relative_to=relative_to,
+            parse_cache=parse_cache,
+            minify=minify,
+            assets=assets,
+        )
+        results = _pipeline(pages, render, jobs, io_threads)
+        return _report_pages(pages, results, *report_args)
+    job = partial(
+        _generate_page_job,
+        template_path=template_path,
+        basepath=basepath,
+        trace=trace,
+        cache_location=cache_location,
+        relative_to=relative_to,
+        parse_cache=parse_cache,
+        minify=minify,
+        assets=assets,
+        memory_budget=memory_budget,
+    )
+    if jobs > 1 and len(pages) > 1:
+        chunksize = max(1, len(pages) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pages))) as executor:
+            results = executor.map(job, pages, chunksize=chunksize)
+            return _report_pages(pages, results, *report_args)
+    # jobs in this process start tracing, which must not outlast the pages
+    started = trace and not tracemalloc.is_tracing()
+    try:
+        results = map(job, pages)
+        return _report_pages(pages, results, *report_args)
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+def _report_pages(
+    pages,
+    results,
+    template_path: str,
+    report: BuildReport | None,
+    block_cache: BlockCache | None,
+    site_index: SiteIndex | None,
+    dest_dir: str | None,
+) -> dict[str, str]:
+    errors = {}
+    # cache name to [hits, misses]
+    cache_counts: dict[str, list[int]] = {}
+    for done, ((from_path, dest_path), (error, stats, meta, caches, _)) in enumerate(
+        zip(pages, results), start=1
+    ):
+        for name, (hits, misses, *_) in caches.items():
+            counts = cache_counts.setdefault(name, [0, 0])
+            counts[0] += hits
+            counts[1] += misses
+        if "block" in caches:
+            for key, html in caches["block"][2]:
+                block_cache.put(key, html, record=False)
+        console.file_message(
+            f"Generating page from {from_path} to {dest_path} using {template_path}"
+        )
+        console.progress("Generating pages", done, len(pages))
+        if error is not None:
+            console.message(f"Failed to generate page from {from_path}: {error}")
+            errors[from_path] = error
+            continue
+        if report is not None:
+            stats = PageStats.from_dict(stats)
+            report.add(stats)
+            if report.memory_budget is not None and stats.peak > report.memory_budget:
+                console.message(
+                    f"Page {from_path} peaked at {format_size(stats.peak)} of traced "
+                    f"memory, over the budget of {format_size(report.memory_budget)}"
+                )
+        if site_index is not None:
+            if dest_dir is not None:
+                dest_path = os.path.relpath(dest_path, dest_dir)
+            site_index.record(from_path, dest_path, meta)
+    for name, (hits, misses) in cache_counts.items():
+        rate = 100 * hits / (hits + misses) if hits + misses else 0
+        console.message(
+            f"{name.capitalize()} cache: {hits} hits, {misses} misses"
+            f" ({rate:.1f}% hit rate)"
+        )
+    return errors
+
+
+def _generate_page_job(
+    page: tuple[str, str],
+    template_path: str,
+    basepath: str,
+    trace: bool | None,
+    cache_location: tuple[str, int] | None,
+    relative_to: str | None,
+    parse_cache: ParseCache | None,
+    minify: bool = False,
+    assets: AssetManifest | None = None,
+    source: str | None = None,
+    memory_budget: int | None = None,
+) -> tuple[str | None, dict | None, dict | None, dict[str, tuple], str | None]:
+    """
+    Render page in the current or a worker process. trace is None when no statistics
+    are collected and True when allocations are traced along with wall time.
+    cache_location is the (path, max_bytes) of the block cache. Along with the
+    page's front matter, hits and misses of each cache are returned for the parent
+    process, for the block cache followed by newly rendered blocks. When the source
+    is given, the page is returned as last item instead of being written. Pages
+    whose source is large enough to exceed memory_budget are streamed.
+    """
+    from_path, dest_path = page
+    if trace and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    block_cache = cache_location and open_block_cache(*cache_location)
+    caches = {"parse": parse_cache, "block": block_cache}
+    counts_before = {
+        name: (cache.hits, cache.misses) for name, cache in caches.items() if cache
+    }
+    resolve_url = UrlResolver(
+        basepath, relative_to and page_url(dest_path, relative_to), assets
+    )
+    # created last, so the page peak leaves out opening the caches
+    stats = None if trace is None else PageStats(from_path)
+    error = meta = html = None
+    try:
+        if source is None and _oversized(from_path, memory_budget):
+            with stats.stage("stream"):
+                meta = stream_page(
+                    from_path,
+                    template_path,
+                    dest_path,
+                    resolve_url,
+                    block_cache,
+                    minify,
+                )
+            stats.streamed = True
+        elif source is None:
+            meta = render_page(
+                from_path,
+                template_path,
+                dest_path,
+                basepath,
+                stats,
+                block_cache,
+                resolve_url,
+                parse_cache,
+                minify,
+            )
+        else:
+            meta, segments = render_source(
+                source, template_path, resolve_url, block_cache, parse_cache, minify
+            )
+            html = "".join(segments)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        stats = None
+    cache_counts = {
+        name: (caches[name].hits - hits, caches[name].misses - misses)
+        for name, (hits, misses) in counts_before.items()
+    }
+    if block_cache:
+        cache_counts["block"] += (block_cache.take_added(),)
+    return error, stats and stats.to_dict(), meta, cache_counts, html
+
+
+def _oversized(from_path: str, memory_budget: int | None) -> bool:
+    if memory_budget is None:
+        return False
+    return os.path.getsize(from_path) * MEMORY_PER_SOURCE_BYTE > memory_budget
+
+
+def _pipeline(
+    pages: list[tuple[str, str]], render, jobs: int, io_threads: int
+) -> Iterator[tuple]:
+    """
+    Yield results of _generate_page_job for pages from a pipeline of three stages:
+    io_threads threads prefetch sources, pages are rendered in the calling thread or
+    on a pool of jobs processes, and io_threads threads write outputs. Each stage
+    keeps a bounded number of pages in flight, so a slow stage holds back the
+    earlier ones instead of piling up sources or pages in memory.
+    """
+    depth = 2 * max(jobs, io_threads)
+    with ThreadPoolExecutor(io_threads) as readers, ThreadPoolExecutor(
+        io_threads
+    ) as writers:
+        sources = bounded_map(readers, _read_source, pages, depth)
+        if jobs > 1:
+            with ProcessPoolExecutor(jobs) as renderers:
+                rendered = bounded_map(renderers, render, sources, depth)
+                yield from bounded_map(writers, _write_output, rendered, depth)
+        else:
+            # rendering in the calling thread keeps the block cache single threaded
+            rendered = map(render, sources)
+            yield from bounded_map(writers, _write_output, rendered, depth)
+
+
+def _read_source(
+    page: tuple[str, str],
+) -> tuple[tuple[str, str], str | None, str | None]:
+    try:
+        with open(page[0]) as f:
+            return page, f.read(), None
+    except OSError as e:
+        return page, None, f"{type(e).__name__}: {e}"
+
+
+def _render_source_job(
+    read: tuple[tuple[str, str], str | None, str | None],
+    template_path: str,
+    basepath: str,
+    cache_location: tuple[str, int] | None,
+    relative_to: str | None,
+    parse_cache: ParseCache | None,
+    minify: bool = False,
+    assets: AssetManifest | None = None,
+) -> tuple[tuple[str, str], tuple]:
+    page, source, error = read
+    if error is not None:
+        return page, (error, None, None, {}, None)
+    result = _generate_page_job(
+        page,
+        template_path=template_path,
+        basepath=basepath,
+        trace=None,
+        cache_location=cache_location,
+        relative_to=relative_to,
+        parse_cache=parse_cache,
+        minify=minify,
+        assets=assets,
+        source=source,
+    )
+    return page, result
+
+
+def _write_output(rendered: tuple[tuple[str, str], tuple]) -> tuple:
+    (_, dest_path), (error, stats, meta, caches, html) = rendered
+    if html is not None:
+        try:
+            write_output(dest_path, html)
+        except OSError as e:
+            error = f"{type(e).__name__}: {e}"
+    return error, stats, meta, caches, None
+
+
+def generate_page_recursive(
+    dir_path_content: str,
+    template_path: str,
+    dest_dir_path: str,
+    basepath: str,
+    jobs: int = 1,
+    report: BuildReport | None = None,
+    block_cache: BlockCache | None = None,
+    site_index: SiteIndex | None = None,
+    relative_urls: bool = False,
+    parse_cache: ParseCache | None = None,
+    io_threads: int = 0,
+    minify: bool = False,
+    assets: AssetManifest | None = None,
+    shard: tuple[int, int] | None = None,
+):
+    pages = collect_pages(dir_path_content, dest_dir_path)
+    if shard is not None:
+        index, count = shard
+        pages = partition(pages, count)[index - 1]
+    if site_index is not None:
+        site_index.retain({from_path for from_path, _ in pages})
+    errors = generate_pages(
+        pages,
+        template_path,
+        basepath,
+        jobs,
+        report,
+        block_cache,
+        site_index,
+        dest_dir_path if relative_urls else None,
+        parse_cache,
+        io_threads,
+        minify,
+        assets,
+        dest_dir_path,
+    )
+    if errors:
+        raise BuildError(f"{len(errors)} of {len(pages)} pages failed to generate")
+
+
+def generate_page_incremental(
+    dir_path_content: str,
+    template_path: str,
+    dest_dir_path: str,
+    basepath: str,
+    manifest_path: str = MANIFEST_PATH,
+    jobs: int = 1,
+    changed: set[str] | None = None,
+    report: BuildReport | None = None,
+    block_cache: BlockCache | None = None,
+    site_index: SiteIndex | None = None,
+    relative_urls: bool = False,
+    parse_cache: ParseCache | None = None,
+    io_threads: int = 0,
+    minify: bool = False,
+    assets: AssetManifest | None = None,
+):
+    """
+    Regenerate only pages whose inputs changed since the last build recorded in the
+    manifest and remove outputs of deleted sources. When changed is given, only those
+    sources are rehashed and other recorded pages are assumed to be up to date. Pages
+    missing from site_index are regenerated to index their front matter.
+    """
+    pages = collect_pages(dir_path_content, dest_dir_path)
+    manifest = BuildManifest.load(manifest_path)
+    inputs = build_inputs(template_path, basepath, relative_urls, minify, assets)
+    # template, basepath or generator changed, every page is outdated
+    rebuild_all = manifest.inputs != inputs
+    manifest.inputs = inputs
+    sources = {from_path for from_path, _ in pages}
+    for dest_path in manifest.remove_stale(sources):
+        remove_output(dest_path, dest_dir_path)
+    if site_index is not None:
+        site_index.retain(sources)
+    outdated = {}
+    for from_path, dest_path in pages:
+        unindexed = site_index is not None and from_path not in site_index.pages
+        if (
+            not rebuild_all
+            and changed is not None
+            and from_path not in changed
+            and from_path in manifest.pages
+            and not unindexed
+        ):
+            continue
+        source_hash = hash_file(from_path)
+        if (
+            rebuild_all
+            or unindexed
+            or manifest.needs_build(from_path, source_hash, dest_path)
+        ):
+            outdated[(from_path, dest_path)] = source_hash
+    errors = generate_pages(
+        list(outdated),
+        template_path,
+        basepath,
+        jobs,
+        report,
+        block_cache,
+        site_index,
+        dest_dir_path if relative_urls else None,
+        parse_cache,
+        io_threads,
+        minify,
+        assets,
+        dest_dir_path,
+    )
+    for (from_path, dest_path), source_hash in outdated.items():
+        if from_path not in errors:
+            manifest.record(from_path, source_hash, dest_path)
+    manifest.save()
+    if errors:
+        raise BuildError(f"{len(errors)} of {len(outdated)} pages failed to generate")
+
+
+def remove_output(dest_path: str, dest_dir_path: str):
+    console.file_message(f"Removing stale page {dest_path}")
+    remove_and_prune(dest_path, dest_dir_path)
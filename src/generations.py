@@ -0,0 +1,195 @@
+import filecmp
+import os
+import shutil
+import time
+
+import console
+from copyfiles import is_synced, list_files
+
+
+GENERATIONS_DIR = os.path.join(".build", "generations")
+SWAP_MODES = ("symlink", "rename")
+CURRENT_FILE = "current"
+
+
+def new_generation(generations_dir: str = GENERATIONS_DIR) -> str:
+    """
+    Create empty directory for the next generation. Names sort in creation order.
+    """
+    os.makedirs(generations_dir, exist_ok=True)
+    while True:
+        path = _free_path(generations_dir)
+        try:
+            os.mkdir(path)
+            return path
+        except FileExistsError:
+            continue
+
+
+def _free_path(generations_dir: str) -> str:
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    # a generation published by rename is away from generations_dir, skip its name
+    published = _published_name(generations_dir)
+    for n in range(1000):
+        name = f"{stamp}-{n:03}"
+        path = os.path.join(generations_dir, name)
+        if name != published and not os.path.exists(path):
+            return path
+    raise FileExistsError(f"too many generations created at {stamp}")
+
+
+def current_generation(output: str) -> str | None:
+    """
+    Return directory currently published at output, following the symlink.
+    """
+    if not os.path.exists(output):
+        return None
+    return os.path.realpath(output)
+
+
+def seed_static(src: str, generation: str, previous: str | None, checksum: bool) -> int:
+    """
+    Hardlink static files unchanged since the previous generation into the new one,
+    so syncing them afterwards transfers only new or changed files.
+
+    Returns:
+        Number of files linked
+    """
+    if previous is None:
+        return 0
+    linked = 0
+    for rel_path in list_files(src):
+        previous_path = os.path.join(previous, rel_path)
+        if is_synced(os.path.join(src, rel_path), previous_path, checksum):
+            dest_path = os.path.join(generation, rel_path)
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            try:
+                os.link(previous_path, dest_path)
+            except OSError:
+                # different filesystem, syncing copies the files
+                return linked
+            linked += 1
+    return linked
+
+
+def link_identical(generation: str, previous: str | None) -> int:
+    """
+    Replace files of the new generation that are byte-identical to the same path in
+    the previous generation with hardlinks to it.
+
+    Returns:
+        Number of files replaced
+    """
+    if previous is None:
+        return 0
+    linked = 0
+    for rel_path in list_files(generation):
+        path = os.path.join(generation, rel_path)
+        previous_path = os.path.join(previous, rel_path)
+        try:
+            stat = os.stat(path)
+            previous_stat = os.stat(previous_path)
+        except FileNotFoundError:
+            continue
+        if (stat.st_dev, stat.st_ino) == (previous_stat.st_dev, previous_stat.st_ino):
+            continue
+        if stat.st_size != previous_stat.st_size or not filecmp.cmp(
+            path, previous_path, shallow=False
+        ):
+            continue
+        tmp_path = path + ".link"
+        try:
+            os.link(previous_path, tmp_path)
+        except OSError:
+            # different filesystem
+            return linked
+        os.replace(tmp_path, path)
+        linked += 1
+    return linked
+
+
+def swap(output: str, generation: str, mode: str = "symlink"):
+    """
+    Publish generation at output. "symlink" atomically repoints the output symlink;
+    a plain output directory left by a non-atomic build is moved among the
+    generations first. "rename" moves the previous output among the generations and
+    the new generation in its place, leaving output missing between two renames.
+    """
+    if mode not in SWAP_MODES:
+        raise ValueError(f"unknown swap mode {mode}, expected one of {SWAP_MODES}")
+    generations_dir = os.path.dirname(generation)
+    if os.path.isdir(output) and not os.path.islink(output):
+        os.rename(output, _retired_path(generations_dir))
+    if mode == "symlink":
+        tmp_link = output + ".swap"
+        if os.path.lexists(tmp_link):
+            os.remove(tmp_link)
+        target = os.path.relpath(generation, os.path.dirname(output) or ".")
+        os.symlink(target, tmp_link, target_is_directory=True)
+        os.replace(tmp_link, output)
+    else:
+        if os.path.islink(output):
+            os.remove(output)
+        os.rename(generation, output)
+    with open(os.path.join(generations_dir, CURRENT_FILE), "w") as f:
+        f.write(os.path.basename(generation))
+
+
+def _published_name(generations_dir: str) -> str:
+    try:
+        with open(os.path.join(generations_dir, CURRENT_FILE)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ""
+
+
+def _retired_path(generations_dir: str) -> str:
+    # a generation published by rename goes back under its name, an output built
+    # in place gets a new one
+    name = _published_name(generations_dir)
+    path = os.path.join(generations_dir, name)
+    if not name or os.path.exists(path):
+        return _free_path(generations_dir)
+    return path
+
+
+def unpublish(output: str):
+    """
+    Replace output symlink with a plain copy of the published generation, so
+    builds writing into output in place never modify files hardlinked from other
+    generations.
+    """
+    if not os.path.islink(output):
+        return
+    if not os.path.isdir(output):
+        # the published generation was removed
+        os.remove(output)
+        return
+    tmp_path = output + ".copy"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    shutil.copytree(os.path.realpath(output), tmp_path)
+    os.remove(output)
+    os.rename(tmp_path, output)
+
+
+def prune_generations(
+    generations_dir: str, keep: int, current: str | None
+) -> list[str]:
+    """
+    Remove all but the newest `keep` generations besides the published one.
+
+    Returns:
+        Paths of removed generations
+    """
+    current = current and os.path.realpath(current)
+    generations = sorted(
+        entry.path
+        for entry in os.scandir(generations_dir)
+        if entry.is_dir(follow_symlinks=False)
+        and os.path.realpath(entry.path) != current
+    )
+    removed = generations[: max(0, len(generations) - keep)]
+    for path in removed:
+        console.file_message(f"Removing generation {path}")
+        shutil.rmtree(path)
+    return removed
@@ -1,7 +1,8 @@
-from typing import Dict, List
+from typing import Dict, Iterator, List, TextIO
 
 
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
 
     def __init__(
         self,
@@ -27,6 +28,18 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError
 
+    def iter_html(self) -> Iterator[str]:
+        """
+        Yield HTML of the node fragment by fragment.
+        """
+        yield self.to_html()
+
+    def write_html(self, fp: TextIO):
+        """
+        Write HTML of the node straight to file object without building it in memory.
+        """
+        fp.writelines(self.iter_html())
+
     def props_to_html(self):
         result = ""
         if self.props:
@@ -0,0 +1,164 @@
+import os
+import struct
+
+import console
+from copyfiles import list_files
+from manifest import hash_file
+from storage import load_json, save_json
+from urls import AssetManifest
+
+
+IMAGE_CACHE_PATH = os.path.join(".build", "images.json")
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+# JPEG start of frame markers, holding the dimensions
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+class ImageCache:
+
+    def __init__(
+        self,
+        path: str,
+        sizes: dict[str, list[int]] | None = None,
+        files: dict[str, list] | None = None,
+    ):
+        """
+        Initialize ImageCache.
+
+        Args:
+            path: Location of the cache file on disk
+            sizes: Mapping of image content hash to its width and height
+            files: Mapping of image path to the size, mtime and content hash it had
+                when last hashed, so unchanged files are not hashed again
+        """
+        self.path = path
+        self.sizes = sizes or {}
+        self.files = files or {}
+
+    @classmethod
+    def load(cls, path: str) -> "ImageCache":
+        data = load_json(path) or {}
+        return cls(path, data.get("sizes"), data.get("files"))
+
+    def save(self):
+        save_json(self.path, {"sizes": self.sizes, "files": self.files})
+
+    def size(self, path: str) -> tuple[int, int] | None:
+        """
+        Return width and height of the image at path, reading its header only when
+        its contents were not seen before.
+        """
+        stat = os.stat(path)
+        known = self.files.get(path)
+        if known is not None and known[:2] == [stat.st_size, stat.st_mtime_ns]:
+            digest = known[2]
+        else:
+            digest = hash_file(path)
+            self.files[path] = [stat.st_size, stat.st_mtime_ns, digest]
+        if digest not in self.sizes:
+            size = image_size(path)
+            # unreadable images are cached too, as zero size
+            self.sizes[digest] = list(size or (0, 0))
+        width, height = self.sizes[digest]
+        return (width, height) if width and height else None
+
+    def retain(self, paths: set[str]):
+        """
+        Forget images whose path is not in paths anymore.
+        """
+        self.files = {path: self.files[path] for path in paths if path in self.files}
+        digests = {known[2] for known in self.files.values()}
+        self.sizes = {
+            digest: size for digest, size in self.sizes.items() if digest in digests
+        }
+
+
+def add_image_sizes(
+    src: str, assets: AssetManifest, cache: ImageCache
+) -> AssetManifest:
+    """
+    Record width and height of every image in the static directory in the asset
+    manifest, for the renderer to size img tags.
+
+    Returns:
+        Manifest with the dimensions added
+    """
+    entries = {url: dict(entry) for url, entry in assets.assets.items()}
+    paths = set()
+    for rel_path in list_files(src):
+        if not rel_path.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        path = os.path.join(src, rel_path)
+        paths.add(path)
+        size = cache.size(path)
+        if size is None:
+            console.message(f"Could not read dimensions of image {path}")
+            continue
+        url = "/" + rel_path.replace(os.sep, "/")
+        entries.setdefault(url, {}).update(width=size[0], height=size[1])
+    cache.retain(paths)
+    return AssetManifest(assets.path, entries)
+
+
+def image_size(path: str) -> tuple[int, int] | None:
+    """
+    Return width and height of a PNG, JPEG, GIF or WebP image from its header, None
+    for other or malformed files.
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(32)
+            if header.startswith(b"\x89PNG\r\n\x1a\n") and header[12:16] == b"IHDR":
+                return struct.unpack(">II", header[16:24])
+            if header[:6] in (b"GIF87a", b"GIF89a"):
+                return struct.unpack("<HH", header[6:10])
+            if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+                return _webp_size(header)
+            if header.startswith(b"\xff\xd8"):
+                f.seek(2)
+                return _jpeg_size(f)
+    except (OSError, IndexError, struct.error):
+        pass
+    return None
+
+
+def _webp_size(header: bytes) -> tuple[int, int] | None:
+    if len(header) < 30:
+        return None
+    chunk = header[12:16]
+    if chunk == b"VP8 ":
+        # lossy, 14 bit dimensions after the frame start code
+        width, height = struct.unpack("<HH", header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and header[20] == 0x2F:
+        # lossless, 14 bit dimensions minus one packed after the signature
+        bits = int.from_bytes(header[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        # extended, 24 bit canvas dimensions minus one
+        width = int.from_bytes(header[24:27], "little") + 1
+        height = int.from_bytes(header[27:30], "little") + 1
+        return width, height
+    return None
+
+
+def _jpeg_size(f) -> tuple[int, int] | None:
+    while True:
+        byte = f.read(1)
+        if byte != b"\xff":
+            return None
+        marker = f.read(1)
+        while marker == b"\xff":
+            # fill bytes
+            marker = f.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            # standalone markers have no length
+            continue
+        (length,) = struct.unpack(">H", f.read(2))
+        if marker in JPEG_SOF_MARKERS:
+            _, height, width = struct.unpack(">BHH", f.read(5))
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
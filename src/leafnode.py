@@ -4,6 +4,8 @@ from typing import Dict
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag: str, value: str, props: Dict[str, str] | None = None):
         super().__init__(tag, value, None, props)
 
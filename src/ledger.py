@@ -0,0 +1,176 @@
+import json
+import os
+from typing import Iterable, Iterator
+
+import console
+from copyfiles import list_files, remove_and_prune
+from manifest import hash_file
+from storage import load_json, save_json
+
+
+LEDGER_PATH = os.path.join(".build", "outputs.json")
+CHANGES_PATH = os.path.join(".build", "changes.json")
+STAGING_DIR = os.path.join(".build", "staging")
+
+
+class OutputLedger:
+
+    def __init__(self, path: str, files: dict[str, list] | None = None):
+        """
+        Initialize OutputLedger.
+
+        Args:
+            path: Location of the ledger file on disk
+            files: Mapping of output path, relative to the output directory, to its
+                content hash, size and mtime after the last build. Outputs whose
+                size and mtime still match are not hashed again.
+        """
+        self.path = path
+        self.files = files or {}
+
+    @classmethod
+    def load(cls, path: str) -> "OutputLedger":
+        return cls(path, load_json(path))
+
+    def save(self):
+        save_json(self.path, self.files, sort_keys=True)
+
+    def scan(self, dest_dir: str) -> dict[str, list[str]]:
+        """
+        Hash outputs in dest_dir and compare them to the previous build.
+
+        Returns:
+            Sorted output paths, relative to dest_dir, that were added, changed and
+            removed
+        """
+        files = {}
+        for rel_path in list_files(dest_dir):
+            files[rel_path] = self._entry(os.path.join(dest_dir, rel_path), rel_path)
+        return self._update(files)
+
+    def publish(self, staging_dir: str, dest_dir: str) -> dict[str, list[str]]:
+        """
+        Move outputs built in staging_dir to dest_dir, leaving outputs with
+        identical contents untouched so their mtime stays stable, and remove
+        outputs that were not built.
+
+        Returns:
+            Sorted output paths, relative to dest_dir, that were added, changed and
+            removed
+        """
+        os.makedirs(dest_dir, exist_ok=True)
+        built = set(list_files(staging_dir))
+        for rel_path in sorted(set(list_files(dest_dir)) - built):
+            remove_and_prune(os.path.join(dest_dir, rel_path), dest_dir)
+        files = {}
+        for rel_path in sorted(built):
+            staged_path = os.path.join(staging_dir, rel_path)
+            dest_path = os.path.join(dest_dir, rel_path)
+            if os.path.isfile(dest_path) and os.path.samefile(staged_path, dest_path):
+                # static file linked into staging and already published
+                files[rel_path] = self._entry(dest_path, rel_path)
+                continue
+            digest = hash_file(staged_path)
+            if os.path.isfile(dest_path):
+                previous = self._entry(dest_path, rel_path)
+                if previous[0] == digest:
+                    files[rel_path] = previous
+                    continue
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            os.replace(staged_path, dest_path)
+            stat = os.stat(dest_path)
+            files[rel_path] = [digest, stat.st_size, stat.st_mtime_ns]
+        return self._update(files)
+
+    def _entry(self, path: str, rel_path: str) -> list:
+        stat = os.stat(path)
+        known = self.files.get(rel_path)
+        if known is not None and known[1:] == [stat.st_size, stat.st_mtime_ns]:
+            return known
+        return [hash_file(path), stat.st_size, stat.st_mtime_ns]
+
+    def _update(self, files: dict[str, list]) -> dict[str, list[str]]:
+        previous, self.files = self.files, files
+        return {
+            "added": sorted(set(files) - set(previous)),
+            "changed": sorted(
+                rel_path
+                for rel_path in set(files) & set(previous)
+                if files[rel_path][0] != previous[rel_path][0]
+            ),
+            "removed": sorted(set(previous) - set(files)),
+        }
+
+
+def write_changes(changes: dict[str, list[str]], path: str):
+    """
+    Write changed outputs as JSON for delta deploys and CDN purges, with paths
+    relative to the output directory in url form.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(
+            {
+                kind: [rel_path.replace(os.sep, "/") for rel_path in paths]
+                for kind, paths in changes.items()
+            },
+            f,
+            indent=1,
+        )
+    console.message(
+        f"Outputs: {len(changes['added'])} added, {len(changes['changed'])} changed,"
+        f" {len(changes['removed'])} removed, listed in {path}"
+    )
+
+
+def write_output(path: str, content: str | Iterable[str]) -> bool:
+    """
+    Write content, a string or its fragments, to path unless the file already holds
+    exactly these bytes, so unchanged outputs keep their mtime. Fragments are
+    compared with the file as they arrive and never joined. An existing file is
+    replaced rather than rewritten in place, leaving copies hardlinked into other
+    generations untouched.
+
+    Returns:
+        Whether the file was written
+    """
+    fragments = iter((content,) if isinstance(content, str) else content)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        _write(path, fragments)
+        return True
+    with open(path, "rb") as f:
+        matched = 0
+        for fragment in fragments:
+            data = fragment.encode()
+            if f.read(len(data)) != data:
+                break
+            matched += len(data)
+        else:
+            if not f.read(1):
+                return False
+            data = b""
+        # the matching prefix is taken from the file, the fragments are spent
+        f.seek(0)
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as tmp:
+                while matched:
+                    chunk = f.read(min(matched, 1 << 16))
+                    tmp.write(chunk)
+                    matched -= len(chunk)
+                tmp.write(data)
+                for fragment in fragments:
+                    tmp.write(fragment.encode())
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    os.replace(tmp_path, path)
+    return True
+
+
+def _write(path: str, fragments: Iterator[str]):
+    with open(path, "wb") as f:
+        for fragment in fragments:
+            f.write(fragment.encode())
@@ -1,17 +1,693 @@
+import argparse
+import os
+import shutil
 import sys
+import tempfile
 from textnode import TextType, TextNode
-from copyfiles import copy_files
-from generate_page import generate_page_recursive
+import console
+from blockcache import (
+    BLOCK_CACHE_PATH,
+    BLOCK_CACHE_SIZE,
+    BlockCache,
+    open_block_cache,
+)
+from compress import COMPRESS_CACHE_DIR, CompressCache, compress_outputs
+from copyfiles import (
+    LINK_MODES,
+    copy_files,
+    fingerprint_files,
+    list_files,
+    sync_files,
+)
+from devserver import LiveReload, start_server
+from generations import (
+    GENERATIONS_DIR,
+    SWAP_MODES,
+    current_generation,
+    link_identical,
+    new_generation,
+    prune_generations,
+    seed_static,
+    swap,
+    unpublish,
+)
+from ledger import (
+    CHANGES_PATH,
+    LEDGER_PATH,
+    STAGING_DIR,
+    OutputLedger,
+    write_changes,
+)
+from images import IMAGE_CACHE_PATH, ImageCache, add_image_sizes
+from generate_page import (
+    BuildError,
+    collect_pages,
+    generate_page_incremental,
+    generate_page_recursive,
+)
+from manifest import BuildManifest, MANIFEST_PATH, build_inputs
+from parsecache import PARSE_CACHE_DIR, PARSE_CACHE_SIZE, ParseCache
+from siteindex import (
+    SITE_INDEX_PATH,
+    SiteIndex,
+    write_feed,
+    write_listings,
+    write_sitemap,
+)
+from stats import BuildReport, PROFILE_FORMATS, STATS_PATH, profile
+from shard import (
+    SHARD_INDEX,
+    SHARD_OUTPUT,
+    SHARDS_DIR,
+    ShardError,
+    build_fingerprint,
+    merge_shards,
+    parse_shard,
+    shard_count,
+    shard_dir,
+)
+from template import load_template
+from urls import ASSET_MANIFEST_PATH, AssetManifest
+from watch import watch
 
 
-def main():
-    args = sys.argv
-    if len(args) != 2:
-        basepath = "/"
+OUTPUT_DIR = "docs"
+COMMANDS = ("build", "serve", "cache", "merge")
+CACHE_ACTIONS = ("clean",)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    build_options = argparse.ArgumentParser(add_help=False)
+    build_options.add_argument("basepath", nargs="?", default="/")
+    build_options.add_argument(
+        "--relative-urls",
+        action="store_true",
+        help="link pages and assets with urls relative to each page, ignores basepath",
+    )
+    build_options.add_argument(
+        "--atomic",
+        action="store_true",
+        help=f"build into a new generation in {GENERATIONS_DIR} and publish it at "
+        f"{OUTPUT_DIR} only when complete, overrides --incremental",
+    )
+    build_options.add_argument(
+        "--swap",
+        choices=SWAP_MODES,
+        default="symlink",
+        help="publish generations by repointing a symlink or renaming directories",
+    )
+    build_options.add_argument(
+        "--keep-generations",
+        type=int,
+        default=2,
+        metavar="N",
+        help="number of unpublished generations retained for rollback",
+    )
+    build_options.add_argument(
+        "--incremental",
+        action="store_true",
+        help="rebuild only pages whose inputs changed since the last build",
+    )
+    build_options.add_argument(
+        "--link",
+        choices=LINK_MODES,
+        default="copy",
+        help="how incremental builds transfer changed static files",
+    )
+    build_options.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare static file contents, not only size and mtime",
+    )
+    build_options.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes generating pages, 0 uses all cores",
+    )
+    build_options.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"neither read nor write the parse cache in {PARSE_CACHE_DIR} "
+        "and the block cache",
+    )
+    build_options.add_argument(
+        "--parse-cache-size",
+        type=int,
+        default=PARSE_CACHE_SIZE // (1024 * 1024),
+        metavar="MB",
+        help="evict least recently used parsed pages beyond this size",
+    )
+    build_options.add_argument(
+        "--block-cache",
+        action="store_true",
+        help=f"reuse HTML of unchanged blocks, cached in {BLOCK_CACHE_PATH}",
+    )
+    build_options.add_argument(
+        "--block-cache-size",
+        type=int,
+        default=BLOCK_CACHE_SIZE // (1024 * 1024),
+        metavar="MB",
+        help="evict least recently used blocks beyond this size",
+    )
+    build_options.add_argument(
+        "--site-url",
+        metavar="URL",
+        help="absolute url of the site root, enables sitemap.xml and feed.xml",
+    )
+    build_options.add_argument(
+        "--listings",
+        action="store_true",
+        help="write index.html listing the pages of sections without one",
+    )
+    build_options.add_argument(
+        "--pipeline",
+        nargs="?",
+        type=int,
+        const=8,
+        default=0,
+        metavar="THREADS",
+        help="read sources and write pages on THREADS threads each (default 8), "
+        "overlapping with rendering; ignored with --stats",
+    )
+    build_options.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="also copy static files under content-hashed names and link pages to "
+        f"them, recorded in {ASSET_MANIFEST_PATH}",
+    )
+    build_options.add_argument(
+        "--sri",
+        action="store_true",
+        help="add subresource integrity to stylesheets and scripts of the template, "
+        "implies --fingerprint",
+    )
+    build_options.add_argument(
+        "--image-sizes",
+        action="store_true",
+        help="add width, height and lazy loading to images from static, reading "
+        f"dimensions from their headers, cached in {IMAGE_CACHE_PATH}",
+    )
+    build_options.add_argument(
+        "--minify",
+        action="store_true",
+        help="strip comments and insignificant whitespace from pages, "
+        "keeping pre and code intact",
+    )
+    build_options.add_argument(
+        "--gzip",
+        nargs="?",
+        type=int,
+        const=9,
+        choices=range(1, 10),
+        metavar="LEVEL",
+        help="write .gz siblings of text outputs at compression LEVEL (default 9), "
+        f"reusing unchanged ones from {COMPRESS_CACHE_DIR}",
+    )
+    build_options.add_argument(
+        "--changes",
+        nargs="?",
+        const=CHANGES_PATH,
+        metavar="PATH",
+        help="hash outputs, leave unchanged ones untouched and list added, changed "
+        f"and removed outputs as JSON (default {CHANGES_PATH})",
+    )
+    build_options.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="I/N",
+        help="render only shard I of N of the pages, partitioned by source size, "
+        f"into {os.path.join(SHARDS_DIR, 'I-of-N')} for merge to publish",
+    )
+    output = build_options.add_mutually_exclusive_group()
+    output.add_argument(
+        "-q", "--quiet", action="store_true", help="print only errors and summaries"
+    )
+    output.add_argument(
+        "--progress", action="store_true", help="show progress bars instead of files"
+    )
+    build_options.add_argument(
+        "--stats",
+        nargs="?",
+        const=STATS_PATH,
+        metavar="PATH",
+        help=f"write per-page, per-stage timings as JSON (default {STATS_PATH})",
+    )
+    build_options.add_argument(
+        "--stats-memory",
+        action="store_true",
+        help="also trace allocations per stage, slows the build down",
+    )
+    build_options.add_argument(
+        "--memory-budget",
+        type=float,
+        metavar="MB",
+        help="trace peak memory of every page, flag pages over MB megabytes and "
+        "stream pages expected to exceed it, implies --stats-memory",
+    )
+    build_options.add_argument(
+        "--top", type=int, default=10, help="number of slowest pages to report"
+    )
+    build_options.add_argument(
+        "--profile", metavar="PATH", help="profile the build and dump result to PATH"
+    )
+    build_options.add_argument(
+        "--profile-format",
+        choices=PROFILE_FORMATS,
+        default="pstats",
+        help="cProfile stats or sampled collapsed stacks for flame graphs",
+    )
+
+    parser = argparse.ArgumentParser(description="Generate static site from markdown.")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser(
+        "build", parents=[build_options], help="build the site (default)"
+    )
+    commands.add_parser(
+        "merge",
+        parents=[build_options],
+        help="publish pages of all --shard builds with static files, listings, "
+        "sitemap and feed, given the options of the shard builds",
+    )
+    serve = commands.add_parser(
+        "serve", parents=[build_options], help="build and serve the site locally"
+    )
+    serve.add_argument("--port", type=int, default=8888)
+    serve.add_argument(
+        "--watch", action="store_true", help="rebuild affected outputs on changes"
+    )
+    serve.add_argument(
+        "--live-reload",
+        action="store_true",
+        help="reload open pages after each rebuild, implies --watch",
+    )
+    cache = commands.add_parser("cache", help="manage build caches")
+    cache.add_argument(
+        "action",
+        choices=CACHE_ACTIONS,
+        help="clean removes the parse, block and compression caches",
+    )
+
+    argv = list(sys.argv[1:] if argv is None else argv)
+    options = {
+        option: action.nargs
+        for action in build_options._actions + serve._actions
+        for option in action.option_strings
+    }
+    position = _first_positional(argv, options)
+    if position is not None and argv[position] in COMMANDS:
+        # options may precede the command, as in "-q serve"
+        argv.insert(0, argv.pop(position))
+    elif not argv or argv[0] not in ("-h", "--help"):
+        argv = ["build"] + argv
+    args = parser.parse_args(argv)
+    if args.command == "cache":
+        return args
+    if args.shard and args.command != "build":
+        parser.error(f"--shard does not apply to {args.command}")
+    if args.shard and (args.incremental or args.atomic):
+        parser.error("--shard renders full builds, without --incremental or --atomic")
+    if args.command == "merge" and args.incremental:
+        parser.error("merge publishes full builds, without --incremental")
+    if args.jobs < 1:
+        args.jobs = os.cpu_count() or 1
+    if args.memory_budget is not None:
+        args.stats_memory = True
+    if args.stats_memory and not args.stats:
+        args.stats = STATS_PATH
+    return args
+
+
+def _first_positional(
+    argv: list[str], options: dict[str, int | str | None]
+) -> int | None:
+    """
+    Return the position in argv of the first argument that is neither an option nor
+    the value of one, given the nargs of every option string, or None.
+    """
+    position = 0
+    while position < len(argv):
+        arg = argv[position]
+        if arg == "--":
+            return position + 1 if position + 1 < len(argv) else None
+        if not arg.startswith("-") or arg == "-":
+            return position
+        position += 1
+        if "=" in arg or (not arg.startswith("--") and len(arg) > 2):
+            # value attached, as in --jobs=4 or -j4
+            continue
+        if arg not in options:
+            # abbreviated long option, unknown ones are left for argparse to reject
+            matches = [option for option in options if option.startswith(arg)]
+            if len(matches) != 1:
+                continue
+            arg = matches[0]
+        nargs = options[arg]
+        if position < len(argv) and (
+            nargs is None or nargs == "?" and not argv[position].startswith("-")
+        ):
+            position += 1
+    return None
+
+
+def build(args: argparse.Namespace, changed: set[str] | None = None):
+    """
+    Build the site into docs/. With changed, an incremental build only revisits
+    sources in that set.
+    """
+    report = None
+    build_site = _build_shard if args.shard else _build
+    if args.stats:
+        memory_budget = None
+        if args.memory_budget is not None:
+            memory_budget = int(args.memory_budget * 1024 * 1024)
+        report = BuildReport(args.top, args.stats_memory, memory_budget)
+    try:
+        with profile(args.profile, args.profile_format):
+            build_site(args, changed, report)
+    finally:
+        if report is not None:
+            report.write(args.stats)
+            console.message(report.summary())
+            console.message(f"Build statistics written to {args.stats}")
+
+
+def _build(
+    args: argparse.Namespace, changed: set[str] | None, report: BuildReport | None
+):
+    fingerprint = None
+    if args.command == "merge":
+        # fail before the published output is touched
+        fingerprint = _shard_fingerprint(args, _static_assets(args))
+        shard_count(fingerprint=fingerprint)
+    block_cache, parse_cache = _open_caches(args)
+    site_index = SiteIndex.load(SITE_INDEX_PATH)
+    ledger = OutputLedger.load(LEDGER_PATH) if args.changes else None
+    out_dir = OUTPUT_DIR
+    if args.atomic:
+        previous = current_generation(OUTPUT_DIR)
+        out_dir = new_generation(GENERATIONS_DIR)
+        seeded = seed_static("static", out_dir, previous, args.checksum)
+    else:
+        unpublish(OUTPUT_DIR)
+        if ledger is not None and not args.incremental:
+            # full builds are staged, so unchanged outputs keep their mtime
+            out_dir = STAGING_DIR
+            os.makedirs(os.path.dirname(out_dir), exist_ok=True)
+    published = False
+    try:
+        assets = _generate(
+            args,
+            out_dir,
+            changed,
+            report,
+            block_cache,
+            parse_cache,
+            site_index,
+            fingerprint,
+        )
+        if args.listings:
+            write_listings(
+                site_index,
+                out_dir,
+                "template.html",
+                args.basepath,
+                args.relative_urls,
+                args.minify,
+                assets,
+            )
+        if args.site_url:
+            write_sitemap(site_index, out_dir, args.site_url)
+            write_feed(
+                site_index,
+                out_dir,
+                args.site_url,
+                _site_title(site_index, out_dir, args.site_url),
+            )
+        if args.gzip:
+            _compress(args, out_dir)
+        if args.atomic:
+            linked = seeded + link_identical(out_dir, previous)
+        if ledger is not None and out_dir == STAGING_DIR:
+            changes = ledger.publish(out_dir, OUTPUT_DIR)
+        elif ledger is not None:
+            changes = ledger.scan(out_dir)
+        if args.atomic:
+            swap(OUTPUT_DIR, out_dir, args.swap)
+            published = True
+            console.message(
+                f"Published {out_dir} at {OUTPUT_DIR}, "
+                f"{linked} unchanged files linked to the previous generation"
+            )
+            prune_generations(GENERATIONS_DIR, args.keep_generations, OUTPUT_DIR)
+        if ledger is not None:
+            ledger.save()
+            write_changes(changes, args.changes)
+    finally:
+        if (args.atomic and not published) or out_dir == STAGING_DIR:
+            # failed builds never reach the published output, staged ones were moved
+            shutil.rmtree(out_dir, ignore_errors=True)
+        site_index.save()
+        if block_cache is not None:
+            block_cache.save()
+        if parse_cache is not None:
+            parse_cache.prune()
+
+
+def _build_shard(
+    args: argparse.Namespace, changed: set[str] | None, report: BuildReport | None
+):
+    """
+    Render the pages of one shard into its own directory under SHARDS_DIR. Static
+    files, listings, sitemap, feed and compression are left to merge.
+    """
+    index, count = args.shard
+    directory = shard_dir(index, count)
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
+    block_cache, parse_cache = _open_caches(args)
+    # written only once all pages of the shard are generated
+    site_index = SiteIndex(os.path.join(directory, SHARD_INDEX))
+    try:
+        assets = _static_assets(args)
+        site_index.fingerprint = _shard_fingerprint(args, assets)
+        generate_page_recursive(
+            "content",
+            "template.html",
+            os.path.join(directory, SHARD_OUTPUT),
+            args.basepath,
+            shard=args.shard,
+            **_page_options(args, report, block_cache, parse_cache, site_index, assets),
+        )
+        site_index.save()
+        console.message(f"Generated shard {index} of {count} into {directory}")
+    finally:
+        if block_cache is not None:
+            block_cache.save()
+        if parse_cache is not None:
+            parse_cache.prune()
+
+
+def _static_assets(args: argparse.Namespace) -> AssetManifest | None:
+    # asset manifest of static files without publishing them, for shards and merge
+    if not (args.fingerprint or args.sri or args.image_sizes):
+        return None
+    with tempfile.TemporaryDirectory() as static_dir:
+        copy_files("static", static_dir)
+        return _asset_manifest(args, static_dir)
+
+
+def _shard_fingerprint(args: argparse.Namespace, assets: AssetManifest | None) -> str:
+    # every shard of one build and the merge publishing it agree on this
+    return build_fingerprint(
+        [source for source, _ in collect_pages("content", OUTPUT_DIR)],
+        build_inputs(
+            "template.html", args.basepath, args.relative_urls, args.minify, assets
+        ),
+    )
+
+
+def _open_caches(
+    args: argparse.Namespace,
+) -> tuple[BlockCache | None, ParseCache | None]:
+    block_cache = parse_cache = None
+    if args.block_cache and not args.no_cache:
+        block_cache = open_block_cache(
+            BLOCK_CACHE_PATH, args.block_cache_size * 1024 * 1024
+        )
+    if not args.no_cache:
+        parse_cache = ParseCache(PARSE_CACHE_DIR, args.parse_cache_size * 1024 * 1024)
+    return block_cache, parse_cache
+
+
+def _compress(args: argparse.Namespace, out_dir: str):
+    if args.no_cache:
+        with tempfile.TemporaryDirectory() as directory:
+            compressed, reused = compress_outputs(
+                out_dir, CompressCache(directory), args.gzip
+            )
     else:
-        basepath = args[1]
-    copy_files("static", "docs")
-    generate_page_recursive("content", "template.html", "docs", basepath)
+        cache = CompressCache(COMPRESS_CACHE_DIR)
+        compressed, reused = compress_outputs(out_dir, cache, args.gzip)
+        cache.prune()
+    console.message(f"Compressed {compressed} outputs, {reused} unchanged reused")
+
+
+def clean_caches():
+    ParseCache(PARSE_CACHE_DIR).clear()
+    CompressCache(COMPRESS_CACHE_DIR).clear()
+    if os.path.exists(BLOCK_CACHE_PATH):
+        os.remove(BLOCK_CACHE_PATH)
+    console.message("Removed parse, block and compression caches")
+
+
+def _site_title(site_index: SiteIndex, out_dir: str, default: str) -> str:
+    for entry in site_index.entries(out_dir):
+        if entry["url"] == "/":
+            return entry["title"]
+    return default
+
+
+def _generate(
+    args: argparse.Namespace,
+    out_dir: str,
+    changed: set[str] | None,
+    report: BuildReport | None,
+    block_cache: BlockCache | None,
+    parse_cache: ParseCache | None,
+    site_index: SiteIndex,
+    fingerprint: str | None = None,
+) -> AssetManifest | None:
+    if args.atomic:
+        # a fresh generation holds only the static files seeded from the previous one
+        sync_files("static", out_dir, None, args.link, args.checksum)
+    elif args.incremental:
+        manifest = BuildManifest.load(MANIFEST_PATH)
+        manifest.assets = sync_files(
+            "static", out_dir, manifest.assets, args.link, args.checksum
+        )
+        manifest.save()
+    elif out_dir == STAGING_DIR:
+        # staged static files are only compared with the published ones, link them
+        shutil.rmtree(out_dir, ignore_errors=True)
+        sync_files("static", out_dir, None, "hardlink")
+    else:
+        copy_files("static", out_dir)
+    assets = _asset_manifest(args, out_dir)
+    if args.atomic or not args.incremental:
+        # pages are rewritten behind the manifest's back, so it must not vouch for them
+        manifest = BuildManifest.load(MANIFEST_PATH)
+        manifest.invalidate(collect_pages("content", OUTPUT_DIR))
+        # static files now published, removed by incremental syncs once deleted
+        manifest.assets = list_files("static")
+        manifest.save()
+    if args.command == "merge":
+        merge_shards(out_dir, site_index, args.link, fingerprint=fingerprint)
+        return assets
+    options = _page_options(args, report, block_cache, parse_cache, site_index, assets)
+    if args.incremental and not args.atomic:
+        generate_page_incremental(
+            "content",
+            "template.html",
+            out_dir,
+            args.basepath,
+            changed=changed,
+            **options,
+        )
+    else:
+        generate_page_recursive(
+            "content", "template.html", out_dir, args.basepath, **options
+        )
+    return assets
+
+
+def _asset_manifest(args: argparse.Namespace, out_dir: str) -> AssetManifest | None:
+    # fingerprints static files copied to out_dir, None without asset options
+    if not (args.fingerprint or args.sri or args.image_sizes):
+        return None
+    assets = AssetManifest(ASSET_MANIFEST_PATH)
+    if args.fingerprint or args.sri:
+        previous = AssetManifest.load(ASSET_MANIFEST_PATH)
+        assets = fingerprint_files("static", out_dir, previous, args.sri)
+    if args.image_sizes:
+        image_cache = ImageCache.load(IMAGE_CACHE_PATH)
+        assets = add_image_sizes("static", assets, image_cache)
+        image_cache.save()
+    assets.save()
+    return assets
+
+
+def _page_options(
+    args: argparse.Namespace,
+    report: BuildReport | None,
+    block_cache: BlockCache | None,
+    parse_cache: ParseCache | None,
+    site_index: SiteIndex,
+    assets: AssetManifest | None,
+) -> dict:
+    return dict(
+        jobs=args.jobs,
+        report=report,
+        block_cache=block_cache,
+        site_index=site_index,
+        relative_urls=args.relative_urls,
+        parse_cache=parse_cache,
+        io_threads=args.pipeline,
+        minify=args.minify,
+        assets=assets,
+    )
+
+
+def serve(args: argparse.Namespace):
+    # watch mode relies on the manifest to keep untouched outputs
+    args.incremental = args.incremental or args.watch or args.live_reload
+    build(args)
+    live_reload = LiveReload() if args.live_reload else None
+    watching = args.watch or args.live_reload
+    start_server(OUTPUT_DIR, args.port, live_reload, background=watching)
+    if not watching:
+        return
+
+    def watched_paths() -> list[str]:
+        return ["content", "static"] + load_template("template.html").dependencies
+
+    def rebuild(changed: set[str], removed: set[str]):
+        content = {path for path in changed if path.startswith("content" + os.sep)}
+        if any(
+            not path.startswith(("content", "static")) for path in changed | removed
+        ):
+            # template or one of its partials changed
+            load_template.cache_clear()
+        try:
+            build(args, changed=content)
+        except Exception as e:
+            console.message(f"Rebuild failed: {e}")
+            return
+        if live_reload:
+            live_reload.notify()
+
+    watch(watched_paths, rebuild)
+
+
+def main():
+    args = parse_args()
+    if args.command == "cache":
+        clean_caches()
+        return
+    if args.quiet:
+        console.set_mode("quiet")
+    elif args.progress:
+        console.set_mode("progress")
+    try:
+        if args.command == "serve":
+            serve(args)
+        else:
+            build(args)
+    except (BuildError, ShardError) as e:
+        sys.exit(f"Build failed: {e}")
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == "__main__":
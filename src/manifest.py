@@ -0,0 +1,114 @@
+import hashlib
+import os
+
+from storage import load_json, save_json
+from template import load_template
+from urls import AssetManifest
+
+
+GENERATOR_VERSION = "1"
+MANIFEST_PATH = os.path.join(".build", "manifest.json")
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: str) -> str:
+    """
+    Return sha256 hex digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+
+    def __init__(
+        self,
+        path: str,
+        inputs: dict[str, str] | None = None,
+        pages: dict[str, dict[str, str]] | None = None,
+        assets: list[str] | None = None,
+    ):
+        """
+        Initialize BuildManifest.
+
+        Args:
+            path: Location of the manifest file on disk
+            inputs: Hashes of build-wide inputs (template, basepath, generator version)
+            pages: Mapping of source path to its recorded hash and destination path
+            assets: Relative paths of static files synced into the output
+        """
+        self.path = path
+        self.inputs = inputs or {}
+        self.pages = pages or {}
+        self.assets = assets or []
+
+    @classmethod
+    def load(cls, path: str) -> "BuildManifest":
+        data = load_json(path) or {}
+        return cls(path, data.get("inputs"), data.get("pages"), data.get("assets"))
+
+    def save(self):
+        save_json(
+            self.path,
+            {"inputs": self.inputs, "pages": self.pages, "assets": self.assets},
+        )
+
+    def needs_build(self, source: str, source_hash: str, dest: str) -> bool:
+        """
+        Check whether page has to be regenerated: its source changed, it was never built
+        or its output is gone.
+        """
+        entry = self.pages.get(source)
+        if entry is None or entry["hash"] != source_hash or entry["dest"] != dest:
+            return True
+        return not os.path.exists(dest)
+
+    def record(self, source: str, source_hash: str, dest: str):
+        self.pages[source] = {"hash": source_hash, "dest": dest}
+
+    def invalidate(self, pages: list[tuple[str, str]]):
+        """
+        Note that pages were rewritten by a build that did not consult the manifest.
+        The build inputs are forgotten so the next incremental build regenerates every
+        page, while the destinations are kept so it still removes outputs of sources
+        deleted in between.
+        """
+        self.inputs = {}
+        for source, dest in pages:
+            self.pages[source] = {"hash": "", "dest": dest}
+
+    def remove_stale(self, sources: set[str]) -> list[str]:
+        """
+        Forget pages whose source is no longer present and return their destinations.
+        """
+        stale = [source for source in self.pages if source not in sources]
+        return [self.pages.pop(source)["dest"] for source in stale]
+
+
+def build_inputs(
+    template_path: str,
+    basepath: str,
+    relative_urls: bool = False,
+    minify: bool = False,
+    assets: AssetManifest | None = None,
+) -> dict[str, str]:
+    """
+    Describe build-wide inputs. Any change here invalidates every page.
+    """
+    template = load_template(template_path)
+    return {
+        "version": GENERATOR_VERSION,
+        "template": hash_bytes(
+            "".join(hash_file(path) for path in template.dependencies).encode()
+        ),
+        "basepath": basepath,
+        "urls": "relative" if relative_urls else "absolute",
+        "html": "minified" if minify else "plain",
+        "assets": assets.key if assets else "",
+    }
@@ -0,0 +1,66 @@
+import re
+
+
+# elements whose contents are kept exactly as written
+PRESERVED_REGEX = re.compile(
+    r"<(pre|textarea|script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL
+)
+# conditional comments are kept
+COMMENT_REGEX = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+TAG_REGEX = re.compile(r"(<[^>]*>)")
+TAG_NAME_REGEX = re.compile(r"</?([!\w-]+)")
+WHITESPACE_REGEX = re.compile(r"\s+")
+# whitespace around these tags never renders
+BLOCK_TAGS = frozenset(
+    (
+        "!doctype address article aside blockquote body br dd details div dl dt "
+        "fieldset figcaption figure footer form h1 h2 h3 h4 h5 h6 head header hr html "
+        "li link main meta nav ol p pre script section style summary table tbody td "
+        "tfoot th thead title tr ul"
+    ).split()
+)
+
+
+def minify_html(html: str) -> str:
+    """
+    Remove comments and insignificant whitespace from HTML. Runs of whitespace in
+    text collapse to a single space, which is dropped next to block-level tags.
+    Tags and contents of pre, textarea, script and style are left alone.
+    """
+    chunks = []
+    position = 0
+    block_before = True
+    for match in PRESERVED_REGEX.finditer(html):
+        block_after = match[1].lower() in BLOCK_TAGS
+        chunk = html[position : match.start()]
+        chunks.append(_minify_chunk(chunk, block_before, block_after))
+        chunks.append(match[0])
+        position = match.end()
+        block_before = block_after
+    chunks.append(_minify_chunk(html[position:], block_before, True))
+    return "".join(chunks)
+
+
+def _minify_chunk(html: str, block_before: bool, block_after: bool) -> str:
+    # alternating text and tags, starting and ending with text
+    parts = TAG_REGEX.split(COMMENT_REGEX.sub("", html))
+    for i in range(0, len(parts), 2):
+        text = WHITESPACE_REGEX.sub(" ", parts[i])
+        if block_before if i == 0 else _is_block_tag(parts[i - 1]):
+            text = text.lstrip()
+        if block_after if i == len(parts) - 1 else _is_block_tag(parts[i + 1]):
+            text = text.rstrip()
+        parts[i] = text
+    return "".join(parts)
+
+
+def _is_block_tag(tag: str) -> bool:
+    match = TAG_NAME_REGEX.match(tag)
+    return match is not None and match[1].lower() in BLOCK_TAGS
+
+
+def collapse_whitespace(text: str) -> str:
+    """
+    Collapse runs of whitespace in text content to a single space.
+    """
+    return WHITESPACE_REGEX.sub(" ", text)
@@ -1,20 +1,42 @@
 from htmlnode import HTMLNode
 
-from typing import Dict, List
+from typing import Dict, Iterator, List
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self, tag: str, children: List[HTMLNode], props: Dict[str, str] | None = None
     ):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
+        return "".join(self.iter_html())
+
+    def iter_html(self) -> Iterator[str]:
+        """
+        Yield HTML of the node and its descendants fragment by fragment, walking the
+        tree with an explicit stack instead of recursion.
+        """
+        stack: List[HTMLNode | str] = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                yield node
+            elif isinstance(node, ParentNode):
+                yield node.start_tag()
+                stack.append(node.end_tag())
+                stack.extend(reversed(node.children))
+            else:
+                yield from node.iter_html()
+
+    def start_tag(self) -> str:
         if not self.tag:
             raise ValueError("ParentNode must have tag populated")
         if not self.children:
             raise ValueError("ParentNode must have children populated")
-        child_text = ""
-        for child in self.children:
-            child_text += child.to_html()
-        return f"<{self.tag}>{child_text}</{self.tag}>"
+        return f"<{self.tag}>"
+
+    def end_tag(self) -> str:
+        return f"</{self.tag}>"
@@ -0,0 +1,93 @@
+import hashlib
+import marshal
+import os
+import shutil
+
+from document import Document
+
+
+PARSE_CACHE_DIR = os.path.join(".build", "parse")
+PARSE_CACHE_SIZE = 256 * 1024 * 1024
+# bump whenever parsing produces different documents for the same source
+PARSER_VERSION = "1"
+
+
+class ParseCache:
+
+    def __init__(self, directory: str, max_bytes: int = PARSE_CACHE_SIZE):
+        """
+        Initialize ParseCache. Every parsed page is stored in its own file, so worker
+        processes read and write entries without coordination.
+
+        Args:
+            directory: Directory holding cache entries
+            max_bytes: Size bound of the directory, prune evicts least recently used
+                entries beyond it
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(source: str, namespace: str = "") -> str:
+        """
+        Hash page source and parser version. namespace tells apart documents of the
+        same source that differ, e.g. holding block cache HTML with resolved urls.
+        """
+        digest = hashlib.sha256(f"{PARSER_VERSION}\0{namespace}\0".encode())
+        digest.update(source.encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> tuple[dict, Document] | None:
+        """
+        Return front matter and document stored under key, None when missing or
+        unreadable.
+        """
+        path = os.path.join(self.directory, key)
+        try:
+            with open(path, "rb") as f:
+                meta, document = marshal.load(f)
+            # mark entry as recently used for prune
+            os.utime(path)
+        except (OSError, EOFError, ValueError, TypeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return meta, Document.from_bytes(document)
+
+    def put(self, key: str, meta: dict, document: Document):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            marshal.dump((meta, document.to_bytes()), f)
+        os.replace(tmp_path, path)
+
+    def prune(self) -> int:
+        """
+        Remove least recently used entries until the cache fits max_bytes.
+
+        Returns:
+            Number of entries removed
+        """
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.is_file()]
+        except FileNotFoundError:
+            return 0
+        stats = sorted(
+            ((entry.stat(), entry.path) for entry in entries),
+            key=lambda item: item[0].st_mtime_ns,
+        )
+        size = sum(stat.st_size for stat, _ in stats)
+        removed = 0
+        for stat, path in stats:
+            if size <= self.max_bytes:
+                break
+            os.remove(path)
+            size -= stat.st_size
+            removed += 1
+        return removed
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,25 @@
+from collections import deque
+from concurrent.futures import Executor
+from typing import Callable, Iterable, Iterator, TypeVar
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def bounded_map(
+    executor: Executor, fn: Callable[[T], R], items: Iterable[T], depth: int
+) -> Iterator[R]:
+    """
+    Like executor.map, but items are pulled lazily and at most depth of them are in
+    flight at a time. Chaining bounded_map calls over different executors builds a
+    pipeline whose stages overlap while a slow stage holds back the earlier ones.
+    Results are yielded in the order of items.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= depth:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
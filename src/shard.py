@@ -0,0 +1,176 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+
+import console
+from copyfiles import list_files, transfer_file
+from manifest import hash_file
+from siteindex import SiteIndex
+
+
+SHARDS_DIR = os.path.join(".build", "shards")
+SHARD_DIR_REGEX = re.compile(r"(\d+)-of-(\d+)")
+# output and site index of a shard, within its directory
+SHARD_OUTPUT = "docs"
+SHARD_INDEX = "site.json"
+
+
+class ShardError(Exception):
+    pass
+
+
+def parse_shard(text: str) -> tuple[int, int]:
+    """
+    Parse "i/n", shard i of n counting from 1, for argparse.
+    """
+    index, separator, count = text.partition("/")
+    try:
+        shard = int(index), int(count)
+    except ValueError:
+        shard = None
+    if not separator or shard is None or not 1 <= shard[0] <= shard[1]:
+        raise argparse.ArgumentTypeError(
+            f"invalid shard {text}, expected i/n with 1 <= i <= n"
+        )
+    return shard
+
+
+def shard_dir(index: int, count: int, directory: str = SHARDS_DIR) -> str:
+    """
+    Return directory holding the output and site index of shard index of count.
+    """
+    return os.path.join(directory, f"{index}-of-{count}")
+
+
+def partition(pages: list[tuple[str, str]], count: int) -> list[list[tuple[str, str]]]:
+    """
+    Split (source, destination) pairs into count shards of about equal total
+    source size. Pages are placed largest first on the least loaded shard, ties
+    going to the shard picked by a hash of the source path, so every checkout of
+    the site is partitioned the same way.
+
+    Returns:
+        Pages of every shard, in the order given
+    """
+    order = {page: position for position, page in enumerate(pages)}
+    sized = sorted(
+        (
+            -os.path.getsize(page[0]),
+            hashlib.sha256(page[0].replace(os.sep, "/").encode()).hexdigest(),
+            page,
+        )
+        for page in pages
+    )
+    loads = [0] * count
+    shards: list[list[tuple[str, str]]] = [[] for _ in range(count)]
+    for negative_size, digest, page in sized:
+        preferred = int(digest, 16) % count
+        shard = min(range(count), key=lambda i: (loads[i], (i - preferred) % count))
+        shards[shard].append(page)
+        loads[shard] -= negative_size
+    return [sorted(shard, key=order.__getitem__) for shard in shards]
+
+
+def build_fingerprint(sources: list[str], inputs: dict[str, str]) -> str:
+    """
+    Fingerprint the sources of every page of the site, by path and contents, and
+    the build-wide inputs. Every shard of one build records the same fingerprint.
+    """
+    data = {
+        "sources": [
+            [source.replace(os.sep, "/"), hash_file(source)] for source in sources
+        ],
+        "inputs": inputs,
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+def shard_count(directory: str = SHARDS_DIR, fingerprint: str | None = None) -> int:
+    """
+    Return the number of shards of the sharded build in directory. Raises
+    ShardError unless directory holds every finished shard of exactly one build.
+    With fingerprint, the shards must also have been built from the sources and
+    build inputs it was computed from.
+    """
+    found = set()
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            match = SHARD_DIR_REGEX.fullmatch(name)
+            if match:
+                found.add((int(match[1]), int(match[2])))
+    counts = {count for _, count in found}
+    if len(counts) != 1:
+        raise ShardError(
+            f"expected shards of one build in {directory}, found shard counts "
+            f"{sorted(counts) or 'none'}"
+        )
+    count = counts.pop()
+    missing = [
+        str(index)
+        for index in range(1, count + 1)
+        if not os.path.isfile(
+            os.path.join(shard_dir(index, count, directory), SHARD_INDEX)
+        )
+    ]
+    if missing:
+        raise ShardError(
+            f"missing or unfinished shards {', '.join(missing)} of {count}"
+        )
+    fingerprints = [
+        SiteIndex.load(
+            os.path.join(shard_dir(index, count, directory), SHARD_INDEX)
+        ).fingerprint
+        for index in range(1, count + 1)
+    ]
+    if len(set(fingerprints)) != 1 or fingerprints[0] is None:
+        raise ShardError(
+            f"shards in {directory} were not generated by one build, "
+            f"rebuild all {count} of them"
+        )
+    if fingerprint is not None and fingerprints[0] != fingerprint:
+        raise ShardError(
+            f"shards in {directory} were generated from other sources or options, "
+            f"rebuild all {count} of them"
+        )
+    return count
+
+
+def merge_shards(
+    dest_dir: str,
+    site_index: SiteIndex,
+    link: str = "copy",
+    directory: str = SHARDS_DIR,
+    fingerprint: str | None = None,
+) -> int:
+    """
+    Place pages rendered by every shard of a sharded build in dest_dir and record
+    them in site_index, which forgets pages no shard rendered. Raises ShardError
+    unless directory holds every finished shard of exactly one build, built from
+    fingerprint when given.
+
+    Returns:
+        Number of pages merged
+    """
+    count = shard_count(directory, fingerprint)
+    pages = {}
+    merged = set()
+    for index in range(1, count + 1):
+        shard = shard_dir(index, count, directory)
+        shard_out = os.path.join(shard, SHARD_OUTPUT)
+        console.file_message(f"Merging shard {shard}")
+        for rel_path in list_files(shard_out):
+            if rel_path in merged:
+                raise ShardError(f"{rel_path} was generated by more than one shard")
+            merged.add(rel_path)
+            transfer_file(
+                os.path.join(shard_out, rel_path),
+                os.path.join(dest_dir, rel_path),
+                link,
+            )
+        pages.update(SiteIndex.load(os.path.join(shard, SHARD_INDEX)).pages)
+    site_index.retain(set(pages))
+    site_index.pages.update(pages)
+    console.message(f"Merged {len(pages)} pages from {count} shards")
+    return len(pages)
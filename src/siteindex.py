@@ -0,0 +1,213 @@
+import os
+from html import escape
+
+import console
+from copyfiles import remove_and_prune
+from ledger import write_output
+from storage import load_json, save_json
+from template import load_template
+from urls import AssetManifest, UrlResolver, page_url
+
+
+SITE_INDEX_PATH = os.path.join(".build", "site.json")
+# bump whenever recorded fields change meaning
+INDEX_FORMAT = 2
+SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+ATOM_NAMESPACE = "http://www.w3.org/2005/Atom"
+
+
+class SiteIndex:
+
+    def __init__(
+        self,
+        path: str,
+        pages: dict[str, dict] | None = None,
+        listings: list[str] | None = None,
+        fingerprint: str | None = None,
+    ):
+        """
+        Initialize SiteIndex.
+
+        Args:
+            path: Location of the index file on disk
+            pages: Mapping of source path to its destination path, relative to the
+                output directory, and front matter
+            listings: Destination paths of generated section listing pages,
+                relative to the output directory
+            fingerprint: Sources and build inputs the pages were rendered from, set
+                by sharded builds
+        """
+        self.path = path
+        self.pages = pages or {}
+        self.listings = listings or []
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def load(cls, path: str) -> "SiteIndex":
+        """
+        Load index from disk. Indexes of another format load empty, so their pages
+        are indexed again.
+        """
+        data = load_json(path) or {}
+        if data.get("format") != INDEX_FORMAT:
+            return cls(path)
+        return cls(
+            path, data.get("pages"), data.get("listings"), data.get("fingerprint")
+        )
+
+    def save(self):
+        save_json(
+            self.path,
+            {
+                "format": INDEX_FORMAT,
+                "pages": self.pages,
+                "listings": self.listings,
+                "fingerprint": self.fingerprint,
+            },
+        )
+
+    def record(self, source: str, dest: str, meta: dict):
+        self.pages[source] = {"dest": dest, **meta}
+
+    def retain(self, sources: set[str]):
+        """
+        Forget pages whose source is not in sources anymore.
+        """
+        for source in set(self.pages) - sources:
+            del self.pages[source]
+
+    def entries(self, dest_dir: str) -> list[dict]:
+        """
+        Return indexed pages with their site-relative url, newest first. Pages without
+        a date follow in url order.
+        """
+        entries = [
+            {**entry, "url": page_url(os.path.join(dest_dir, entry["dest"]), dest_dir)}
+            for entry in self.pages.values()
+        ]
+        entries.sort(key=lambda entry: entry["url"])
+        entries.sort(key=lambda entry: entry.get("date", ""), reverse=True)
+        return entries
+
+
+def write_sitemap(index: SiteIndex, dest_dir: str, site_url: str):
+    """
+    Write sitemap.xml with absolute urls of all indexed pages and listings.
+    """
+    site_url = site_url.rstrip("/")
+    urls = [(entry["url"], entry.get("date")) for entry in index.entries(dest_dir)]
+    urls += [
+        (page_url(os.path.join(dest_dir, dest), dest_dir), None)
+        for dest in index.listings
+    ]
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<urlset xmlns="{SITEMAP_NAMESPACE}">',
+    ]
+    for url, date in sorted(urls):
+        lastmod = f"<lastmod>{date}</lastmod>" if date else ""
+        lines.append(f"<url><loc>{escape(site_url + url)}</loc>{lastmod}</url>")
+    lines.append("</urlset>")
+    path = os.path.join(dest_dir, "sitemap.xml")
+    console.file_message(f"Writing sitemap {path}")
+    write_output(path, "\n".join(lines) + "\n")
+
+
+def write_feed(
+    index: SiteIndex, dest_dir: str, site_url: str, title: str, limit: int = 20
+):
+    """
+    Write Atom feed.xml of the newest dated pages.
+    """
+    site_url = site_url.rstrip("/")
+    entries = [entry for entry in index.entries(dest_dir) if entry.get("date")]
+    entries = entries[:limit]
+    updated = f"{entries[0]['date']}T00:00:00Z" if entries else "1970-01-01T00:00:00Z"
+    lines = [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        f'<feed xmlns="{ATOM_NAMESPACE}">',
+        f"<title>{escape(title)}</title>",
+        f"<id>{escape(site_url)}/</id>",
+        f'<link href="{escape(site_url)}/"/>',
+        f'<link rel="self" href="{escape(site_url)}/feed.xml"/>',
+        f"<updated>{updated}</updated>",
+    ]
+    for entry in entries:
+        url = escape(site_url + entry["url"])
+        lines += [
+            "<entry>",
+            f"<title>{escape(entry['title'])}</title>",
+            f"<id>{url}</id>",
+            f'<link href="{url}"/>',
+            f"<updated>{entry['date']}T00:00:00Z</updated>",
+            *(f'<category term="{escape(tag)}"/>' for tag in entry.get("tags", [])),
+            f"<summary>{escape(entry.get('summary', ''))}</summary>",
+            "</entry>",
+        ]
+    lines.append("</feed>")
+    path = os.path.join(dest_dir, "feed.xml")
+    console.file_message(f"Writing feed {path}")
+    write_output(path, "\n".join(lines) + "\n")
+
+
+def write_listings(
+    index: SiteIndex,
+    dest_dir: str,
+    template_path: str,
+    basepath: str,
+    relative_urls: bool = False,
+    minify: bool = False,
+    assets: AssetManifest | None = None,
+) -> list[str]:
+    """
+    Write index.html listing the pages of every top-level section (subdirectory of
+    content) that has no index page of its own, and remove listings of sections that
+    are gone, unless an index page now takes their place. With relative_urls, links
+    are relative to the listing. With minify, the template is minified. Urls of
+    static files in assets are fingerprinted.
+
+    Returns:
+        Destination paths of written listings, relative to dest_dir
+    """
+    entries = index.entries(dest_dir)
+    urls = {entry["url"] for entry in entries}
+    sections: dict[str, list[dict]] = {}
+    for entry in entries:
+        parts = entry["url"].split("/")
+        if len(parts) > 2 and f"/{parts[1]}/" not in urls:
+            sections.setdefault(parts[1], []).append(entry)
+    template = load_template(template_path, minify)
+    listings = []
+    for section, section_entries in sorted(sections.items()):
+        path = os.path.join(dest_dir, section, "index.html")
+        title = section.replace("-", " ").capitalize()
+        resolve_url = UrlResolver(
+            basepath, f"/{section}/" if relative_urls else None, assets
+        )
+        content = _listing(title, section_entries, resolve_url)
+        console.file_message(f"Writing listing {path}")
+        write_output(
+            path,
+            template.iter_segments({"Title": title, "Content": content}, resolve_url),
+        )
+        listings.append(os.path.relpath(path, dest_dir))
+    # a section that gained an index page took over its listing's destination
+    pages = {entry["dest"] for entry in index.pages.values()}
+    for dest in set(index.listings) - set(listings) - pages:
+        path = os.path.join(dest_dir, dest)
+        console.file_message(f"Removing stale listing {path}")
+        remove_and_prune(path, dest_dir)
+    index.listings = listings
+    return listings
+
+
+def _listing(title: str, entries: list[dict], resolve_url: UrlResolver) -> str:
+    items = []
+    for entry in entries:
+        item = f'<a href="{resolve_url(entry["url"])}">{entry["title"]}</a>'
+        if entry.get("date"):
+            item += f' <time datetime="{entry["date"]}">{entry["date"]}</time>'
+        if entry.get("summary"):
+            item += f"<p>{entry['summary']}</p>"
+        items.append(f"<li>{item}</li>")
+    return f"<div><h1>{title}</h1><ul>{''.join(items)}</ul></div>"
@@ -1,9 +1,26 @@
 import re
+from typing import TextIO
+
 from textnode import TextType, TextNode
 
 
 IMAGE_REGEX = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
 LINK_REGEX = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+# leftmost match wins, alternatives are tried in the order listed. Bold ends at the
+# first "**" like a run of anything else would, but lazily, so the regex engine
+# keeps no state per character.
+INLINE_REGEX = re.compile(
+    r"`(?P<code>[^`]*)`"
+    r"|!\[(?P<alt>[^\[\]]*)\]\((?P<src>[^\(\)]*)\)"
+    r"|\[(?P<anchor>[^\[\]]*)\]\((?P<href>[^\(\)]*)\)"
+    r"|\*\*(?P<bold>.*?)\*\*"
+    r"|_(?P<italic>[^_]*)_",
+    re.DOTALL,
+)
+LINK_OR_IMAGE_REGEX = re.compile(
+    r"!\[(?P<alt>[^\[\]]*)\]\((?P<src>[^\(\)]*)\)"
+    r"|\[(?P<anchor>[^\[\]]*)\]\((?P<href>[^\(\)]*)\)"
+)
 
 
 class InvalidMarkdownError(Exception):
@@ -14,7 +31,8 @@ def split_nodes_delimiter(
     old_nodes: list[TextNode], delimiter: str, text_type: TextType
 ) -> list[TextNode]:
     """
-    Split provided TextNodes based on provided delimiter and text_type.
+    Split provided TextNodes based on provided delimiter and text_type. A delimiter
+    left unclosed is kept as literal text.
 
     Args:
         old_node: List of TextNodes to be processed
@@ -28,7 +46,7 @@ def split_nodes_delimiter(
             continue
         splitted = node.text.split(delimiter)
         if len(splitted) % 2 == 0:
-            raise InvalidMarkdownError("no closing delimiter detected")
+            splitted[-2:] = [splitted[-2] + delimiter + splitted[-1]]
         for idx, text in enumerate(splitted):
             if idx % 2 != 0:
                 new_node = TextNode(text, text_type)
@@ -45,47 +63,38 @@ def split_nodes_image(old_nodes: list[TextNode]) -> list[TextNode]:
     """
     Split provided TextNodes to new TextNodes with TEXT and IMAGE type.
     """
-    new_nodes = []
-    for node in old_nodes:
-        if not node.text:
-            continue
-        images = extract_markdown_images(node.text)
-        if not images:
-            new_nodes.append(node)
-            continue
-        text = node.text
-        for image_alt, image_link in images:
-            sections = text.split(f"![{image_alt}]({image_link})", 1)
-            if sections[0]:
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(image_alt, TextType.IMAGE, image_link))
-            text = sections[1]
-        if text:
-            new_nodes.append(TextNode(text, TextType.TEXT))
-    return new_nodes
+    return _split_nodes_regex(old_nodes, IMAGE_REGEX, TextType.IMAGE)
 
 
 def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
     """
     Split provided TextNodes to new TextNodes with TEXT and LINK type.
     """
+    return _split_nodes_regex(old_nodes, LINK_REGEX, TextType.LINK)
+
+
+def _split_nodes_regex(
+    old_nodes: list[TextNode], regex: re.Pattern, text_type: TextType
+) -> list[TextNode]:
+    # one pass over every node, slicing at match offsets instead of searching the
+    # remaining text again for each match
     new_nodes = []
     for node in old_nodes:
         if not node.text:
             continue
-        links = extract_markdown_links(node.text)
-        if not links:
-            new_nodes.append(node)
-            continue
         text = node.text
-        for link_anchor, link_url in links:
-            sections = text.split(f"[{link_anchor}]({link_url})", 1)
-            if sections[0]:
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(link_anchor, TextType.LINK, link_url))
-            text = sections[1]
-        if text:
-            new_nodes.append(TextNode(text, TextType.TEXT))
+        position = 0
+        for match in regex.finditer(text):
+            if match.start() > position:
+                new_nodes.append(
+                    TextNode(text[position : match.start()], TextType.TEXT)
+                )
+            new_nodes.append(TextNode(match[1], text_type, match[2]))
+            position = match.end()
+        if position == 0:
+            new_nodes.append(node)
+        elif position < len(text):
+            new_nodes.append(TextNode(text[position:], TextType.TEXT))
     return new_nodes
 
 
@@ -104,21 +113,53 @@ def extract_markdown_links(text: str) -> list[tuple]:
 
 
 def text_to_textnodes(text: str) -> list[TextNode]:
-    return split_nodes_image(
-        split_nodes_link(
-            split_nodes_delimiter(
-                split_nodes_delimiter(
-                    split_nodes_delimiter(
-                        [TextNode(text, TextType.TEXT)], "`", TextType.CODE
-                    ),
-                    "_",
-                    TextType.ITALIC,
-                ),
-                "**",
-                TextType.BOLD,
-            )
-        )
-    )
+    """
+    Split inline markdown text to TextNodes in a single left-to-right scan, in time
+    linear in the length of text. Code, italic and bold delimiters left unclosed and
+    unmatched brackets are kept as literal text.
+    """
+    new_nodes = []
+    position = 0
+    for match in INLINE_REGEX.finditer(text):
+        if match.start() > position:
+            new_nodes.append(TextNode(text[position : match.start()], TextType.TEXT))
+        position = match.end()
+        match match.lastgroup:
+            case "code":
+                new_node = TextNode(match["code"], TextType.CODE)
+            case "src":
+                new_node = TextNode(match["alt"], TextType.IMAGE, match["src"])
+            case "href":
+                new_node = TextNode(match["anchor"], TextType.LINK, match["href"])
+            case "bold" | "italic" as group if LINK_OR_IMAGE_REGEX.search(match[group]):
+                # links and images win over the emphasis around them
+                new_nodes.extend(_split_links_and_images(match[group]))
+                continue
+            case "bold":
+                new_node = TextNode(match["bold"], TextType.BOLD)
+            case _:
+                new_node = TextNode(match["italic"], TextType.ITALIC)
+        if new_node.text or new_node.texttype == TextType.IMAGE:
+            new_nodes.append(new_node)
+    if position < len(text):
+        new_nodes.append(TextNode(text[position:], TextType.TEXT))
+    return new_nodes
+
+
+def _split_links_and_images(text: str) -> list[TextNode]:
+    new_nodes = []
+    position = 0
+    for match in LINK_OR_IMAGE_REGEX.finditer(text):
+        if match.start() > position:
+            new_nodes.append(TextNode(text[position : match.start()], TextType.TEXT))
+        position = match.end()
+        if match.lastgroup == "src":
+            new_nodes.append(TextNode(match["alt"], TextType.IMAGE, match["src"]))
+        elif match["anchor"]:
+            new_nodes.append(TextNode(match["anchor"], TextType.LINK, match["href"]))
+    if position < len(text):
+        new_nodes.append(TextNode(text[position:], TextType.TEXT))
+    return new_nodes
 
 
 def markdown_to_blocks(markdown: str) -> list[str]:
@@ -129,11 +170,16 @@ def markdown_to_blocks(markdown: str) -> list[str]:
     return [block.strip() for block in blocks if block]
 
 
-def extract_title(markdown: str) -> str:
+def extract_title(markdown: str | TextIO) -> str:
     """
-    Extract the heading (starting with single "#") from md text. Raises if not found.
+    Extract the heading (starting with single "#") from md text, given as text or
+    file. Raises if not found.
     """
-    for line in markdown.split("\n"):
+    if isinstance(markdown, str):
+        lines = markdown.split("\n")
+    else:
+        lines = (line.rstrip("\n") for line in markdown)
+    for line in lines:
         if line.startswith("# "):
             heading = line
             break
@@ -0,0 +1,238 @@
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+STAGES = ("read", "blocks", "inline", "render", "template", "write", "stream")
+STATS_PATH = os.path.join(".build", "stats.json")
+PROFILE_FORMATS = ("pstats", "collapsed")
+
+
+class PageStats:
+
+    def __init__(self, source: str):
+        """
+        Initialize PageStats.
+
+        Args:
+            source: Path of the page source
+        """
+        self.source = source
+        self.seconds: Dict[str, float] = {}
+        self.allocated: Dict[str, int] = {}
+        # peak memory traced while rendering the page, over what was traced before
+        self.peak = 0
+        self.streamed = False
+        self._baseline = 0
+        if tracemalloc.is_tracing():
+            self._baseline = tracemalloc.get_traced_memory()[0]
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Measure wall time of the block and, while tracemalloc is tracing, the peak
+        memory allocated by it.
+        """
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0) + time.perf_counter() - start
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1]
+                self.allocated[name] = max(
+                    self.allocated.get(name, 0), peak - start_memory
+                )
+                self.peak = max(self.peak, peak - self._baseline)
+
+    @property
+    def total(self) -> float:
+        return sum(self.seconds.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "source": self.source,
+            "seconds": self.seconds,
+            "allocated": self.allocated,
+            "peak": self.peak,
+            "streamed": self.streamed,
+            "total": self.total,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PageStats":
+        stats = cls(data["source"])
+        stats.seconds = data["seconds"]
+        stats.allocated = data["allocated"]
+        stats.peak = data["peak"]
+        stats.streamed = data["streamed"]
+        return stats
+
+
+class BuildReport:
+
+    def __init__(
+        self,
+        top: int = 10,
+        trace_memory: bool = False,
+        memory_budget: int | None = None,
+    ):
+        """
+        Initialize BuildReport.
+
+        Args:
+            top: Number of slowest pages listed in the report
+            trace_memory: Record allocations per stage with tracemalloc
+            memory_budget: Peak traced memory in bytes a page may take. Pages over
+                it are flagged and pages expected to exceed it are streamed.
+                Implies trace_memory.
+        """
+        self.top = top
+        self.trace_memory = trace_memory or memory_budget is not None
+        self.memory_budget = memory_budget
+        self.pages: List[PageStats] = []
+        self.started = time.perf_counter()
+
+    def add(self, stats: PageStats):
+        self.pages.append(stats)
+
+    def slowest(self) -> List[PageStats]:
+        return sorted(self.pages, key=lambda stats: stats.total, reverse=True)[
+            : self.top
+        ]
+
+    def over_budget(self) -> List[PageStats]:
+        """
+        Return pages whose peak traced memory exceeded the memory budget, largest
+        first.
+        """
+        if self.memory_budget is None:
+            return []
+        return sorted(
+            (stats for stats in self.pages if stats.peak > self.memory_budget),
+            key=lambda stats: stats.peak,
+            reverse=True,
+        )
+
+    def to_dict(self) -> dict:
+        stages = {
+            stage: sum(stats.seconds.get(stage, 0) for stats in self.pages)
+            for stage in STAGES
+        }
+        return {
+            "wall_seconds": time.perf_counter() - self.started,
+            "pages": len(self.pages),
+            "stages": stages,
+            "slowest": [stats.to_dict() for stats in self.slowest()],
+            "peak": max((stats.peak for stats in self.pages), default=0),
+            "memory_budget": self.memory_budget,
+            "over_budget": [stats.source for stats in self.over_budget()],
+            "streamed": [stats.source for stats in self.pages if stats.streamed],
+            "all": [stats.to_dict() for stats in self.pages],
+        }
+
+    def write(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=1)
+
+    def summary(self) -> str:
+        lines = [f"{len(self.pages)} pages, slowest:"]
+        for stats in self.slowest():
+            stages = ", ".join(
+                f"{stage} {seconds * 1000:.1f}ms"
+                for stage, seconds in stats.seconds.items()
+            )
+            lines.append(f"  {stats.total * 1000:8.1f}ms {stats.source} ({stages})")
+        if self.trace_memory and self.pages:
+            worst = max(self.pages, key=lambda stats: stats.peak)
+            lines.append(
+                f"Peak traced memory {format_size(worst.peak)} by {worst.source}"
+            )
+        if self.memory_budget is not None:
+            over_budget = self.over_budget()
+            streamed = sum(stats.streamed for stats in self.pages)
+            lines.append(
+                f"{len(over_budget)} pages over the memory budget of "
+                f"{format_size(self.memory_budget)}, {streamed} pages streamed"
+            )
+            for stats in over_budget:
+                lines.append(f"  {format_size(stats.peak):>10} {stats.source}")
+        return "\n".join(lines)
+
+
+def format_size(size: int) -> str:
+    """
+    Format size in bytes as kilobytes or megabytes, e.g. "1.5MB".
+    """
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f}KB"
+    return f"{size / (1024 * 1024):.1f}MB"
+
+
+class StackSampler:
+    """
+    Sample the stack of the creating thread at fixed interval and count collapsed
+    stacks in the format consumed by flamegraph tools ("outer;inner count"). Offers
+    the enable/disable/dump_stats interface of cProfile.Profile.
+    """
+
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                filename = os.path.basename(code.co_filename)
+                names.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def enable(self):
+        self._sampler.start()
+
+    def disable(self):
+        self._stop.set()
+        self._sampler.join()
+
+    def dump_stats(self, path: str):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profile(path: str | None, profile_format: str = "pstats"):
+    """
+    Profile the block with cProfile or the stack sampler and dump result to path.
+    Does nothing when path is None.
+    """
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile() if profile_format == "pstats" else StackSampler()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
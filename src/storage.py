@@ -0,0 +1,34 @@
+import json
+import os
+from contextlib import contextmanager
+from typing import IO, Any, Iterator
+
+
+@contextmanager
+def replace_file(path: str, mode: str = "w") -> Iterator[IO]:
+    """
+    Write to a temporary file next to path and move it over path once the block
+    completes, so readers never see a partly written file.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, mode) as f:
+        yield f
+    os.replace(tmp_path, path)
+
+
+def load_json(path: str) -> Any:
+    """
+    Return the data stored at path, or None when the file is missing or unreadable,
+    for callers to start over with empty state.
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_json(path: str, data: Any, sort_keys: bool = False):
+    with replace_file(path) as f:
+        json.dump(data, f, indent=1, sort_keys=sort_keys)
@@ -0,0 +1,164 @@
+import functools
+import os
+import re
+from typing import Callable, Dict, Iterable, List, NamedTuple, TextIO
+
+from minify import minify_html
+from urls import UrlResolver
+
+
+PLACEHOLDER_REGEX = re.compile(r"\{\{\s*(>?)\s*([\w./-]+)\s*\}\}")
+URL_ATTRIBUTE_REGEX = re.compile(r'\b(?:href|src)="(/[^"]*)"')
+# tags whose resource can be checked with subresource integrity
+SUBRESOURCE_TAG_REGEX = re.compile(r"<(?:link|script)\b[^>]*$", re.IGNORECASE)
+
+
+class TemplateError(Exception):
+    pass
+
+
+class TemplateUrl(NamedTuple):
+    """
+    Root-relative url of an href or src attribute in the template, resolved for
+    every rendered page. subresource marks urls of link and script tags, which get
+    an integrity attribute when the asset has one.
+    """
+
+    url: str
+    subresource: bool = False
+
+
+class Template:
+
+    def __init__(
+        self,
+        static: List[str],
+        names: List[str | TemplateUrl],
+        dependencies: List[str],
+    ):
+        """
+        Initialize Template.
+
+        Args:
+            static: Static text segments, always one more than names
+            names: Placeholder names or attribute urls filled between consecutive
+                static segments
+            dependencies: Paths of the template file and every partial it includes
+        """
+        self.static = static
+        self.names = names
+        self.dependencies = dependencies
+
+    def iter_segments(
+        self,
+        values: Dict[str, str | Iterable[str]],
+        resolve_url: Callable[[str], str] | None = None,
+    ):
+        """
+        Yield static and filled segments of the page in order. A value may be a string
+        or an iterable of string fragments, placeholders without a value render as
+        empty string. Attribute urls are passed through resolve_url.
+        """
+        yield self.static[0]
+        for name, static in zip(self.names, self.static[1:]):
+            if isinstance(name, TemplateUrl):
+                yield resolve_url(name.url) if resolve_url else name.url
+                if name.subresource and isinstance(resolve_url, UrlResolver):
+                    integrity = resolve_url.integrity(name.url)
+                    if integrity:
+                        # closed by the quote starting the next static segment
+                        yield f'" integrity="{integrity}" crossorigin="anonymous'
+                yield static
+                continue
+            value = values.get(name, "")
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+            yield static
+
+    def render(
+        self,
+        values: Dict[str, str | Iterable[str]],
+        resolve_url: Callable[[str], str] | None = None,
+    ) -> str:
+        return "".join(self.iter_segments(values, resolve_url))
+
+    def write(
+        self,
+        fp: TextIO,
+        values: Dict[str, str | Iterable[str]],
+        resolve_url: Callable[[str], str] | None = None,
+    ):
+        fp.writelines(self.iter_segments(values, resolve_url))
+
+
+def compile_template(path: str, minify: bool = False) -> Template:
+    """
+    Parse template file into static and placeholder segments. Partials included
+    with {{> file }} are resolved relative to the including file and inlined, and
+    root-relative href/src attributes in static text are split out as TemplateUrl.
+    With minify, comments and insignificant whitespace are removed from every file.
+    """
+    static = [""]
+    names = []
+    dependencies = []
+    _compile_into(path, static, names, dependencies, (), minify)
+    return Template(*_split_urls(static, names), dependencies)
+
+
+def _split_urls(static: List[str], names: List[str]):
+    split_static = [""]
+    split_names: List[str | TemplateUrl] = []
+    for i, text in enumerate(static):
+        position = 0
+        for match in URL_ATTRIBUTE_REGEX.finditer(text):
+            split_static[-1] += text[position : match.start(1)]
+            subresource = SUBRESOURCE_TAG_REGEX.search(text, 0, match.start())
+            split_names.append(TemplateUrl(match[1], subresource is not None))
+            split_static.append("")
+            position = match.end(1)
+        split_static[-1] += text[position:]
+        if i < len(names):
+            split_names.append(names[i])
+            split_static.append("")
+    return split_static, split_names
+
+
+def _compile_into(
+    path: str,
+    static: List[str],
+    names: List[str],
+    dependencies: List[str],
+    including: tuple,
+    minify: bool,
+):
+    if path in including:
+        raise TemplateError(f"circular include of {path}")
+    dependencies.append(path)
+    with open(path) as f:
+        text = f.read()
+    if minify:
+        text = minify_html(text)
+    position = 0
+    for match in PLACEHOLDER_REGEX.finditer(text):
+        static[-1] += text[position : match.start()]
+        position = match.end()
+        is_partial, name = match.groups()
+        if is_partial:
+            partial_path = os.path.join(os.path.dirname(path), name)
+            _compile_into(
+                partial_path, static, names, dependencies, including + (path,), minify
+            )
+        else:
+            names.append(name)
+            static.append("")
+    static[-1] += text[position:]
+
+
+@functools.cache
+def load_template(path: str, minify: bool = False) -> Template:
+    """
+    Compile template once per process and reuse it for every page.
+    """
+    return compile_template(path, minify)
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from benchmark import (
+    ADVERSARIAL_KINDS,
+    PAGE_KINDS,
+    adversarial_page,
+    compare,
+    synthetic_corpus,
+    time_stages,
+    write_corpus,
+)
+from converter import markdown_to_html_node
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_synthetic_corpus_deterministic(self):
+        self.assertEqual(
+            list(synthetic_corpus(5, seed=1)), list(synthetic_corpus(5, seed=1))
+        )
+        self.assertNotEqual(
+            list(synthetic_corpus(5, seed=1)), list(synthetic_corpus(5, seed=2))
+        )
+
+    def test_synthetic_corpus_parses(self):
+        for rel_path, markdown in synthetic_corpus(len(PAGE_KINDS)):
+            self.assertTrue(
+                markdown_to_html_node(markdown).to_html().startswith("<div>")
+            )
+
+    def test_adversarial_page(self):
+        for kind in ADVERSARIAL_KINDS:
+            markdown = adversarial_page(kind, 1000)
+            self.assertTrue(markdown.startswith(f"# {kind}\n\n"))
+            self.assertLess(abs(len(markdown) - 1000), 50)
+        with self.assertRaises(ValueError):
+            adversarial_page("unknown")
+
+    def test_write_corpus(self):
+        with tempfile.TemporaryDirectory() as directory:
+            write_corpus(directory, 3)
+            self.assertTrue(
+                os.path.isfile(os.path.join(directory, "links", "page2", "index.md"))
+            )
+
+    def test_time_stages(self):
+        documents = [markdown for _, markdown in synthetic_corpus(2)]
+        with tempfile.TemporaryDirectory() as directory:
+            timings = time_stages(documents, directory)
+        self.assertEqual(
+            list(timings),
+            [
+                "markdown_to_blocks",
+                "block_to_block_type",
+                "scan_blocks",
+                "text_to_textnodes",
+                "markdown_to_html_node",
+                "to_html",
+                "markdown_to_document",
+                "iter_html",
+                "template",
+                "write",
+            ],
+        )
+
+    def test_compare(self):
+        result = {"stages": {"to_html": 2.0, "write": 1.0}}
+        baseline = {"stages": {"to_html": 1.0}}
+        self.assertEqual(compare(result, baseline), {"to_html": 2.0})
@@ -0,0 +1,64 @@
+import os
+
+from blockcache import BlockCache
+from blocks import BlockType
+from converter import markdown_to_document, markdown_to_html_node
+from test_support import TempDirTestCase
+
+
+class TestBlockCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tmp.name, ".build", "blocks.cache")
+
+    def test_key_depends_on_type_and_lines(self):
+        key = BlockCache.key(BlockType.PARAGRAPH, ["a", "b"])
+        self.assertEqual(key, BlockCache.key(BlockType.PARAGRAPH, ["a", "b"]))
+        self.assertNotEqual(key, BlockCache.key(BlockType.QUOTE, ["a", "b"]))
+        self.assertNotEqual(key, BlockCache.key(BlockType.PARAGRAPH, ["a b"]))
+
+    def test_get_counts_hits_and_misses(self):
+        cache = BlockCache(self.path)
+        self.assertIsNone(cache.get("k"))
+        cache.put("k", "<p>k</p>")
+        self.assertEqual(cache.get("k"), "<p>k</p>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = BlockCache(self.path, max_bytes=10)
+        cache.put("a", "aaaa")
+        cache.put("b", "bbbb")
+        cache.get("a")
+        cache.put("c", "cccc")
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual(cache.size, 8)
+
+    def test_save_load_roundtrip(self):
+        cache = BlockCache(self.path)
+        cache.put("a", "<p>a</p>")
+        cache.put("b", "<p>b</p>")
+        cache.get("a")
+        cache.save()
+        loaded = BlockCache.load(self.path)
+        self.assertEqual(list(loaded.entries.items()), list(cache.entries.items()))
+        self.assertEqual(loaded.take_added(), [])
+
+    def test_load_corrupt(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "wb") as f:
+            f.write(b"not a cache")
+        self.assertEqual(len(BlockCache.load(self.path).entries), 0)
+
+    def test_cached_document_matches(self):
+        markdown = "# Title\n\nsome **bold** text\n\n- a\n- b\n\n```\ncode\n```"
+        cache = BlockCache(self.path)
+        expected = markdown_to_html_node(markdown).to_html()
+        self.assertEqual(markdown_to_document(markdown, cache).to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (0, 4))
+        self.assertEqual(len(cache.take_added()), 4)
+        edited = markdown.replace("bold", "strong")
+        self.assertEqual(
+            markdown_to_document(edited, cache).to_html(),
+            markdown_to_html_node(edited).to_html(),
+        )
+        self.assertEqual((cache.hits, cache.misses), (3, 5))
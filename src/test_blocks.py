@@ -1,4 +1,6 @@
-from blocks import BlockType, block_to_block_type
+import io
+from blocks import BlockType, block_to_block_type, scan_blocks
+from splitter import markdown_to_blocks
 from unittest import TestCase
 
 
@@ -40,3 +42,58 @@ This is code block.
 more stuff
 even more here"""
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
+
+    def test_scan_blocks(self):
+        md = """
+# Heading
+
+  some paragraph
+text  
+
+- thing 1
+- thing 2
+
+
+
+1. thing 1
+2. thing 2
+
+> a
+> quote
+
+```
+code
+```
+"""
+        self.assertEqual(
+            list(scan_blocks(md)),
+            [
+                (BlockType.HEADING, ["# Heading"]),
+                (BlockType.PARAGRAPH, ["some paragraph", "text"]),
+                (BlockType.UNORDERED_LIST, ["- thing 1", "- thing 2"]),
+                (BlockType.ORDERED_LIST, ["1. thing 1", "2. thing 2"]),
+                (BlockType.QUOTE, ["> a", "> quote"]),
+                (BlockType.CODE, ["```", "code", "```"]),
+            ],
+        )
+
+    def test_scan_blocks_matches_block_to_block_type(self):
+        md = "- a\n- b\n3. c\n\n1. a\n3. b\n\n>a\nb\n\n#nothing\n\n   \n\n```\nx"
+        self.assertEqual(
+            list(scan_blocks(md)),
+            [
+                (block_to_block_type(block), block.split("\n"))
+                for block in markdown_to_blocks(md)
+                if block
+            ],
+        )
+
+    def test_scan_blocks_file(self):
+        source = io.StringIO("# Title\n\n- a\n- b\n")
+        self.assertEqual(
+            list(scan_blocks(source)),
+            [
+                (BlockType.HEADING, ["# Title"]),
+                (BlockType.UNORDERED_LIST, ["- a", "- b"]),
+            ],
+        )
@@ -0,0 +1,71 @@
+import gzip
+import io
+import os
+from contextlib import redirect_stdout
+
+from compress import CompressCache, compress_outputs
+from test_support import TempDirTestCase, write_file
+
+
+class TestCompressOutputs(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.cache = CompressCache(os.path.join(self.tmp.name, "gzip"))
+        self.write("index.html", "<html>" + "text " * 100 + "</html>")
+        self.write("blog/index.css", "body {}")
+        self.write("images/a.png", "png")
+
+    def write(self, rel_path: str, text: str):
+        write_file(os.path.join(self.dest, rel_path), text)
+
+    def compress(self, level: int = 9) -> tuple[int, int]:
+        with redirect_stdout(io.StringIO()):
+            return compress_outputs(self.dest, self.cache, level, workers=2)
+
+    def test_writes_gz_siblings_of_text_outputs(self):
+        self.assertEqual(self.compress(), (2, 0))
+        with gzip.open(os.path.join(self.dest, "index.html.gz"), "rt") as f:
+            self.assertTrue(f.read().startswith("<html>text"))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "blog/index.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images/a.png.gz")))
+
+    def test_reuses_unchanged_outputs(self):
+        self.compress()
+        self.write("index.html", "<html>changed</html>")
+        self.assertEqual(self.compress(), (1, 1))
+        with gzip.open(os.path.join(self.dest, "index.html.gz"), "rt") as f:
+            self.assertEqual(f.read(), "<html>changed</html>")
+
+    def test_reuses_after_output_is_wiped(self):
+        self.compress()
+        os.remove(os.path.join(self.dest, "index.html.gz"))
+        self.assertEqual(self.compress(), (0, 2))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html.gz")))
+
+    def test_level_is_part_of_cache_key(self):
+        self.compress(9)
+        self.assertEqual(self.compress(1), (2, 0))
+
+    def test_removes_stale_siblings(self):
+        self.compress()
+        os.remove(os.path.join(self.dest, "blog/index.css"))
+        self.compress()
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog")))
+
+    def test_reproducible(self):
+        self.compress()
+        with open(os.path.join(self.dest, "index.html.gz"), "rb") as f:
+            first = f.read()
+        self.cache.clear()
+        self.compress()
+        with open(os.path.join(self.dest, "index.html.gz"), "rb") as f:
+            self.assertEqual(f.read(), first)
+
+    def test_prune_removes_unused_entries(self):
+        self.compress()
+        self.write("index.html", "<html>changed</html>")
+        self.cache = CompressCache(self.cache.directory)
+        self.compress()
+        self.assertEqual(self.cache.prune(), 1)
+        self.assertEqual(len(os.listdir(self.cache.directory)), 2)
@@ -1,3 +1,5 @@
+import io
+import os
 from converter import markdown_to_html_node
 from unittest import TestCase
 
@@ -100,3 +102,12 @@ the **same** even with inline stuff
             html,
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
+
+    def test_file_object(self):
+        md = "# Title\n\nsome _text_\n"
+        with open(os.devnull) as devnull:
+            self.assertEqual(markdown_to_html_node(devnull).children, [])
+        self.assertEqual(
+            markdown_to_html_node(io.StringIO(md)).to_html(),
+            markdown_to_html_node(md).to_html(),
+        )
@@ -0,0 +1,110 @@
+import io
+import os
+from contextlib import redirect_stdout
+
+from copyfiles import fingerprint_files, is_synced, list_files, sync_files
+from test_support import TempDirTestCase, write_file
+from urls import AssetManifest
+
+
+class TestSyncFiles(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.write(self.src, "index.css", "body {}")
+        self.write(self.src, "images/a.png", "png")
+        self.write(self.dest, "index.html", "<html></html>")
+
+    def write(self, root: str, rel_path: str, text: str):
+        write_file(os.path.join(root, rel_path), text)
+
+    def sync(self, *args, **kwargs) -> tuple[list[str], str]:
+        out = io.StringIO()
+        with redirect_stdout(out):
+            synced = sync_files(self.src, self.dest, *args, **kwargs)
+        return synced, out.getvalue()
+
+    def test_list_files(self):
+        self.assertEqual(
+            list_files(self.src), [os.path.join("images", "a.png"), "index.css"]
+        )
+
+    def test_sync_keeps_other_files(self):
+        synced, _ = self.sync()
+        self.assertEqual(synced, list_files(self.src))
+        self.assertEqual(set(list_files(self.dest)), set(synced) | {"index.html"})
+
+    def test_sync_skips_unchanged(self):
+        synced, _ = self.sync()
+        _, log = self.sync(synced)
+        self.assertNotIn("Copying file", log)
+
+    def test_sync_changed_file(self):
+        synced, _ = self.sync()
+        self.write(self.src, "index.css", "body { margin: 0 }")
+        _, log = self.sync(synced)
+        self.assertEqual(log.count("Copying file"), 1)
+        with open(os.path.join(self.dest, "index.css")) as f:
+            self.assertEqual(f.read(), "body { margin: 0 }")
+
+    def test_sync_removes_stale(self):
+        synced, _ = self.sync()
+        os.remove(os.path.join(self.src, "images", "a.png"))
+        self.sync(synced)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_sync_hardlink(self):
+        self.sync(link="hardlink")
+        self.assertTrue(
+            os.path.samefile(
+                os.path.join(self.src, "index.css"),
+                os.path.join(self.dest, "index.css"),
+            )
+        )
+
+    def test_sync_reflink(self):
+        self.sync(link="reflink")
+        src_path = os.path.join(self.src, "index.css")
+        self.assertTrue(is_synced(src_path, os.path.join(self.dest, "index.css"), True))
+
+    def test_is_synced_checksum(self):
+        self.sync()
+        dest_path = os.path.join(self.dest, "index.css")
+        stat = os.stat(dest_path)
+        self.write(self.dest, "index.css", "body ()")
+        os.utime(dest_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        src_path = os.path.join(self.src, "index.css")
+        self.assertTrue(is_synced(src_path, dest_path))
+        self.assertFalse(is_synced(src_path, dest_path, checksum=True))
+
+    def test_fingerprint_files(self):
+        self.write(self.src, "robots.txt", "")
+        self.sync()
+        manifest = os.path.join(self.tmp.name, "assets.json")
+        with redirect_stdout(io.StringIO()):
+            assets = fingerprint_files(
+                self.src, self.dest, AssetManifest(manifest), sri=True
+            )
+        css = assets.assets["/index.css"]
+        self.assertRegex(css["url"], r"^/index\.[0-9a-f]{12}\.css$")
+        self.assertTrue(css["integrity"].startswith("sha384-"))
+        self.assertEqual(sorted(assets.assets), ["/images/a.png", "/index.css"])
+        with open(os.path.join(self.dest, css["url"][1:])) as f:
+            self.assertEqual(f.read(), "body {}")
+        self.write(self.src, "index.css", "body { color: red }")
+        self.sync()
+        with redirect_stdout(io.StringIO()):
+            changed = fingerprint_files(self.src, self.dest, assets)
+        self.assertNotEqual(changed.assets["/index.css"]["url"], css["url"])
+        self.assertNotIn("integrity", changed.assets["/index.css"])
+        self.assertEqual(
+            changed.assets["/images/a.png"]["url"],
+            assets.assets["/images/a.png"]["url"],
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.dest, css["url"][1:])))
+
+    def test_invalid_link_mode(self):
+        with self.assertRaises(ValueError):
+            sync_files(self.src, self.dest, link="symlink")
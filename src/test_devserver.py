@@ -0,0 +1,43 @@
+import io
+import os
+import urllib.error
+import urllib.request
+from contextlib import redirect_stderr, redirect_stdout
+
+from devserver import LIVE_RELOAD_PATH, LiveReload, start_server
+from test_support import TempDirTestCase, write_file
+
+
+class TestDevServer(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        write_file(
+            os.path.join(self.tmp.name, "index.html"), "<html><body>hi</body></html>"
+        )
+        # request logs of the server thread
+        quiet = redirect_stderr(io.StringIO())
+        quiet.__enter__()
+        self.addCleanup(quiet.__exit__, None, None, None)
+        with redirect_stdout(io.StringIO()):
+            self.server = start_server(self.tmp.name, 0, LiveReload())
+        self.url = f"http://localhost:{self.server.server_address[1]}/"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_etag_not_modified(self):
+        with urllib.request.urlopen(self.url) as response:
+            etag = response.headers["ETag"]
+            body = response.read().decode()
+        self.assertIn(LIVE_RELOAD_PATH, body)
+        request = urllib.request.Request(self.url, headers={"If-None-Match": etag})
+        with self.assertRaises(urllib.error.HTTPError) as cm:
+            urllib.request.urlopen(request)
+        self.assertEqual(cm.exception.code, 304)
+
+    def test_live_reload_wait(self):
+        live_reload = LiveReload()
+        self.assertEqual(live_reload.wait(0, timeout=0), 0)
+        live_reload.notify()
+        self.assertEqual(live_reload.wait(0, timeout=0), 1)
@@ -0,0 +1,109 @@
+import io
+import unittest
+
+from converter import markdown_to_document, markdown_to_html_node
+from document import Document
+from leafnode import LeafNode
+from parentnode import ParentNode
+from urls import AssetManifest, UrlResolver
+
+
+MARKDOWN = """
+# Title
+
+Some **bold** and a [link](https://boot.dev) with ![img](/a.png)
+
+- one
+- two
+
+```
+code
+```
+"""
+
+
+class TestDocument(unittest.TestCase):
+    def test_matches_node_html(self):
+        self.assertEqual(
+            markdown_to_document(MARKDOWN).to_html(),
+            markdown_to_html_node(MARKDOWN).to_html(),
+        )
+
+    def test_from_node(self):
+        node = ParentNode(
+            "div",
+            [
+                ParentNode("p", [LeafNode(None, "text"), LeafNode("b", "bold")]),
+                LeafNode("a", "link", {"href": "/x"}),
+            ],
+        )
+        document = Document.from_node(node)
+        self.assertEqual(len(document), 5)
+        self.assertEqual(document.to_html(), node.to_html())
+
+    def test_to_node(self):
+        node = markdown_to_html_node(MARKDOWN)
+        view = markdown_to_document(MARKDOWN).to_node()
+        self.assertIsInstance(view, ParentNode)
+        self.assertEqual(view.to_html(), node.to_html())
+        self.assertEqual(
+            view.children[1].children[3].props, {"href": "https://boot.dev"}
+        )
+
+    def test_write_html(self):
+        out = io.StringIO()
+        markdown_to_document(MARKDOWN).write_html(out)
+        self.assertEqual(out.getvalue(), markdown_to_html_node(MARKDOWN).to_html())
+
+    def test_interned_tags(self):
+        document = markdown_to_document("a\n\nb\n\nc")
+        self.assertIs(document.tags[1], document.tags[3])
+
+    def test_parent_without_children(self):
+        with self.assertRaises(ValueError):
+            Document.from_node(ParentNode("div", []))
+
+    def test_leaf_without_value(self):
+        with self.assertRaises(ValueError):
+            Document.from_node(LeafNode("p", None))
+
+    def test_deep_nesting(self):
+        node = LeafNode("b", "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        self.assertEqual(Document.from_node(node).to_html(), node.to_html())
+
+    def test_resolve_urls(self):
+        document = markdown_to_document(
+            '[a](/a) ![i](/i.png)\n\n```\n<a href="/code">\n```'
+        )
+        self.assertEqual(
+            document.to_html(UrlResolver("/site/")),
+            '<div><p><a href="/site/a">a</a> <img src="/site/i.png" alt="i"></img></p>'
+            '<pre><code><a href="/code">\n</code></pre></div>',
+        )
+
+    def test_image_attributes(self):
+        document = markdown_to_document(
+            "![a](/a.png) ![b](/b.png) ![c](https://x/c.png)"
+        )
+        assets = AssetManifest("assets.json", {"/a.png": {"width": 4, "height": 3}})
+        self.assertEqual(
+            document.to_html(UrlResolver("/site/", assets=assets)),
+            '<div><p><img src="/site/a.png" alt="a" width="4" height="3" '
+            'loading="lazy" decoding="async"></img> <img src="/site/b.png" alt="b">'
+            '</img> <img src="https://x/c.png" alt="c"></img></p></div>',
+        )
+
+    def test_minify(self):
+        document = markdown_to_document("a  _b\n c_  d\n\n```\nx  =  1\n  y\n```")
+        self.assertEqual(
+            document.to_html(minify=True),
+            "<div><p>a <i>b c</i> d</p><pre><code>x  =  1\n  y\n</code></pre></div>",
+        )
+
+    def test_bytes_roundtrip(self):
+        document = markdown_to_document("# a\n\n- [b](/b)\n- c")
+        loaded = Document.from_bytes(document.to_bytes())
+        self.assertEqual(loaded.to_html(), document.to_html())
+        self.assertEqual(list(loaded.ends), list(document.ends))
@@ -0,0 +1,56 @@
+import io
+import unittest
+
+from frontmatter import read_front_matter, split_front_matter, template_values
+from splitter import InvalidMarkdownError
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_no_front_matter(self):
+        markdown = "# Title\n\n---\n"
+        self.assertEqual(split_front_matter(markdown), ({}, markdown))
+
+    def test_fields(self):
+        meta, body = split_front_matter(
+            "---\ntitle: A: B\ndate: 2024-05-01\ntags: [a, b,]\n# note\n\nsummary: Short\n---\n# Heading"
+        )
+        self.assertEqual(
+            meta,
+            {
+                "title": "A: B",
+                "date": "2024-05-01",
+                "tags": ["a", "b"],
+                "summary": "Short",
+            },
+        )
+        self.assertEqual(body, "# Heading")
+
+    def test_unclosed(self):
+        with self.assertRaises(InvalidMarkdownError):
+            split_front_matter("---\ntitle: A\n# Heading")
+        with self.assertRaises(InvalidMarkdownError):
+            read_front_matter(io.StringIO("---\ntitle: A\n# Heading"))
+
+    def test_read_front_matter(self):
+        f = io.StringIO("---\ntitle: A\ntags: a, b\n---\n# Heading\n\ntext")
+        self.assertEqual(read_front_matter(f), {"title": "A", "tags": ["a", "b"]})
+        self.assertEqual(f.read(), "# Heading\n\ntext")
+
+    def test_read_no_front_matter(self):
+        f = io.StringIO("# Title\n\n---\n")
+        self.assertEqual(read_front_matter(f), {})
+        self.assertEqual(f.read(), "# Title\n\n---\n")
+
+    def test_invalid_line(self):
+        with self.assertRaises(InvalidMarkdownError):
+            split_front_matter("---\njust text\n---\n")
+
+    def test_invalid_date(self):
+        with self.assertRaises(InvalidMarkdownError):
+            split_front_matter("---\ndate: yesterday\n---\n")
+
+    def test_template_values(self):
+        self.assertEqual(
+            template_values({"title": "A", "tags": ["a", "b"]}),
+            {"Title": "A", "Tags": "a, b"},
+        )
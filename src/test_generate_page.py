@@ -0,0 +1,338 @@
+import io
+import os
+import random
+import tracemalloc
+from contextlib import redirect_stdout
+
+from blockcache import BlockCache
+from benchmark import PAGE_KINDS, synthetic_page
+from generate_page import (
+    collect_pages,
+    generate_page_incremental,
+    generate_page_recursive,
+    generate_pages,
+    render_page,
+    stream_page,
+)
+from manifest import BuildManifest
+from parsecache import ParseCache
+from siteindex import SiteIndex
+from stats import STAGES, BuildReport
+from test_support import ContentTestCase
+from urls import UrlResolver
+
+
+class TestGeneratePage(ContentTestCase):
+    def test_collect_pages(self):
+        self.write("index.md", "# Home")
+        self.write("blog/post/index.md", "# Post")
+        self.write("packages.txt", "")
+        self.assertEqual(
+            collect_pages(self.content, self.dest),
+            [
+                (
+                    os.path.join(self.content, "blog", "post", "index.md"),
+                    os.path.join(self.dest, "blog", "post", "index.html"),
+                ),
+                (
+                    os.path.join(self.content, "index.md"),
+                    os.path.join(self.dest, "index.html"),
+                ),
+            ],
+        )
+
+    def test_generate_pages_parallel(self):
+        for i in range(4):
+            self.write(f"page{i}.md", f"# Page {i}\n\ntext {i}")
+        pages = collect_pages(self.content, self.dest)
+        out = io.StringIO()
+        with redirect_stdout(out):
+            errors = generate_pages(pages, self.template, "/", jobs=2)
+        self.assertEqual(errors, {})
+        self.assertEqual(
+            [line.split()[3] for line in out.getvalue().splitlines()],
+            [from_path for from_path, _ in pages],
+        )
+        with open(os.path.join(self.dest, "page2.html")) as f:
+            self.assertEqual(
+                f.read(),
+                "<title>Page 2</title><main><div><h1>Page 2</h1><p>text 2</p></div></main>",
+            )
+
+    def test_generate_pages_reports_errors(self):
+        good = self.write("good.md", "# Good")
+        bad = self.write("bad.md", "no heading")
+        pages = collect_pages(self.content, self.dest)
+        with redirect_stdout(io.StringIO()):
+            errors = generate_pages(pages, self.template, "/", jobs=2)
+        self.assertEqual(list(errors), [bad])
+        self.assertNotIn(good, errors)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "good.html")))
+
+    def test_generate_pages_report(self):
+        self.write("index.md", "# Home\n\n- a\n- b")
+        pages = collect_pages(self.content, self.dest)
+        report = BuildReport()
+        with redirect_stdout(io.StringIO()):
+            generate_pages(pages, self.template, "/", report=report)
+        self.assertEqual(len(report.pages), 1)
+        self.assertEqual(list(report.pages[0].seconds), list(STAGES[:-1]))
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertEqual(
+                f.read(),
+                "<title>Home</title><main><div><h1>Home</h1><ul><li>a</li><li>b</li></ul></div></main>",
+            )
+
+    def test_stream_page(self):
+        rng = random.Random(0)
+        front_matter = "---\ntitle: Streamed\ntags: a, b\n---\n"
+        cache = BlockCache(os.path.join(self.tmp.name, "blocks.cache"))
+        for kind in PAGE_KINDS:
+            source = self.write(
+                f"{kind}.md",
+                front_matter * (kind == "prose") + synthetic_page(rng, kind),
+            )
+            for block_cache, minify in ((None, False), (None, True), (cache, True)):
+                with self.subTest(kind=kind, block_cache=block_cache, minify=minify):
+                    resolve_url = UrlResolver("/site/")
+                    rendered = os.path.join(self.dest, "rendered.html")
+                    streamed = os.path.join(self.dest, "streamed.html")
+                    meta = render_page(
+                        source,
+                        self.template,
+                        rendered,
+                        "/site/",
+                        block_cache=block_cache,
+                        resolve_url=resolve_url,
+                        minify=minify,
+                    )
+                    self.assertEqual(
+                        stream_page(
+                            source,
+                            self.template,
+                            streamed,
+                            resolve_url,
+                            block_cache,
+                            minify,
+                        ),
+                        meta,
+                    )
+                    with open(rendered) as a, open(streamed) as b:
+                        self.assertEqual(a.read(), b.read())
+
+    def test_generate_pages_memory_budget(self):
+        self.write("small.md", "# Small")
+        self.write("large.md", "# Large\n\n" + "text " * 2000)
+        pages = collect_pages(self.content, self.dest)
+        report = BuildReport(memory_budget=50_000)
+        out = io.StringIO()
+        with redirect_stdout(out):
+            generate_pages(pages, self.template, "/", report=report)
+        self.assertFalse(tracemalloc.is_tracing())
+        by_source = {os.path.basename(stats.source): stats for stats in report.pages}
+        self.assertTrue(by_source["large.md"].streamed)
+        self.assertEqual(list(by_source["large.md"].seconds), ["stream"])
+        self.assertFalse(by_source["small.md"].streamed)
+        self.assertGreater(by_source["small.md"].peak, 0)
+        with open(os.path.join(self.dest, "large.html")) as f:
+            self.assertTrue(f.read().startswith("<title>Large</title><main><div><h1>"))
+
+        report = BuildReport(memory_budget=1)
+        with redirect_stdout(out):
+            generate_pages(pages, self.template, "/", report=report)
+        self.assertEqual(len(report.over_budget()), 2)
+        self.assertIn("over the budget of 0.0KB", out.getvalue())
+
+    def test_generate_pages_block_cache(self):
+        for i in range(4):
+            self.write(f"page{i}.md", f"# Page {i}\n\nshared text")
+        pages = collect_pages(self.content, self.dest)
+        cache = BlockCache(os.path.join(self.tmp.name, "blocks.cache"))
+        out = io.StringIO()
+        with redirect_stdout(out):
+            errors = generate_pages(
+                pages, self.template, "/", jobs=2, block_cache=cache
+            )
+        self.assertEqual(errors, {})
+        self.assertIn("Block cache:", out.getvalue())
+        # headings differ, the paragraph is shared by all pages
+        self.assertEqual(len(cache.entries), 5)
+        with open(os.path.join(self.dest, "page2.html")) as f:
+            self.assertEqual(
+                f.read(),
+                "<title>Page 2</title><main><div><h1>Page 2</h1><p>shared text</p></div></main>",
+            )
+
+    def test_generate_pages_front_matter(self):
+        source = self.write(
+            "blog/post.md",
+            "---\ntitle: Custom\ndate: 2024-05-01\ntags: a, b\n---\n# Heading",
+        )
+        pages = collect_pages(self.content, self.dest)
+        site_index = SiteIndex(os.path.join(self.tmp.name, "site.json"))
+        with redirect_stdout(io.StringIO()):
+            errors = generate_pages(pages, self.template, "/", site_index=site_index)
+        self.assertEqual(errors, {})
+        self.assertEqual(
+            site_index.pages[source],
+            {
+                "dest": os.path.join(self.dest, "blog", "post.html"),
+                "title": "Custom",
+                "date": "2024-05-01",
+                "tags": ["a", "b"],
+            },
+        )
+        with open(os.path.join(self.dest, "blog", "post.html")) as f:
+            self.assertEqual(
+                f.read(),
+                "<title>Custom</title><main><div><h1>Heading</h1></div></main>",
+            )
+
+    def test_generate_pages_resolves_urls(self):
+        with open(self.template, "w") as f:
+            f.write('<link href="/index.css" />{{ Content }}')
+        self.write("blog/post.md", '# [Home](/)\n\n```\nhref="/x"\n```')
+        pages = collect_pages(self.content, self.dest)
+        with redirect_stdout(io.StringIO()):
+            generate_pages(pages, self.template, "/site/")
+        with open(os.path.join(self.dest, "blog", "post.html")) as f:
+            self.assertEqual(
+                f.read(),
+                '<link href="/site/index.css" /><div><h1><a href="/site/">Home</a></h1>'
+                '<pre><code>href="/x"\n</code></pre></div>',
+            )
+        with redirect_stdout(io.StringIO()):
+            generate_pages(pages, self.template, "/site/", relative_to=self.dest)
+        with open(os.path.join(self.dest, "blog", "post.html")) as f:
+            self.assertEqual(
+                f.read(),
+                '<link href="../index.css" /><div><h1><a href="../">Home</a></h1>'
+                '<pre><code>href="/x"\n</code></pre></div>',
+            )
+
+    def test_generate_pages_parse_cache(self):
+        self.write("index.md", "# Home\n\n[link](/a)")
+        pages = collect_pages(self.content, self.dest)
+        cache = ParseCache(os.path.join(self.tmp.name, "parse"))
+        out = io.StringIO()
+        with redirect_stdout(out):
+            generate_pages(pages, self.template, "/", parse_cache=cache)
+            generate_pages(pages, self.template, "/site/", jobs=2, parse_cache=cache)
+        self.assertIn("Parse cache: 0 hits, 1 misses", out.getvalue())
+        self.assertIn("Parse cache: 1 hits, 0 misses", out.getvalue())
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertEqual(
+                f.read(),
+                '<title>Home</title><main><div><h1>Home</h1><p><a href="/site/a">link'
+                "</a></p></div></main>",
+            )
+
+    def test_generate_pages_minify(self):
+        with open(self.template, "w") as f:
+            f.write(
+                "<html>\n  <!-- page -->\n  <main> {{ Content }} </main>\n</html>\n"
+            )
+        self.write("index.md", "# Home\n\nsome   text\n\n```\na   b\n```")
+        pages = collect_pages(self.content, self.dest)
+        cache = BlockCache(os.path.join(self.tmp.name, "blocks.cache"))
+        for kwargs in ({}, {"block_cache": cache}, {"io_threads": 2}):
+            with redirect_stdout(io.StringIO()):
+                generate_pages(pages, self.template, "/", minify=True, **kwargs)
+            with open(os.path.join(self.dest, "index.html")) as f:
+                self.assertEqual(
+                    f.read(),
+                    "<html><main><div><h1>Home</h1><p>some text</p>"
+                    "<pre><code>a   b\n</code></pre></div></main></html>",
+                )
+
+    def test_generate_pages_pipeline(self):
+        for i in range(6):
+            self.write(f"page{i}.md", f"# Page {i}\n\ntext {i}")
+        bad = self.write("bad.md", "no heading")
+        pages = collect_pages(self.content, self.dest)
+        missing = os.path.join(self.content, "missing.md")
+        pages.append((missing, os.path.join(self.dest, "missing.html")))
+        for jobs in (1, 2):
+            out = io.StringIO()
+            with redirect_stdout(out):
+                errors = generate_pages(
+                    pages, self.template, "/", jobs=jobs, io_threads=2
+                )
+            self.assertEqual(list(errors), [bad, missing])
+            self.assertTrue(errors[missing].startswith("FileNotFoundError"))
+            self.assertEqual(
+                [
+                    line.split()[3]
+                    for line in out.getvalue().splitlines()
+                    if line.startswith("Generating")
+                ],
+                [from_path for from_path, _ in pages],
+            )
+            with open(os.path.join(self.dest, "page5.html")) as f:
+                self.assertEqual(
+                    f.read(),
+                    "<title>Page 5</title><main><div><h1>Page 5</h1><p>text 5</p></div></main>",
+                )
+
+    def build_incremental(self, basepath: str = "/", changed=None) -> list[str]:
+        """
+        Run an incremental build and return the sources it regenerated.
+        """
+        out = io.StringIO()
+        with redirect_stdout(out):
+            generate_page_incremental(
+                self.content,
+                self.template,
+                self.dest,
+                basepath,
+                manifest_path=self.manifest,
+                changed=changed,
+            )
+        return [
+            line.split()[3]
+            for line in out.getvalue().splitlines()
+            if line.startswith("Generating")
+        ]
+
+    def test_generate_page_incremental(self):
+        home = self.write("index.md", "# Home")
+        post = self.write("blog/post/index.md", "# Post")
+        self.assertEqual(self.build_incremental(), [post, home])
+        self.assertEqual(self.build_incremental(), [])
+        self.write("blog/post/index.md", "# Post\n\nedited")
+        self.assertEqual(self.build_incremental(), [post])
+        with open(os.path.join(self.dest, "blog", "post", "index.html")) as f:
+            self.assertIn("<p>edited</p>", f.read())
+
+    def test_generate_page_incremental_removes_stale(self):
+        self.write("index.md", "# Home")
+        post = self.write("blog/post/index.md", "# Post")
+        self.build_incremental()
+        os.remove(post)
+        self.assertEqual(self.build_incremental(), [])
+        self.assertEqual(os.listdir(self.dest), ["index.html"])
+        self.assertNotIn(post, BuildManifest.load(self.manifest).pages)
+
+    def test_generate_page_incremental_changed(self):
+        home = self.write("index.md", "# Home")
+        post = self.write("post.md", "# Post")
+        self.build_incremental()
+        self.write("index.md", "# Home\n\nedited")
+        self.write("post.md", "# Post\n\nedited")
+        self.assertEqual(self.build_incremental(changed={post}), [post])
+        self.assertEqual(self.build_incremental(), [home])
+        new = self.write("new.md", "# New")
+        self.assertEqual(self.build_incremental(changed=set()), [new])
+
+    def test_generate_page_incremental_after_full_build(self):
+        home = self.write("index.md", "# Home\n\n[post](/post)")
+        post = self.write("post.md", "# Post")
+        self.build_incremental()
+        with redirect_stdout(io.StringIO()):
+            generate_page_recursive(self.content, self.template, self.dest, "/site/")
+        manifest = BuildManifest.load(self.manifest)
+        manifest.invalidate(collect_pages(self.content, self.dest))
+        manifest.save()
+        self.assertEqual(self.build_incremental(), [home, post])
+        with open(os.path.join(self.dest, "index.html")) as f:
+            self.assertIn('<a href="/post">', f.read())
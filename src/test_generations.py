@@ -0,0 +1,125 @@
+import io
+import os
+from contextlib import redirect_stdout
+
+from generations import (
+    link_identical,
+    new_generation,
+    prune_generations,
+    seed_static,
+    swap,
+    unpublish,
+)
+from test_support import TempDirTestCase, write_file
+
+
+class TestGenerations(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.generations = os.path.join(self.tmp.name, ".build", "generations")
+        self.output = os.path.join(self.tmp.name, "docs")
+
+    def read(self, path: str) -> str:
+        with open(path) as f:
+            return f.read()
+
+    def same_file(self, a: str, b: str) -> bool:
+        return os.stat(a).st_ino == os.stat(b).st_ino
+
+    def test_new_generation_unique(self):
+        first = new_generation(self.generations)
+        second = new_generation(self.generations)
+        self.assertNotEqual(first, second)
+        self.assertLess(first, second)
+        self.assertEqual(os.listdir(first), [])
+
+    def test_seed_static(self):
+        static = os.path.join(self.tmp.name, "static")
+        previous = new_generation(self.generations)
+        for name in ("same.css", "changed.css"):
+            write_file(os.path.join(static, name), "body {}")
+            write_file(os.path.join(previous, name), "body {}")
+            os.utime(os.path.join(previous, name), ns=(0, 0))
+        os.utime(os.path.join(static, "same.css"), ns=(0, 0))
+        generation = new_generation(self.generations)
+        self.assertEqual(seed_static(static, generation, previous, False), 1)
+        self.assertEqual(os.listdir(generation), ["same.css"])
+        self.assertTrue(
+            self.same_file(
+                os.path.join(generation, "same.css"), os.path.join(previous, "same.css")
+            )
+        )
+
+    def test_link_identical(self):
+        previous = new_generation(self.generations)
+        generation = new_generation(self.generations)
+        for root, text in ((previous, "old"), (generation, "new")):
+            write_file(os.path.join(root, "a", "same.html"), "same")
+            write_file(os.path.join(root, "changed.html"), text)
+        write_file(os.path.join(generation, "added.html"), "added")
+        self.assertEqual(link_identical(generation, previous), 1)
+        self.assertTrue(
+            self.same_file(
+                os.path.join(generation, "a", "same.html"),
+                os.path.join(previous, "a", "same.html"),
+            )
+        )
+        self.assertEqual(self.read(os.path.join(generation, "changed.html")), "new")
+        self.assertEqual(link_identical(generation, None), 0)
+
+    def test_swap_symlink(self):
+        write_file(os.path.join(self.output, "index.html"), "plain")
+        generation = new_generation(self.generations)
+        write_file(os.path.join(generation, "index.html"), "first")
+        swap(self.output, generation)
+        self.assertTrue(os.path.islink(self.output))
+        self.assertEqual(self.read(os.path.join(self.output, "index.html")), "first")
+        # the plain output directory was kept as a generation
+        self.assertEqual(len(os.listdir(self.generations)), 3)
+        generation = new_generation(self.generations)
+        write_file(os.path.join(generation, "index.html"), "second")
+        swap(self.output, generation)
+        self.assertEqual(self.read(os.path.join(self.output, "index.html")), "second")
+
+    def test_swap_rename(self):
+        first = new_generation(self.generations)
+        write_file(os.path.join(first, "index.html"), "first")
+        swap(self.output, first, "rename")
+        self.assertFalse(os.path.islink(self.output))
+        self.assertFalse(os.path.exists(first))
+        second = new_generation(self.generations)
+        write_file(os.path.join(second, "index.html"), "second")
+        swap(self.output, second, "rename")
+        self.assertEqual(self.read(os.path.join(self.output, "index.html")), "second")
+        # previous output moved back under its generation name
+        self.assertEqual(self.read(os.path.join(first, "index.html")), "first")
+
+    def test_swap_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            swap(self.output, new_generation(self.generations), "copy")
+
+    def test_prune_keeps_published(self):
+        generations = [new_generation(self.generations) for _ in range(4)]
+        swap(self.output, generations[0])
+        with redirect_stdout(io.StringIO()):
+            removed = prune_generations(self.generations, 1, self.output)
+        self.assertEqual(removed, generations[1:3])
+        self.assertTrue(os.path.isdir(generations[0]))
+        self.assertTrue(os.path.isdir(generations[3]))
+
+    def test_unpublish(self):
+        generation = new_generation(self.generations)
+        page = write_file(os.path.join(generation, "index.html"), "page")
+        swap(self.output, generation)
+        unpublish(self.output)
+        self.assertFalse(os.path.islink(self.output))
+        output_page = os.path.join(self.output, "index.html")
+        self.assertEqual(self.read(output_page), "page")
+        self.assertFalse(self.same_file(output_page, page))
+
+    def test_unpublish_removed_generation(self):
+        generation = new_generation(self.generations)
+        swap(self.output, generation)
+        os.rmdir(generation)
+        unpublish(self.output)
+        self.assertFalse(os.path.lexists(self.output))
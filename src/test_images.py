@@ -0,0 +1,111 @@
+import os
+import struct
+
+from images import ImageCache, add_image_sizes, image_size
+from test_support import TempDirTestCase, write_file
+from urls import AssetManifest
+
+
+PNG = (
+    b"\x89PNG\r\n\x1a\n"
+    + struct.pack(">I", 13)
+    + b"IHDR"
+    + struct.pack(">II", 640, 480)
+)
+GIF = b"GIF89a" + struct.pack("<HH", 32, 16) + b"\x00" * 8
+JPEG = (
+    b"\xff\xd8"
+    # APP0 segment
+    + b"\xff\xe0"
+    + struct.pack(">H", 6)
+    + b"JFIF"
+    # start of frame, precision, height, width
+    + b"\xff\xc0"
+    + struct.pack(">HBHH", 8, 8, 300, 400)
+    + b"\x00"
+)
+WEBP_LOSSY = (
+    b"RIFF\x00\x00\x00\x00WEBPVP8 "
+    + b"\x00" * 4
+    + b"\x00\x00\x00\x9d\x01\x2a"
+    + struct.pack("<HH", 100, 50)
+)
+WEBP_LOSSLESS = (
+    b"RIFF\x00\x00\x00\x00WEBPVP8L"
+    + b"\x00" * 4
+    + b"\x2f"
+    + ((99) | (49 << 14)).to_bytes(4, "little")
+    + b"\x00" * 8
+)
+WEBP_EXTENDED = (
+    b"RIFF\x00\x00\x00\x00WEBPVP8X"
+    + b"\x00" * 8
+    + (1999).to_bytes(3, "little")
+    + (999).to_bytes(3, "little")
+)
+
+
+class TestImages(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.tmp.name, "static")
+
+    def write(self, rel_path: str, data: bytes) -> str:
+        return write_file(os.path.join(self.static, rel_path), data)
+
+    def test_image_size(self):
+        for name, data, size in (
+            ("a.png", PNG, (640, 480)),
+            ("a.gif", GIF, (32, 16)),
+            ("a.jpg", JPEG, (400, 300)),
+            ("lossy.webp", WEBP_LOSSY, (100, 50)),
+            ("lossless.webp", WEBP_LOSSLESS, (100, 50)),
+            ("extended.webp", WEBP_EXTENDED, (2000, 1000)),
+        ):
+            with self.subTest(name):
+                self.assertEqual(image_size(self.write(name, data)), size)
+
+    def test_image_size_malformed(self):
+        for name, data in (
+            ("text.png", b"not an image"),
+            ("short.png", PNG[:18]),
+            ("short.webp", WEBP_LOSSLESS[:21]),
+            ("short.jpg", JPEG[:12]),
+            ("empty.gif", b""),
+        ):
+            with self.subTest(name):
+                self.assertIsNone(image_size(self.write(name, data)))
+
+    def test_cache_by_hash(self):
+        cache = ImageCache(os.path.join(self.tmp.name, "images.json"))
+        first = self.write("a.png", PNG)
+        self.assertEqual(cache.size(first), (640, 480))
+        # same contents under another name are not read again
+        copy = self.write("copy.png", PNG)
+        cache.sizes[next(iter(cache.sizes))] = [1, 2]
+        self.assertEqual(cache.size(copy), (1, 2))
+        cache.save()
+        loaded = ImageCache.load(cache.path)
+        self.assertEqual(loaded.size(first), (1, 2))
+        loaded.retain({copy})
+        self.assertEqual(list(loaded.files), [copy])
+
+    def test_add_image_sizes(self):
+        self.write("images/a.png", PNG)
+        self.write("index.css", b"body {}")
+        assets = AssetManifest(
+            "assets.json", {"/images/a.png": {"url": "/images/a.0123.png"}}
+        )
+        cache = ImageCache(os.path.join(self.tmp.name, "images.json"))
+        sized = add_image_sizes(self.static, assets, cache)
+        self.assertEqual(
+            sized.assets,
+            {
+                "/images/a.png": {
+                    "url": "/images/a.0123.png",
+                    "width": 640,
+                    "height": 480,
+                }
+            },
+        )
+        self.assertNotEqual(sized.key, assets.key)
@@ -0,0 +1,153 @@
+import io
+import json
+import os
+from contextlib import redirect_stdout
+
+from ledger import OutputLedger, write_changes, write_output
+from test_support import TempDirTestCase, write_file
+
+
+class TestOutputLedger(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.staging = os.path.join(self.tmp.name, "staging")
+        self.path = os.path.join(self.tmp.name, "outputs.json")
+
+    def write(self, directory: str, rel_path: str, text: str) -> str:
+        return write_file(os.path.join(directory, rel_path), text)
+
+    def test_scan(self):
+        self.write(self.dest, "index.html", "a")
+        self.write(self.dest, "blog/index.html", "b")
+        ledger = OutputLedger(self.path)
+        self.assertEqual(
+            ledger.scan(self.dest),
+            {
+                "added": [os.path.join("blog", "index.html"), "index.html"],
+                "changed": [],
+                "removed": [],
+            },
+        )
+        ledger.save()
+
+        self.write(self.dest, "index.html", "changed")
+        os.remove(os.path.join(self.dest, "blog", "index.html"))
+        self.write(self.dest, "new.html", "c")
+        self.assertEqual(
+            OutputLedger.load(self.path).scan(self.dest),
+            {
+                "added": ["new.html"],
+                "changed": ["index.html"],
+                "removed": [os.path.join("blog", "index.html")],
+            },
+        )
+
+    def test_scan_unchanged_stat_not_hashed(self):
+        path = self.write(self.dest, "index.html", "a")
+        stat = os.stat(path)
+        ledger = OutputLedger(
+            self.path, {"index.html": ["known", stat.st_size, stat.st_mtime_ns]}
+        )
+        self.assertEqual(
+            ledger.scan(self.dest), {"added": [], "changed": [], "removed": []}
+        )
+        self.assertEqual(ledger.files["index.html"][0], "known")
+
+    def test_publish(self):
+        kept = self.write(self.dest, "index.html", "same")
+        self.write(self.dest, "old.html", "gone")
+        self.write(self.dest, "css/site.css", "old")
+        ledger = OutputLedger(self.path)
+        ledger.scan(self.dest)
+        os.utime(kept, ns=(0, 0))
+        ledger.scan(self.dest)
+
+        self.write(self.staging, "index.html", "same")
+        self.write(self.staging, "css/site.css", "new")
+        self.write(self.staging, "blog/index.html", "post")
+        self.assertEqual(
+            ledger.publish(self.staging, self.dest),
+            {
+                "added": [os.path.join("blog", "index.html")],
+                "changed": [os.path.join("css", "site.css")],
+                "removed": ["old.html"],
+            },
+        )
+        self.assertEqual(os.stat(kept).st_mtime_ns, 0)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "old.html")))
+        with open(os.path.join(self.dest, "css", "site.css")) as f:
+            self.assertEqual(f.read(), "new")
+        self.assertTrue(os.path.isfile(os.path.join(self.dest, "blog", "index.html")))
+
+    def test_publish_linked_not_hashed(self):
+        path = self.write(self.dest, "images/a.png", "png")
+        os.makedirs(os.path.join(self.staging, "images"))
+        os.link(path, os.path.join(self.staging, "images", "a.png"))
+        stat = os.stat(path)
+        rel_path = os.path.join("images", "a.png")
+        ledger = OutputLedger(
+            self.path, {rel_path: ["known", stat.st_size, stat.st_mtime_ns]}
+        )
+        self.assertEqual(
+            ledger.publish(self.staging, self.dest),
+            {"added": [], "changed": [], "removed": []},
+        )
+        self.assertEqual(ledger.files[rel_path][0], "known")
+
+    def test_write_changes(self):
+        path = os.path.join(self.tmp.name, "changes.json")
+        changes = {
+            "added": [os.path.join("blog", "index.html")],
+            "changed": [],
+            "removed": [],
+        }
+        with redirect_stdout(io.StringIO()):
+            write_changes(changes, path)
+        with open(path) as f:
+            self.assertEqual(
+                json.load(f),
+                {"added": ["blog/index.html"], "changed": [], "removed": []},
+            )
+
+
+class TestWriteOutput(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tmp.name, "blog", "index.html")
+
+    def test_write_new(self):
+        self.assertTrue(write_output(self.path, iter(["<p>", "a", "</p>"])))
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "<p>a</p>")
+
+    def test_identical_not_written(self):
+        write_output(self.path, "<p>a</p>\n")
+        os.utime(self.path, ns=(0, 0))
+        self.assertFalse(write_output(self.path, iter(["<p>a</p>", "\n"])))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 0)
+        self.assertTrue(write_output(self.path, "<p>b</p>\n"))
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "<p>b</p>\n")
+
+    def test_compared_while_streaming(self):
+        write_output(self.path, "<p>é</p>")
+        for fragments in (
+            ["<p>", "é", "</p>", "<p>b</p>"],
+            ["<p>", "é", "</p>"],
+            ["<p>", "é"],
+            ["<p>", "b", "</p>"],
+            [],
+        ):
+            self.assertTrue(write_output(self.path, iter(fragments)))
+            with open(self.path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), "".join(fragments))
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["index.html"])
+
+    def test_hardlinked_copy_kept(self):
+        write_output(self.path, "<p>a</p>")
+        linked = os.path.join(self.tmp.name, "linked.html")
+        os.link(self.path, linked)
+        self.assertTrue(write_output(self.path, iter(["<p>", "b", "</p>"])))
+        with open(linked) as f:
+            self.assertEqual(f.read(), "<p>a</p>")
@@ -0,0 +1,33 @@
+import unittest
+
+from main import parse_args
+
+
+class TestParseArgs(unittest.TestCase):
+    def test_build_is_default(self):
+        args = parse_args(["-q", "/site/"])
+        self.assertEqual(args.command, "build")
+        self.assertEqual(args.basepath, "/site/")
+        self.assertTrue(args.quiet)
+
+    def test_command_after_options(self):
+        for command in ("build", "serve", "merge"):
+            args = parse_args(["-q", command, "/site/"])
+            self.assertEqual(args.command, command)
+            self.assertEqual(args.basepath, "/site/")
+            self.assertTrue(args.quiet)
+        args = parse_args(["--jobs", "2", "serve"])
+        self.assertEqual((args.command, args.basepath, args.jobs), ("serve", "/", 2))
+
+    def test_option_values_are_not_commands(self):
+        args = parse_args(["--profile", "build", "/site/"])
+        self.assertEqual(args.command, "build")
+        self.assertEqual((args.profile, args.basepath), ("build", "/site/"))
+        args = parse_args(["--stats", "cache"])
+        self.assertEqual((args.command, args.stats), ("build", "cache"))
+        args = parse_args(["--stats=serve", "--jobs", "2", "merge", "/site/"])
+        self.assertEqual((args.command, args.stats), ("merge", "serve"))
+        args = parse_args(["--port", "8080", "--profile", "serve", "serve"])
+        self.assertEqual(
+            (args.command, args.port, args.profile), ("serve", 8080, "serve")
+        )
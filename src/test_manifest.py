@@ -0,0 +1,73 @@
+import os
+
+from manifest import BuildManifest, build_inputs
+from test_support import TempDirTestCase
+
+
+class TestBuildManifest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tmp.name, ".build", "manifest.json")
+        self.dest = os.path.join(self.tmp.name, "index.html")
+
+    def test_load_missing(self):
+        manifest = BuildManifest.load(self.path)
+        self.assertEqual(manifest.pages, {})
+        self.assertEqual(manifest.inputs, {})
+
+    def test_needs_build_unknown_page(self):
+        manifest = BuildManifest(self.path)
+        self.assertTrue(manifest.needs_build("index.md", "abc", self.dest))
+
+    def test_needs_build_recorded_page(self):
+        with open(self.dest, "w") as f:
+            f.write("<html></html>")
+        manifest = BuildManifest(self.path)
+        manifest.record("index.md", "abc", self.dest)
+        self.assertFalse(manifest.needs_build("index.md", "abc", self.dest))
+        self.assertTrue(manifest.needs_build("index.md", "def", self.dest))
+
+    def test_needs_build_missing_output(self):
+        manifest = BuildManifest(self.path)
+        manifest.record("index.md", "abc", self.dest)
+        self.assertTrue(manifest.needs_build("index.md", "abc", self.dest))
+
+    def test_save_load_roundtrip(self):
+        manifest = BuildManifest(self.path, {"basepath": "/"})
+        manifest.record("index.md", "abc", self.dest)
+        manifest.save()
+        loaded = BuildManifest.load(self.path)
+        self.assertEqual(loaded.inputs, {"basepath": "/"})
+        self.assertEqual(loaded.pages, manifest.pages)
+
+    def test_remove_stale(self):
+        manifest = BuildManifest(self.path)
+        manifest.record("a.md", "abc", "a.html")
+        manifest.record("b.md", "def", "b.html")
+        self.assertEqual(manifest.remove_stale({"a.md"}), ["b.html"])
+        self.assertEqual(list(manifest.pages), ["a.md"])
+
+    def test_build_inputs_basepath(self):
+        template = os.path.join(self.tmp.name, "template.html")
+        with open(template, "w") as f:
+            f.write("{{ Content }}")
+        inputs = build_inputs(template, "/")
+        self.assertEqual(inputs, build_inputs(template, "/"))
+        self.assertNotEqual(inputs, build_inputs(template, "/blog/"))
+
+    def test_build_inputs_template_change(self):
+        template = os.path.join(self.tmp.name, "template.html")
+        with open(template, "w") as f:
+            f.write("{{ Content }}")
+        inputs = build_inputs(template, "/")
+        with open(template, "w") as f:
+            f.write("<main>{{ Content }}</main>")
+        self.assertNotEqual(inputs["template"], build_inputs(template, "/")["template"])
+
+    def test_invalidate(self):
+        manifest = BuildManifest(self.path, {"basepath": "/"})
+        manifest.record("a.md", "abc", "a.html")
+        manifest.invalidate([("a.md", "a.html"), ("b.md", "b.html")])
+        self.assertEqual(manifest.inputs, {})
+        self.assertTrue(manifest.needs_build("a.md", "abc", self.dest))
+        self.assertEqual(manifest.remove_stale({"a.md"}), ["b.html"])
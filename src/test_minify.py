@@ -0,0 +1,44 @@
+import unittest
+
+from minify import collapse_whitespace, minify_html
+
+
+class TestMinifyHtml(unittest.TestCase):
+    def test_block_tags(self):
+        self.assertEqual(
+            minify_html(
+                "<!doctype html>\n<html>\n  <body>\n    <p>text</p>\n  </body>\n"
+            ),
+            "<!doctype html><html><body><p>text</p></body>",
+        )
+
+    def test_inline_whitespace_collapses(self):
+        self.assertEqual(
+            minify_html("<p>a  \n <b>bold</b>\t text </p>"),
+            "<p>a <b>bold</b> text</p>",
+        )
+
+    def test_comments(self):
+        self.assertEqual(
+            minify_html("<p>a<!-- note\n --></p><!--[if IE]>ie<![endif]-->"),
+            "<p>a</p><!--[if IE]>ie<![endif]-->",
+        )
+
+    def test_preserved_elements(self):
+        html = (
+            "<div>\n  <pre>  a\n   b </pre>\n"
+            "  <textarea> c  d </textarea>\n"
+            "  <script>\n  x  =  1\n  </script>\n</div>"
+        )
+        self.assertEqual(
+            minify_html(html),
+            "<div><pre>  a\n   b </pre><textarea> c  d </textarea>"
+            "<script>\n  x  =  1\n  </script></div>",
+        )
+
+    def test_tags_untouched(self):
+        html = '<meta name="description"\n      content="a  b" />'
+        self.assertEqual(minify_html(html), html)
+
+    def test_collapse_whitespace(self):
+        self.assertEqual(collapse_whitespace(" a \n\t b "), " a b ")
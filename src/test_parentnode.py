@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from parentnode import ParentNode
@@ -38,3 +39,25 @@ class TestHTMLNode(unittest.TestCase):
             parent_node.to_html(),
             "<div><span><b>grandchild</b></span></div>",
         )
+
+    def test_iter_html(self):
+        parent_node = ParentNode(
+            "div", [ParentNode("p", [LeafNode(None, "text"), LeafNode("b", "bold")])]
+        )
+        self.assertEqual(
+            list(parent_node.iter_html()),
+            ["<div>", "<p>", "text", "<b>bold</b>", "</p>", "</div>"],
+        )
+
+    def test_write_html(self):
+        parent_node = ParentNode("div", [LeafNode("span", "child")])
+        out = io.StringIO()
+        parent_node.write_html(out)
+        self.assertEqual(out.getvalue(), "<div><span>child</span></div>")
+
+    def test_to_html_deep_nesting(self):
+        node = LeafNode("b", "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 5000 + "<b>deep</b>"))
@@ -0,0 +1,58 @@
+import os
+import time
+
+from converter import markdown_to_document
+from parsecache import ParseCache
+from test_support import TempDirTestCase
+
+
+class TestParseCache(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = os.path.join(self.tmp.name, "parse")
+        self.document = markdown_to_document("# Title\n\n[link](/a)")
+
+    def test_key(self):
+        key = ParseCache.key("# Title")
+        self.assertEqual(key, ParseCache.key("# Title"))
+        self.assertNotEqual(key, ParseCache.key("# Other"))
+        self.assertNotEqual(key, ParseCache.key("# Title", "/site/"))
+
+    def test_put_get(self):
+        cache = ParseCache(self.directory)
+        key = cache.key("# Title")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, {"title": "Title", "tags": ["a"]}, self.document)
+        meta, document = cache.get(key)
+        self.assertEqual(meta, {"title": "Title", "tags": ["a"]})
+        self.assertEqual(document.to_html(), self.document.to_html())
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_get_corrupt(self):
+        cache = ParseCache(self.directory)
+        os.makedirs(self.directory)
+        with open(os.path.join(self.directory, "bad"), "wb") as f:
+            f.write(b"\x00garbage")
+        self.assertIsNone(cache.get("bad"))
+
+    def test_prune_least_recently_used(self):
+        cache = ParseCache(self.directory)
+        for key in ("a", "b", "c"):
+            cache.put(key, {}, self.document)
+        size = os.path.getsize(os.path.join(self.directory, "a"))
+        # make "b" the oldest and "a" the most recently used entry
+        for age, key in enumerate(("a", "c", "b")):
+            timestamp = time.time() - 100 * age
+            os.utime(os.path.join(self.directory, key), (timestamp, timestamp))
+        cache.max_bytes = 2 * size
+        self.assertEqual(cache.prune(), 1)
+        self.assertEqual(sorted(os.listdir(self.directory)), ["a", "c"])
+
+    def test_prune_missing_directory(self):
+        self.assertEqual(ParseCache(self.directory, 0).prune(), 0)
+
+    def test_clear(self):
+        cache = ParseCache(self.directory)
+        cache.put("a", {}, self.document)
+        cache.clear()
+        self.assertFalse(os.path.exists(self.directory))
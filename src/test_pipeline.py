@@ -0,0 +1,50 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline import bounded_map
+
+
+class TestBoundedMap(unittest.TestCase):
+    def test_order(self):
+        with ThreadPoolExecutor(4) as executor:
+            self.assertEqual(
+                list(bounded_map(executor, lambda x: x * x, range(10), 3)),
+                [x * x for x in range(10)],
+            )
+
+    def test_pulls_items_lazily(self):
+        pulled = []
+
+        def items():
+            for i in range(10):
+                pulled.append(i)
+                yield i
+
+        with ThreadPoolExecutor(2) as executor:
+            results = bounded_map(executor, lambda x: x, items(), 3)
+            self.assertEqual(next(results), 0)
+            self.assertEqual(len(pulled), 3)
+            self.assertEqual(list(results), list(range(1, 10)))
+
+    def test_in_flight_limit(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def work(x):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            threading.Event().wait(0.001)
+            with lock:
+                running[0] -= 1
+            return x
+
+        with ThreadPoolExecutor(8) as executor:
+            list(bounded_map(executor, work, range(50), 2))
+        self.assertLessEqual(running[1], 2)
+
+    def test_propagates_errors(self):
+        with ThreadPoolExecutor(2) as executor:
+            with self.assertRaises(ZeroDivisionError):
+                list(bounded_map(executor, lambda x: 1 / x, [1, 0], 2))
@@ -0,0 +1,155 @@
+import argparse
+import io
+import os
+from contextlib import redirect_stdout
+
+from copyfiles import list_files
+from generate_page import collect_pages, generate_page_recursive
+from manifest import build_inputs
+from shard import (
+    SHARD_INDEX,
+    SHARD_OUTPUT,
+    ShardError,
+    build_fingerprint,
+    merge_shards,
+    parse_shard,
+    partition,
+    shard_count,
+    shard_dir,
+)
+from siteindex import SiteIndex
+from test_support import ContentTestCase
+
+
+class TestShard(ContentTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shards = os.path.join(self.tmp.name, "shards")
+
+    def fingerprint(self) -> str:
+        sources = [source for source, _ in collect_pages(self.content, "docs")]
+        return build_fingerprint(sources, build_inputs(self.template, "/", True))
+
+    def build_shards(self, count: int, indexes=None):
+        fingerprint = self.fingerprint()
+        for index in indexes or range(1, count + 1):
+            directory = shard_dir(index, count, self.shards)
+            site_index = SiteIndex(os.path.join(directory, SHARD_INDEX))
+            site_index.fingerprint = fingerprint
+            generate_page_recursive(
+                self.content,
+                self.template,
+                os.path.join(directory, SHARD_OUTPUT),
+                "/",
+                site_index=site_index,
+                relative_urls=True,
+                shard=(index, count),
+            )
+            site_index.save()
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/3"), (2, 3))
+        for text in ("0/3", "4/3", "3", "a/b", "1/"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_shard(text)
+
+    def test_partition(self):
+        pages = []
+        for i, size in enumerate([900, 100, 500, 400, 300, 200, 100]):
+            source = self.write(f"page{i}.md", "x" * size)
+            pages.append((source, f"docs/page{i}.html"))
+        shards = partition(pages, 3)
+        self.assertEqual(shards, partition(pages, 3))
+        self.assertEqual(sorted(sum(shards, [])), sorted(pages))
+        for shard in shards:
+            self.assertEqual(shard, [page for page in pages if page in shard])
+        loads = [sum(os.path.getsize(source) for source, _ in s) for s in shards]
+        self.assertEqual(sorted(loads), [800, 800, 900])
+        self.assertEqual(partition(pages, 1), [pages])
+
+    def test_partition_more_shards_than_pages(self):
+        source = self.write("index.md", "# Home")
+        shards = partition([(source, "docs/index.html")], 3)
+        self.assertEqual(sorted(len(shard) for shard in shards), [0, 0, 1])
+
+    def test_merge_matches_single_build(self):
+        for i in range(7):
+            self.write(f"blog/post{i}/index.md", f"# Post {i}\n\n" + "text " * i)
+        self.write("index.md", "---\ntitle: Home\n---\n# Welcome")
+        single = os.path.join(self.tmp.name, "single")
+        single_index = SiteIndex(os.path.join(self.tmp.name, "site.json"))
+        with redirect_stdout(io.StringIO()):
+            generate_page_recursive(
+                self.content,
+                self.template,
+                single,
+                "/",
+                site_index=single_index,
+                relative_urls=True,
+            )
+            self.build_shards(3)
+            merged = os.path.join(self.tmp.name, "merged")
+            merged_index = SiteIndex(os.path.join(self.tmp.name, "merged.json"))
+            merged_index.record("content/removed.md", "removed.html", {})
+            self.assertEqual(
+                merge_shards(
+                    merged,
+                    merged_index,
+                    directory=self.shards,
+                    fingerprint=self.fingerprint(),
+                ),
+                8,
+            )
+        self.assertEqual(list_files(merged), list_files(single))
+        for rel_path in list_files(single):
+            with open(os.path.join(single, rel_path)) as a, open(
+                os.path.join(merged, rel_path)
+            ) as b:
+                self.assertEqual(a.read(), b.read())
+        self.assertEqual(merged_index.pages, single_index.pages)
+
+    def test_shard_count(self):
+        with self.assertRaises(ShardError):
+            shard_count(self.shards)
+        for index in (1, 2):
+            directory = shard_dir(index, 3, self.shards)
+            os.makedirs(directory)
+            SiteIndex(os.path.join(directory, SHARD_INDEX), fingerprint="a").save()
+        with self.assertRaisesRegex(ShardError, "shards 3 of 3"):
+            shard_count(self.shards)
+        os.makedirs(shard_dir(3, 3, self.shards))
+        with self.assertRaisesRegex(ShardError, "unfinished shards 3 of 3"):
+            shard_count(self.shards)
+        last = os.path.join(shard_dir(3, 3, self.shards), SHARD_INDEX)
+        SiteIndex(last, fingerprint="b").save()
+        with self.assertRaisesRegex(ShardError, "not generated by one build"):
+            shard_count(self.shards)
+        SiteIndex(last, fingerprint="a").save()
+        self.assertEqual(shard_count(self.shards), 3)
+        self.assertEqual(shard_count(self.shards, "a"), 3)
+        with self.assertRaisesRegex(ShardError, "other sources or options"):
+            shard_count(self.shards, "b")
+        os.makedirs(shard_dir(1, 2, self.shards))
+        with self.assertRaisesRegex(ShardError, r"counts \[2, 3\]"):
+            shard_count(self.shards)
+
+    def test_merge_rejects_stale_shards(self):
+        for name in ("majesty", "tom", "glorfindel"):
+            self.write(f"blog/{name}/index.md", f"# {name}")
+        self.write("index.md", "# Home")
+        merged = os.path.join(self.tmp.name, "merged")
+        site_index = SiteIndex(os.path.join(self.tmp.name, "merged.json"))
+        with redirect_stdout(io.StringIO()):
+            self.build_shards(3)
+            os.remove(os.path.join(self.content, "blog", "majesty", "index.md"))
+            with self.assertRaisesRegex(ShardError, "other sources or options"):
+                merge_shards(
+                    merged,
+                    site_index,
+                    directory=self.shards,
+                    fingerprint=self.fingerprint(),
+                )
+            self.build_shards(3, (1, 2))
+            with self.assertRaisesRegex(ShardError, "not generated by one build"):
+                merge_shards(merged, site_index, directory=self.shards)
+        self.assertFalse(os.path.exists(merged))
@@ -0,0 +1,123 @@
+import io
+import os
+from contextlib import redirect_stdout
+
+from siteindex import SiteIndex, write_feed, write_listings, write_sitemap
+from test_support import TempDirTestCase, write_file
+
+
+class TestSiteIndex(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.index = SiteIndex(os.path.join(self.tmp.name, ".build", "site.json"))
+        self.index.record("content/index.md", "index.html", {"title": "Home"})
+        self.index.record(
+            "content/blog/old/index.md",
+            os.path.join("blog", "old", "index.html"),
+            {"title": "Old", "date": "2023-01-01"},
+        )
+        self.index.record(
+            "content/blog/new.md",
+            os.path.join("blog", "new.html"),
+            {"title": "New & shiny", "date": "2024-01-01", "tags": ["a"]},
+        )
+        os.makedirs(os.path.join(self.dest, "blog"))
+        self.template = write_file(
+            os.path.join(self.tmp.name, "template.html"),
+            "<title>{{ Title }}</title>{{ Content }}",
+        )
+
+    def read(self, *path: str) -> str:
+        with open(os.path.join(self.dest, *path)) as f:
+            return f.read()
+
+    def test_entries_newest_first(self):
+        self.assertEqual(
+            [entry["url"] for entry in self.index.entries(self.dest)],
+            ["/blog/new.html", "/blog/old/", "/"],
+        )
+
+    def test_save_load_retain(self):
+        self.index.retain({"content/index.md"})
+        self.index.save()
+        self.assertEqual(
+            SiteIndex.load(self.index.path).pages,
+            {
+                "content/index.md": {
+                    "dest": "index.html",
+                    "title": "Home",
+                }
+            },
+        )
+
+    def test_load_outdated_format(self):
+        os.makedirs(os.path.dirname(self.index.path))
+        with open(self.index.path, "w") as f:
+            f.write('{"pages": {"a.md": {"dest": "docs/a.html", "title": "A"}}}')
+        self.assertEqual(SiteIndex.load(self.index.path).pages, {})
+
+    def test_write_sitemap(self):
+        with redirect_stdout(io.StringIO()):
+            write_sitemap(self.index, self.dest, "https://example.com/")
+        self.assertIn(
+            "<url><loc>https://example.com/blog/new.html</loc>"
+            "<lastmod>2024-01-01</lastmod></url>",
+            self.read("sitemap.xml"),
+        )
+
+    def test_write_feed(self):
+        with redirect_stdout(io.StringIO()):
+            write_feed(self.index, self.dest, "https://example.com", "Site", limit=1)
+        feed = self.read("feed.xml")
+        self.assertEqual(feed.count("<entry>"), 1)
+        self.assertIn("<title>New &amp; shiny</title>", feed)
+        self.assertIn("<updated>2024-01-01T00:00:00Z</updated>", feed)
+        self.assertIn('<category term="a"/>', feed)
+
+    def test_write_listings(self):
+        with redirect_stdout(io.StringIO()):
+            listings = write_listings(self.index, self.dest, self.template, "/base/")
+        path = os.path.join(self.dest, "blog", "index.html")
+        self.assertEqual(listings, [os.path.join("blog", "index.html")])
+        self.assertEqual(
+            self.read("blog", "index.html"),
+            '<title>Blog</title><div><h1>Blog</h1><ul><li><a href="/base/blog/new.html">'
+            'New & shiny</a> <time datetime="2024-01-01">2024-01-01</time></li>'
+            '<li><a href="/base/blog/old/">Old</a> <time datetime="2023-01-01">'
+            "2023-01-01</time></li></ul></div>",
+        )
+        self.index.retain({"content/index.md"})
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(
+                write_listings(self.index, self.dest, self.template, "/"), []
+            )
+        self.assertFalse(os.path.exists(path))
+
+    def test_section_with_own_index_has_no_listing(self):
+        self.index.record(
+            "content/blog/index.md",
+            os.path.join("blog", "index.html"),
+            {"title": "My blog"},
+        )
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(
+                write_listings(self.index, self.dest, self.template, "/"), []
+            )
+
+    def test_section_gains_index_page(self):
+        with redirect_stdout(io.StringIO()):
+            write_listings(self.index, self.dest, self.template, "/")
+        self.index.record(
+            "content/blog/index.md",
+            os.path.join("blog", "index.html"),
+            {"title": "My blog"},
+        )
+        with open(os.path.join(self.dest, "blog", "index.html"), "w") as f:
+            f.write("<h1>My blog</h1>")
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(
+                write_listings(self.index, self.dest, self.template, "/"), []
+            )
+        self.assertEqual(self.read("blog", "index.html"), "<h1>My blog</h1>")
+        self.assertEqual(self.index.listings, [])
@@ -1,6 +1,10 @@
+import io
+import time
 import unittest
+
+from benchmark import ADVERSARIAL_KINDS, adversarial_page
+from converter import markdown_to_html_node
 from splitter import (
-    InvalidMarkdownError,
     split_nodes_delimiter,
     extract_markdown_images,
     extract_markdown_links,
@@ -26,10 +30,12 @@ class TestSplitter(unittest.TestCase):
         self.assertEqual(split_nodes_delimiter(nodes, "*", TextType.BOLD), nodes)
 
     def test_split_nodes_delimiter_no_closing_delimiter(self):
-        with self.assertRaises(InvalidMarkdownError):
-            split_nodes_delimiter(
-                [TextNode("bold only starts *here", TextType.TEXT)], "*", TextType.BOLD
-            )
+        node = TextNode("*bold* only starts *here", TextType.TEXT)
+        expected = [
+            TextNode("bold", TextType.BOLD),
+            TextNode(" only starts *here", TextType.TEXT),
+        ]
+        self.assertEqual(split_nodes_delimiter([node], "*", TextType.BOLD), expected)
 
     def test_split_nodes_delimiter_code(self):
         node = TextNode("text `code` text", TextType.TEXT)
@@ -252,6 +258,56 @@ class TestSplitter(unittest.TestCase):
         ]
         self.assertListEqual(text_to_textnodes(text), expected)
 
+    def test_text_to_textnodes_underscore_in_link(self):
+        text = "see [snake_case](https://example.com/snake_case) here"
+        expected = [
+            TextNode("see ", TextType.TEXT),
+            TextNode("snake_case", TextType.LINK, "https://example.com/snake_case"),
+            TextNode(" here", TextType.TEXT),
+        ]
+        self.assertListEqual(text_to_textnodes(text), expected)
+
+    def test_text_to_textnodes_code_keeps_link_syntax(self):
+        text = "`[link](url)` and `**bold**`"
+        expected = [
+            TextNode("[link](url)", TextType.CODE),
+            TextNode(" and ", TextType.TEXT),
+            TextNode("**bold**", TextType.CODE),
+        ]
+        self.assertListEqual(text_to_textnodes(text), expected)
+
+    def test_text_to_textnodes_link_inside_bold(self):
+        text = "**read [this](/a) now**"
+        expected = [
+            TextNode("read ", TextType.TEXT),
+            TextNode("this", TextType.LINK, "/a"),
+            TextNode(" now", TextType.TEXT),
+        ]
+        self.assertListEqual(text_to_textnodes(text), expected)
+
+    def test_text_to_textnodes_many_links(self):
+        text = " ".join(f"[l{i}](/u{i})" for i in range(1000))
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 1999)
+        self.assertEqual(nodes[-1], TextNode("l999", TextType.LINK, "/u999"))
+
+    def test_text_to_textnodes_no_closing_delimiter(self):
+        self.assertListEqual(
+            text_to_textnodes("bold only starts **here, my_var is `code`"),
+            [
+                TextNode("bold only starts **here, my_var is ", TextType.TEXT),
+                TextNode("code", TextType.CODE),
+            ],
+        )
+
+    def test_split_nodes_link_after_image_syntax(self):
+        node = TextNode("![a](/b) and [a](/b)", TextType.TEXT)
+        expected = [
+            TextNode("![a](/b) and ", TextType.TEXT),
+            TextNode("a", TextType.LINK, "/b"),
+        ]
+        self.assertListEqual(split_nodes_link([node]), expected)
+
     def test_markdown_to_blocks(self):
         md = """
 This is **bolded** paragraph
@@ -316,6 +372,10 @@ in a paragraph
         with self.assertRaises(ValueError):
             extract_title(md)
 
+    def test_extract_title_from_file(self):
+        f = io.StringIO("text\n\n# Title \n\n# Other")
+        self.assertEqual(extract_title(f), "Title")
+
     def test_extract_title(self):
         md = """
 # This is a title
@@ -325,3 +385,51 @@ text
 in a paragraph
 """
         self.assertEqual(extract_title(md), "This is a title")
+
+
+class TestWorstCase(unittest.TestCase):
+    # generous for slow machines, quadratic behavior on these sizes takes far longer
+    BUDGET = 2.0
+    SIZE = 200_000
+
+    def assertWithinBudget(self, run, kind: str):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, self.BUDGET, f"{kind} took {elapsed:.2f}s")
+
+    def test_text_to_textnodes(self):
+        for kind in ADVERSARIAL_KINDS:
+            text = adversarial_page(kind, self.SIZE).split("\n\n")[1]
+            with self.subTest(kind=kind):
+                self.assertWithinBudget(lambda: text_to_textnodes(text), kind)
+
+    def test_split_nodes(self):
+        for kind in ADVERSARIAL_KINDS:
+            # larger, a search per match over the remaining text shows from here
+            nodes = [TextNode(adversarial_page(kind, 4 * self.SIZE), TextType.TEXT)]
+            with self.subTest(kind=kind):
+                self.assertWithinBudget(
+                    lambda: split_nodes_link(split_nodes_image(nodes)), kind
+                )
+                for delimiter in ("`", "_", "**"):
+                    self.assertWithinBudget(
+                        lambda: split_nodes_delimiter(nodes, delimiter, TextType.CODE),
+                        kind,
+                    )
+
+    def test_markdown_to_html_node(self):
+        for kind in ADVERSARIAL_KINDS:
+            markdown = adversarial_page(kind, self.SIZE)
+            with self.subTest(kind=kind):
+                self.assertWithinBudget(
+                    lambda: markdown_to_html_node(markdown).to_html(), kind
+                )
+
+    def test_literal_fallback_keeps_text(self):
+        for kind in ("brackets", "delimiters"):
+            text = adversarial_page(kind, 1000).split("\n\n")[1]
+            with self.subTest(kind=kind):
+                nodes = text_to_textnodes(text)
+                self.assertEqual(len(nodes), 1)
+                self.assertEqual(nodes[0], TextNode(text, TextType.TEXT))
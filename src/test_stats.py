@@ -0,0 +1,87 @@
+import os
+import tempfile
+import time
+import tracemalloc
+import unittest
+
+from stats import BuildReport, PageStats, profile
+
+
+class TestStats(unittest.TestCase):
+    def test_stage(self):
+        stats = PageStats("index.md")
+        with stats.stage("read"):
+            time.sleep(0.01)
+        self.assertGreaterEqual(stats.seconds["read"], 0.01)
+        self.assertEqual(stats.allocated, {})
+
+    def test_stage_allocations(self):
+        stats = PageStats("index.md")
+        tracemalloc.start()
+        try:
+            with stats.stage("render"):
+                data = "x" * 100_000
+        finally:
+            tracemalloc.stop()
+        self.assertGreaterEqual(stats.allocated["render"], len(data))
+
+    def test_page_peak(self):
+        tracemalloc.start()
+        try:
+            stats = PageStats("index.md")
+            with stats.stage("inline"):
+                data = "x" * 200_000
+                del data
+            with stats.stage("render"):
+                data = "x" * 100_000
+        finally:
+            tracemalloc.stop()
+        self.assertGreaterEqual(stats.peak, 200_000)
+        self.assertLess(stats.allocated["render"], 200_000)
+
+    def test_report_memory_budget(self):
+        report = BuildReport(memory_budget=1000)
+        self.assertTrue(report.trace_memory)
+        for i, peak in enumerate([500, 3000, 2000]):
+            stats = PageStats(f"{i}.md")
+            stats.peak = peak
+            stats.streamed = i == 2
+            report.add(stats)
+        self.assertEqual(
+            [stats.source for stats in report.over_budget()], ["1.md", "2.md"]
+        )
+        data = report.to_dict()
+        self.assertEqual(data["peak"], 3000)
+        self.assertEqual(data["over_budget"], ["1.md", "2.md"])
+        self.assertEqual(data["streamed"], ["2.md"])
+        self.assertIn("2 pages over the memory budget of 1.0KB", report.summary())
+
+    def test_roundtrip(self):
+        stats = PageStats("index.md")
+        stats.seconds = {"read": 0.5, "write": 0.25}
+        loaded = PageStats.from_dict(stats.to_dict())
+        self.assertEqual(loaded.seconds, stats.seconds)
+        self.assertEqual(loaded.total, 0.75)
+
+    def test_report_slowest(self):
+        report = BuildReport(top=2)
+        for i, seconds in enumerate([0.1, 0.3, 0.2]):
+            stats = PageStats(f"{i}.md")
+            stats.seconds = {"inline": seconds}
+            report.add(stats)
+        self.assertEqual([stats.source for stats in report.slowest()], ["1.md", "2.md"])
+        data = report.to_dict()
+        self.assertEqual(data["pages"], 3)
+        self.assertAlmostEqual(data["stages"]["inline"], 0.6)
+
+    def test_profile_collapsed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profile.folded")
+            with profile(path, "collapsed"):
+                deadline = time.perf_counter() + 0.05
+                while time.perf_counter() < deadline:
+                    pass
+            with open(path) as f:
+                lines = f.read().splitlines()
+        self.assertTrue(lines)
+        self.assertIn("test_profile_collapsed", lines[0])
@@ -0,0 +1,29 @@
+import os
+
+from storage import load_json, replace_file, save_json
+from test_support import TempDirTestCase
+
+
+class TestStorage(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tmp.name, ".build", "data.json")
+
+    def test_save_load_roundtrip(self):
+        save_json(self.path, {"b": [1, 2], "a": None}, sort_keys=True)
+        self.assertEqual(load_json(self.path), {"a": None, "b": [1, 2]})
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["data.json"])
+
+    def test_load_missing_or_unreadable(self):
+        self.assertIsNone(load_json(self.path))
+        with replace_file(self.path) as f:
+            f.write("{not json")
+        self.assertIsNone(load_json(self.path))
+
+    def test_replace_file_keeps_old_contents_on_error(self):
+        save_json(self.path, [1])
+        with self.assertRaises(RuntimeError):
+            with replace_file(self.path) as f:
+                f.write("[2")
+                raise RuntimeError
+        self.assertEqual(load_json(self.path), [1])
@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+
+
+TEMPLATE = "<title>{{ Title }}</title><main>{{ Content }}</main>"
+
+
+def write_file(path: str, content: str | bytes) -> str:
+    """
+    Write text or bytes to path, creating its directory, and return path.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb" if isinstance(content, bytes) else "w") as f:
+        f.write(content)
+    return path
+
+
+class TempDirTestCase(unittest.TestCase):
+    # self.tmp is a temporary directory removed after each test
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+
+class ContentTestCase(TempDirTestCase):
+    # temporary site with content, output directory and template
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        self.template = write_file(
+            os.path.join(self.tmp.name, "template.html"), TEMPLATE
+        )
+        self.manifest = os.path.join(self.tmp.name, "manifest.json")
+
+    def write(self, path: str, text: str) -> str:
+        return write_file(os.path.join(self.content, path), text)
@@ -0,0 +1,112 @@
+import io
+import os
+
+from template import TemplateError, compile_template
+from test_support import TempDirTestCase, write_file
+from urls import AssetManifest, UrlResolver
+
+
+class TestTemplate(TempDirTestCase):
+    def write(self, name: str, text: str) -> str:
+        return write_file(os.path.join(self.tmp.name, name), text)
+
+    def test_segments(self):
+        path = self.write("t.html", "<title>{{ Title }}</title>{{Content}}!")
+        template = compile_template(path)
+        self.assertEqual(template.static, ["<title>", "</title>", "!"])
+        self.assertEqual(template.names, ["Title", "Content"])
+
+    def test_render(self):
+        path = self.write("t.html", "<title>{{ Title }}</title><p>{{ Content }}</p>")
+        template = compile_template(path)
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "text"}),
+            "<title>Hi</title><p>text</p>",
+        )
+
+    def test_render_missing_value(self):
+        path = self.write("t.html", "<p>{{ Author }}</p>")
+        self.assertEqual(compile_template(path).render({}), "<p></p>")
+
+    def test_write(self):
+        path = self.write("t.html", "<p>{{ Content }}</p>")
+        out = io.StringIO()
+        compile_template(path).write(out, {"Content": "text"})
+        self.assertEqual(out.getvalue(), "<p>text</p>")
+
+    def test_minify(self):
+        self.write("partials/nav.html", "  <nav>\n  <a href='/'>Home</a>\n</nav>\n")
+        path = self.write(
+            "t.html",
+            "<html>\n  <!-- layout -->\n  <title> {{ Title }} </title>\n"
+            "  {{> partials/nav.html }}\n  <pre>\n  kept\n</pre>\n</html>\n",
+        )
+        template = compile_template(path, minify=True)
+        self.assertEqual(
+            template.render({"Title": "Hi"}),
+            "<html><title>Hi</title><nav><a href='/'>Home</a></nav>"
+            "<pre>\n  kept\n</pre></html>",
+        )
+
+    def test_integrity(self):
+        path = self.write(
+            "t.html",
+            '<link href="/index.css" rel="stylesheet" />'
+            '<a href="/index.css">css</a><script src="/app.js"></script>',
+        )
+        assets = AssetManifest(
+            "assets.json",
+            {
+                "/index.css": {"url": "/index.01.css", "integrity": "sha384-a"},
+                "/app.js": {"url": "/app.23.js"},
+            },
+        )
+        self.assertEqual(
+            compile_template(path).render({}, UrlResolver("/", assets=assets)),
+            '<link href="/index.01.css" integrity="sha384-a" crossorigin="anonymous" '
+            'rel="stylesheet" /><a href="/index.01.css">css</a>'
+            '<script src="/app.23.js"></script>',
+        )
+
+    def test_partials(self):
+        self.write("partials/header.html", "<h1>{{ Title }}</h1>")
+        path = self.write("t.html", "{{> partials/header.html }}<p>{{ Content }}</p>")
+        template = compile_template(path)
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "text"}),
+            "<h1>Hi</h1><p>text</p>",
+        )
+        self.assertEqual(
+            template.dependencies,
+            [path, os.path.join(self.tmp.name, "partials/header.html")],
+        )
+
+    def test_circular_partial(self):
+        self.write("a.html", "{{> b.html }}")
+        path = self.write("b.html", "{{> a.html }}")
+        with self.assertRaises(TemplateError):
+            compile_template(path)
+
+    def test_resolve_urls(self):
+        path = self.write(
+            "t.html",
+            '<link href="/index.css" /><a href="https://x.org/">{{ Title }}</a>'
+            '<img src="/a.png" />',
+        )
+        template = compile_template(path)
+        self.assertEqual(
+            template.render({"Title": 'href="/t'}, UrlResolver("/site/")),
+            '<link href="/site/index.css" /><a href="https://x.org/">href="/t</a>'
+            '<img src="/site/a.png" />',
+        )
+        self.assertEqual(
+            template.render({}),
+            '<link href="/index.css" /><a href="https://x.org/"></a><img src="/a.png" />',
+        )
+
+    def test_render_fragments(self):
+        path = self.write("t.html", "<p>{{ Content }}</p>")
+        self.assertEqual(
+            compile_template(path).render({"Content": iter(["a", "b"])}),
+            "<p>ab</p>",
+        )
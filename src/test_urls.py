@@ -0,0 +1,65 @@
+import unittest
+
+from urls import AssetManifest, UrlResolver, page_url
+
+
+class TestUrlResolver(unittest.TestCase):
+    def test_basepath(self):
+        resolve_url = UrlResolver("/site/")
+        self.assertEqual(resolve_url("/"), "/site/")
+        self.assertEqual(resolve_url("/images/a.png"), "/site/images/a.png")
+        self.assertEqual(resolve_url("/site/images/a.png"), "/site/images/a.png")
+        self.assertEqual(resolve_url("/sitemap.xml"), "/site/sitemap.xml")
+
+    def test_unchanged(self):
+        resolve_url = UrlResolver("/site/", "/blog/post/")
+        for url in (
+            "https://example.com/",
+            "//cdn.example.com/a.js",
+            "mailto:a@b.c",
+            "#top",
+            "images/a.png",
+            "../a.png",
+        ):
+            self.assertEqual(resolve_url(url), url)
+
+    def test_relative(self):
+        resolve_url = UrlResolver("/site", "/blog/post/")
+        self.assertEqual(resolve_url("/"), "../../")
+        self.assertEqual(resolve_url("/images/a.png"), "../../images/a.png")
+        self.assertEqual(resolve_url("/site/blog/"), "../")
+        self.assertEqual(resolve_url("/blog/post/#top"), "./#top")
+        self.assertEqual(resolve_url("/blog/other.html?x=/y"), "../other.html?x=/y")
+        self.assertEqual(UrlResolver("/", "/")("/blog/"), "blog/")
+        self.assertEqual(UrlResolver("/", "/about.html")("/a.png"), "a.png")
+
+    def test_key(self):
+        self.assertEqual(UrlResolver("/a/").key, UrlResolver("/a").key)
+        self.assertEqual(
+            UrlResolver("/", "/blog/x.html").key, UrlResolver("/", "/blog/y.html").key
+        )
+        self.assertNotEqual(UrlResolver("/").key, UrlResolver("/", "/").key)
+
+    def test_assets(self):
+        assets = AssetManifest(
+            "assets.json",
+            {
+                "/index.css": {"url": "/index.0123.css", "integrity": "sha384-x"},
+                "/images/a.png": {"url": "/images/a.4567.png"},
+            },
+        )
+        resolve_url = UrlResolver("/site/", assets=assets)
+        self.assertEqual(resolve_url("/index.css"), "/site/index.0123.css")
+        self.assertEqual(resolve_url("/site/index.css?v=1"), "/site/index.0123.css?v=1")
+        self.assertEqual(resolve_url("/blog/"), "/site/blog/")
+        self.assertEqual(resolve_url("images/a.png"), "images/a.png")
+        self.assertEqual(resolve_url.integrity("/site/index.css"), "sha384-x")
+        self.assertIsNone(resolve_url.integrity("/images/a.png"))
+        resolve_url = UrlResolver("/site/", "/blog/post/", assets)
+        self.assertEqual(resolve_url("/images/a.png"), "../../images/a.4567.png")
+        self.assertNotEqual(resolve_url.key, UrlResolver("/site/", "/blog/post/").key)
+
+    def test_page_url(self):
+        self.assertEqual(page_url("docs/index.html", "docs"), "/")
+        self.assertEqual(page_url("docs/blog/post/index.html", "docs"), "/blog/post/")
+        self.assertEqual(page_url("docs/about.html", "docs"), "/about.html")
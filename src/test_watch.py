@@ -0,0 +1,33 @@
+import os
+
+from test_support import TempDirTestCase, write_file
+from watch import diff_snapshots, snapshot
+
+
+class TestWatch(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = write_file(os.path.join(self.tmp.name, "index.md"), "# Title")
+
+    def test_snapshot(self):
+        self.assertEqual(list(snapshot([self.tmp.name])), [self.path])
+        self.assertEqual(list(snapshot([self.path])), [self.path])
+        self.assertEqual(snapshot([os.path.join(self.tmp.name, "missing")]), {})
+
+    def test_diff_snapshots(self):
+        old = snapshot([self.tmp.name])
+        added = os.path.join(self.tmp.name, "new.md")
+        with open(added, "w") as f:
+            f.write("# New")
+        with open(self.path, "a") as f:
+            f.write("\n\ntext")
+        self.assertEqual(
+            diff_snapshots(old, snapshot([self.tmp.name])), ({self.path, added}, set())
+        )
+
+    def test_diff_snapshots_removed(self):
+        old = snapshot([self.tmp.name])
+        os.remove(self.path)
+        self.assertEqual(
+            diff_snapshots(old, snapshot([self.tmp.name])), (set(), {self.path})
+        )
@@ -13,6 +13,7 @@ class TextType(Enum):
 
 
 class TextNode:
+    __slots__ = ("text", "texttype", "url")
 
     def __init__(self, text: str, texttype: TextType, url: str | None = None):
         """
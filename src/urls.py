@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import posixpath
+
+from storage import load_json, save_json
+
+
+ASSET_MANIFEST_PATH = os.path.join(".build", "assets.json")
+# asset manifest fields changing rendered pages
+RENDERED_FIELDS = ("url", "integrity", "width", "height")
+
+
+class AssetManifest:
+
+    def __init__(self, path: str, assets: dict[str, dict] | None = None):
+        """
+        Initialize AssetManifest.
+
+        Args:
+            path: Location of the manifest file on disk
+            assets: Mapping of site-relative asset url, e.g. "/index.css", to its
+                fingerprinted url, subresource integrity and the size and mtime of
+                the hashed source file, and image width and height. Every field
+                is optional.
+        """
+        self.path = path
+        self.assets = assets or {}
+        self.key = hashlib.sha256(
+            json.dumps(
+                {
+                    url: [entry.get(key) for key in RENDERED_FIELDS]
+                    for url, entry in self.assets.items()
+                },
+                sort_keys=True,
+            ).encode()
+        ).hexdigest()
+
+    @classmethod
+    def load(cls, path: str) -> "AssetManifest":
+        return cls(path, load_json(path))
+
+    def save(self):
+        save_json(self.path, self.assets, sort_keys=True)
+
+    def url(self, path: str) -> str:
+        return self.assets.get(path, {}).get("url", path)
+
+    def integrity(self, path: str) -> str | None:
+        return self.assets.get(path, {}).get("integrity")
+
+    def size(self, path: str) -> tuple[int, int] | None:
+        entry = self.assets.get(path, {})
+        if "width" not in entry:
+            return None
+        return entry["width"], entry["height"]
+
+
+class UrlResolver:
+
+    def __init__(
+        self,
+        basepath: str = "/",
+        page_url: str | None = None,
+        assets: AssetManifest | None = None,
+    ):
+        """
+        Initialize UrlResolver.
+
+        Args:
+            basepath: Prefix of the site root, applied to root-relative urls
+            page_url: Site-relative url of the page being rendered. When given,
+                root-relative urls are made relative to the page and basepath is
+                only stripped from urls already carrying it.
+            assets: Manifest of fingerprinted static files, urls of assets are
+                replaced with their fingerprinted urls
+        """
+        self.basepath = basepath if basepath.endswith("/") else basepath + "/"
+        self.page_dir = None
+        if page_url is not None:
+            self.page_dir = posixpath.dirname(page_url) or "/"
+        self.assets = assets
+
+    @property
+    def key(self) -> str:
+        """
+        Identify the resolution done, equal for resolvers rewriting urls the same way.
+        """
+        key = self.basepath
+        if self.page_dir is not None:
+            key += f"\0{self.page_dir}"
+        if self.assets is not None:
+            key += f"\0{self.assets.key}"
+        return key
+
+    def __call__(self, url: str) -> str:
+        """
+        Resolve url of an href or src attribute. Urls with a scheme, protocol-relative
+        urls, fragments and relative urls are left alone.
+        """
+        if not url.startswith("/") or url.startswith("//"):
+            return url
+        prefixed = self.basepath != "/" and (
+            url.startswith(self.basepath) or url == self.basepath[:-1]
+        )
+        if self.page_dir is None and self.assets is None:
+            return url if prefixed else self.basepath + url[1:]
+        path, rest = self._site_path(url, prefixed)
+        if self.assets is not None:
+            path = self.assets.url(path)
+        if self.page_dir is None:
+            return self.basepath + path[1:] + rest
+        relative = posixpath.relpath(path, self.page_dir)
+        if path.endswith("/"):
+            relative = "./" if relative == "." else relative + "/"
+        return relative + rest
+
+    def integrity(self, url: str) -> str | None:
+        """
+        Return subresource integrity of the asset at url, None when it has none.
+        """
+        path = self._asset_path(url)
+        return path and self.assets.integrity(path)
+
+    def image_attributes(self, url: str) -> tuple[tuple[str, str], ...]:
+        """
+        Return width, height and lazy loading attributes for a local image at url
+        with known dimensions, nothing for other images.
+        """
+        path = self._asset_path(url)
+        size = path and self.assets.size(path)
+        if not size:
+            return ()
+        return (
+            ("width", str(size[0])),
+            ("height", str(size[1])),
+            ("loading", "lazy"),
+            ("decoding", "async"),
+        )
+
+    def _asset_path(self, url: str) -> str | None:
+        if self.assets is None or not url.startswith("/") or url.startswith("//"):
+            return None
+        prefixed = self.basepath != "/" and url.startswith(self.basepath)
+        return self._site_path(url, prefixed)[0]
+
+    def _site_path(self, url: str, prefixed: bool) -> tuple[str, str]:
+        # split root-relative url into its path from the site root and ?# suffix
+        if prefixed:
+            url = url[len(self.basepath) - 1 :] or "/"
+        end = len(url)
+        for delimiter in "?#":
+            position = url.find(delimiter)
+            if position != -1:
+                end = min(end, position)
+        return url[:end], url[end:]
+
+
+def page_url(dest_path: str, dest_dir: str) -> str:
+    """
+    Return url of output file relative to the site root, "/blog/post/" for
+    docs/blog/post/index.html.
+    """
+    url = "/" + os.path.relpath(dest_path, dest_dir).replace(os.sep, "/")
+    if url.endswith("/index.html"):
+        url = url[: -len("index.html")]
+    return url
@@ -0,0 +1,55 @@
+import os
+import time
+from typing import Callable, Dict, Iterable, Set, Tuple
+
+
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+def snapshot(paths: Iterable[str]) -> Snapshot:
+    """
+    Record (mtime_ns, size) of every file under given files and directories.
+    """
+    result = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            result[path] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for root, _, names in os.walk(path):
+            for name in names:
+                file_path = os.path.join(root, name)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                result[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return result
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> Tuple[Set[str], Set[str]]:
+    """
+    Compare two snapshots and return (added or modified paths, removed paths).
+    """
+    changed = {path for path, stat in new.items() if old.get(path) != stat}
+    removed = set(old) - set(new)
+    return changed, removed
+
+
+def watch(
+    get_paths: Callable[[], Iterable[str]],
+    callback: Callable[[Set[str], Set[str]], None],
+    interval: float = 0.5,
+):
+    """
+    Poll paths forever and call callback(changed, removed) whenever files change.
+    get_paths is called on every poll so the set of watched paths may change.
+    """
+    previous = snapshot(get_paths())
+    while True:
+        time.sleep(interval)
+        current = snapshot(get_paths())
+        changed, removed = diff_snapshots(previous, current)
+        previous = current
+        if changed or removed:
+            callback(changed, removed)